@@ -1,7 +1,14 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .utils.metrics import METRICS_ENABLED, SERVER_TIMING, add_db_time, timed_phase
+from .utils.slow_query import explain, slow_query_log
+from .utils.sqlite_tuning import apply_sqlite_pragmas, describe_sqlite_pragmas
+
+logger = logging.getLogger(__name__)
 
 # Create database engine
 engine = create_engine(
@@ -11,6 +18,42 @@ engine = create_engine(
     echo=settings.debug
 )
 
+# Apply the SQLite tuning profile (WAL, busy_timeout, mmap, ...) to every new connection
+if engine.dialect.name == "sqlite":
+    _sqlite_profile_logged = False
+
+    @event.listens_for(engine, "connect")
+    def _tune_sqlite_connection(dbapi_connection, connection_record):
+        global _sqlite_profile_logged
+        apply_sqlite_pragmas(dbapi_connection)
+        if not _sqlite_profile_logged:
+            _sqlite_profile_logged = True
+            logger.info("SQLite %s", describe_sqlite_pragmas(dbapi_connection))
+
+# Time statements for /metrics and Server-Timing, and log the ones over SLOW_QUERY_MS
+if METRICS_ENABLED or SERVER_TIMING or slow_query_log.enabled:
+    # A connection runs one statement at a time, so one start time per connection is enough
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info["statement_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("statement_started")
+        add_db_time(elapsed)
+        if slow_query_log.is_slow(elapsed):
+            dbapi_connection = cursor.connection
+            slow_query_log.record(
+                "sqlalchemy", statement, None if executemany else parameters, elapsed,
+                None if executemany else lambda: explain(dbapi_connection, engine.dialect.name, statement, parameters),
+            )
+
+    # after_cursor_execute does not fire for a failed statement
+    @event.listens_for(engine, "handle_error")
+    def _drop_statement_timer(exception_context):
+        if exception_context.connection is not None:
+            exception_context.connection.info.pop("statement_started", None)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -22,6 +65,10 @@ Base = declarative_base()
 def get_db():
     db = SessionLocal()
     try:
+        if SERVER_TIMING:
+            # Check the connection out up front so pool waits show up as "acquire"
+            with timed_phase("acquire"):
+                db.connection()
         yield db
     finally:
         db.close()
\ No newline at end of file
@@ -1,13 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from .config import settings
+from .middleware.compression import CompressionMiddleware
+from .middleware.metrics import MetricsMiddleware
+from .middleware.server_timing import ServerTimingMiddleware
 from .routes import auth, products, orders, categories
+from .routes.products import catalog_cache, suggest_index
+from .utils.compression import compression_stats
+from .utils.metrics import METRICS_ENABLED, PROMETHEUS_CONTENT_TYPE, SERVER_TIMING, request_metrics
+from .utils.responses import FastJSONResponse
 
 # Create FastAPI app
 app = FastAPI(
     title="Farmer Marketplace API",
     description="A marketplace connecting farmers directly with customers",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -19,6 +28,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses for clients that accept gzip/brotli
+app.add_middleware(CompressionMiddleware)
+
+# Opt-in per-request phase breakdown; outside compression so encode includes it
+if SERVER_TIMING:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Outermost, so latency and response sizes include compression
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(products.router)
@@ -42,6 +62,31 @@ def health_check():
     return {"status": "healthy", "version": "1.1.0"}
 
 
+@app.get("/health/compression")
+def compression_metrics():
+    """Compressed vs. uncompressed response byte counters."""
+    return compression_stats.snapshot()
+
+
+@app.get("/health/suggest")
+def suggest_metrics():
+    """Size and memory footprint of the autocomplete index, and its last refresh."""
+    return suggest_index.stats()
+
+
+@app.get("/health/catalog")
+def catalog_cache_metrics():
+    """Size, hit/miss counters and invalidations of the product catalog cache."""
+    return catalog_cache.stats()
+
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Request metrics in Prometheus text format."""
+    return Response(request_metrics.render(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
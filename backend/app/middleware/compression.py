@@ -0,0 +1,89 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..utils.compression import (
+    StreamCompressor,
+    compress_response_body,
+    compression_stats,
+    is_compressible,
+    negotiate_encoding,
+)
+from ..utils.metrics import timed_phase
+
+
+class CompressionMiddleware:
+    """Negotiate gzip/brotli for JSON responses using the shared compression settings."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding")
+        if not negotiate_encoding(accept_encoding):
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        content_type = None
+        compressor = None
+        passthrough = False
+        original_size = 0
+        sent_size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, content_type, compressor, passthrough, original_size, sent_size
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type")
+                passthrough = "content-encoding" in headers or not is_compressible(content_type)
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None and not more_body:
+                # Whole body in one message: compress only if it is worth it
+                with timed_phase("encode"):
+                    sent, encoding = compress_response_body(body, content_type, accept_encoding)
+                headers = MutableHeaders(raw=start_message["headers"])
+                if encoding:
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(sent))
+                headers.add_vary_header("Accept-Encoding")
+                await send(start_message)
+                await send({"type": "http.response.body", "body": sent})
+                return
+
+            if compressor is None:
+                # Streaming response: compress chunk by chunk
+                compressor = StreamCompressor(negotiate_encoding(accept_encoding))
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = compressor.encoding
+                headers.add_vary_header("Accept-Encoding")
+                del headers["Content-Length"]
+                await send(start_message)
+
+            original_size += len(body)
+            with timed_phase("encode"):
+                chunk = compressor.compress(body)
+                if more_body:
+                    chunk += compressor.flush()
+                else:
+                    chunk += compressor.finish()
+            if not more_body:
+                compression_stats.record(original_size, sent_size + len(chunk), compressor.encoding)
+            sent_size += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
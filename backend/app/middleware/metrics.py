@@ -0,0 +1,49 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..utils.metrics import UNMATCHED_ROUTE, request_metrics, start_request_timing
+
+
+class MetricsMiddleware:
+    """Record per-route request counts, latency, DB time and response size (see /metrics)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._route_paths = {}
+
+    def _route_label(self, scope: Scope) -> str:
+        # The router stores the matched endpoint in the scope; map it back to its path template
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            else:
+                path = UNMATCHED_ROUTE
+            self._route_paths[endpoint] = path
+        return path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = start_request_timing()
+        status = 500
+        response_bytes = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_metrics.observe(scope["method"], self._route_label(scope), status, timings.elapsed(),
+                                    timings.db_seconds, response_bytes)
@@ -0,0 +1,32 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..utils.metrics import current_timings, start_request_timing
+
+
+class ServerTimingMiddleware:
+    """Add a Server-Timing header splitting the request into auth, acquire, db, map and encode.
+
+    Time not charged to another phase by the time the response starts (ORM loading,
+    response-model validation) is reported as ``map``. For streamed bodies the header
+    covers the time to the first byte.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = current_timings() or start_request_timing()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                timings.add("map", max(0.0, timings.elapsed() - timings.accounted()))
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing())
+                headers.append("Timing-Allow-Origin", "*")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
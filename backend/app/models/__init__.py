@@ -5,6 +5,7 @@ from .category import Category
 from .product import Product
 from .order import Order, OrderItem, OrderStatusHistory
 from .review import Review
+from .table_version import TableVersion
 
 __all__ = [
     "User",
@@ -15,5 +16,6 @@ __all__ = [
     "Order",
     "OrderItem", 
     "OrderStatusHistory",
-    "Review"
+    "Review",
+    "TableVersion"
 ]
\ No newline at end of file
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, DECIMAL, Boolean, Date, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, DECIMAL, Boolean, Date, JSON, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
+from ..utils.facets import SQLITE_PRODUCT_FACETS_DDL, POSTGRES_PRODUCT_FACETS_DDL
+from ..utils.search import SQLITE_PRODUCT_SEARCH_DDL, POSTGRES_PRODUCT_SEARCH_DDL
 
 
 class Product(Base):
@@ -31,4 +33,30 @@ class Product(Base):
     
     @property
     def is_available(self):
-        return self.is_active and self.quantity_available > 0
\ No newline at end of file
+        return self.is_active and self.quantity_available > 0
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    """Install the full-text index over product names and descriptions once all tables exist."""
+    if connection.dialect.name == "sqlite":
+        statements = SQLITE_PRODUCT_SEARCH_DDL
+    elif connection.dialect.name == "postgresql":
+        statements = POSTGRES_PRODUCT_SEARCH_DDL
+    else:
+        return
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_facet_counts(target, connection, **kw):
+    """Create the facet counter table and the triggers that maintain it."""
+    if connection.dialect.name == "sqlite":
+        statements = SQLITE_PRODUCT_FACETS_DDL
+    elif connection.dialect.name == "postgresql":
+        statements = POSTGRES_PRODUCT_FACETS_DDL
+    else:
+        return
+    for statement in statements:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, BigInteger, event
+from ..database import Base
+from ..utils.etag import SQLITE_TABLE_VERSION_DDL, POSTGRES_TABLE_VERSION_DDL
+from ..utils.suggest import (
+    POSTGRES_FARM_SUGGEST_DDL, POSTGRES_SUGGEST_DDL, SQLITE_FARM_SUGGEST_DDL, SQLITE_SUGGEST_DDL,
+)
+
+
+class TableVersion(Base):
+    """Change counter per table, bumped by triggers; used to build catalog ETags."""
+    __tablename__ = "table_versions"
+    
+    table_name = Column(String(100), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_version_triggers(target, connection, **kw):
+    """Seed the counters and install the triggers once all tables exist."""
+    if connection.dialect.name == "sqlite":
+        statements = SQLITE_TABLE_VERSION_DDL + SQLITE_SUGGEST_DDL + SQLITE_FARM_SUGGEST_DDL
+    elif connection.dialect.name == "postgresql":
+        statements = POSTGRES_TABLE_VERSION_DDL + POSTGRES_SUGGEST_DDL + POSTGRES_FARM_SUGGEST_DDL
+    else:
+        return
+    for statement in statements:
+        connection.exec_driver_sql(statement)
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from ..database import get_db
 from ..models.category import Category
+from ..utils.http_cache import check_not_modified
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
 @router.get("/")
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get all active categories."""
+    not_modified = check_not_modified(request, response, db, ["categories"])
+    if not_modified:
+        return not_modified
+    
     from ..schemas.category import CategoryResponse
     categories = db.query(Category).filter(Category.is_active == True).all()
     return categories
\ No newline at end of file
@@ -7,6 +7,7 @@ from ..models.user import User
 from ..models.product import Product
 from ..models.order import Order, OrderItem, OrderStatusHistory, OrderStatus
 from ..utils.auth import get_current_user, get_current_customer, get_current_farmer
+from .products import catalog_cache, product_state
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -95,6 +96,7 @@ def create_order(
     db.refresh(db_order)
     
     # Create order items
+    sold = []
     for item_data in order_items_data:
         order_item = OrderItem(order_id=db_order.id, **item_data)
         db.add(order_item)
@@ -102,6 +104,7 @@ def create_order(
         # Reduce product quantity
         product = db.query(Product).filter(Product.id == item_data['product_id']).first()
         product.quantity_available -= item_data['quantity']
+        sold.append((product.id, product_state(product)))
     
     # Create initial status history
     status_history = OrderStatusHistory(
@@ -112,6 +115,8 @@ def create_order(
     db.add(status_history)
     
     db.commit()
+    for product_id, state in sold:
+        catalog_cache.product_changed(product_id, state)
     db.refresh(db_order)
     return db_order
 
@@ -1,53 +1,235 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Float, Integer, String, text, tuple_, type_coerce
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..database import get_db
+from ..database import engine, get_db
 from ..models.user import User
 from ..models.product import Product
 from ..models.category import Category
 from ..utils.auth import get_current_user, get_current_farmer
+from ..utils.catalog_cache import CatalogCache, listing_state
+from ..utils.etag import PRIVATE_CACHE_CONTROL
+from ..utils.facets import facet_response, facet_sql
+from ..utils.http_cache import check_not_modified, get_table_versions
+from ..utils.pagination import PRODUCT_SORTS, InvalidCursor, decode_product_cursor, encode_cursor
+from ..utils.search import RELEVANCE, match_ids_sql, match_sql, search_expression, search_terms
+from ..utils.suggest import (
+    SUGGEST_MAX_RESULTS, SUGGEST_SOURCES_SQL, SUGGEST_VERSION_SQL, SuggestIndex, rows_to_counts,
+)
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
+def load_suggestions():
+    """Product, category and farm names with their active product counts."""
+    counts = {}
+    with engine.connect() as conn:
+        for kind, statement in SUGGEST_SOURCES_SQL.items():
+            counts.update(rows_to_counts(kind, conn.exec_driver_sql(statement).fetchall()))
+    return counts
+
+
+def read_suggestion_version():
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(SUGGEST_VERSION_SQL).scalar()
+
+
+suggest_index = SuggestIndex(load_suggestions, read_suggestion_version)
+
+
+def listed_name(product: Product) -> Optional[str]:
+    """The name a product is suggested under, or None while it is inactive."""
+    return product.name if product.is_active else None
+
+
+catalog_cache = CatalogCache()
+
+
+def product_state(product: Product) -> dict:
+    """The listing filters a product matches, for catalog cache invalidation."""
+    return listing_state(product.category_id, product.farmer_id, product.is_organic)
+
+
 @router.get("/")
 def get_products(
-    skip: int = Query(0, ge=0),
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0, deprecated=True),
     limit: int = Query(100, ge=1, le=100),
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
     category_id: Optional[int] = None,
     farmer_id: Optional[int] = None,
     is_organic: Optional[bool] = None,
     search: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all available products with filters."""
-    query = db.query(Product).filter(Product.is_active == True, Product.quantity_available > 0)
+    """Get available products with filters, one page at a time.
+
+    Pages follow ``sort`` and continue after the last product of the previous page when
+    ``cursor`` is the X-Next-Cursor header of that page, so deep pages are read straight off
+    the sort column's index instead of skipping every row before them. The harvest_date sort
+    only lists products with a harvest date.
+
+    ``search`` matches every word against the full-text index of names and descriptions,
+    the last word as a prefix, and combines with the other filters. Results default to
+    the relevance sort, best match first.
+
+    Pages are kept in the catalog cache.
+    """
+    if sort is None:
+        sort = RELEVANCE if search else "newest"
+    if sort == RELEVANCE and not search:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Sorting by relevance needs a search")
+    if sort not in PRODUCT_SORTS and sort != RELEVANCE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid sort: {sort}")
+    try:
+        cursor_values = decode_product_cursor(cursor, sort)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
     
-    if category_id:
-        query = query.filter(Product.category_id == category_id)
+    filters = {"category_id": category_id, "farmer_id": farmer_id}
+    filters = {name: value for name, value in filters.items() if value}
+    if is_organic is not None:
+        filters["is_organic"] = is_organic
+    cache_key = catalog_cache.listing_key(filters, search, sort, limit, cursor, skip)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        versions, products, next_cursor = cached
+        not_modified = check_not_modified(request, response, db, ["products", "categories"], versions=versions)
+        if not_modified:
+            return not_modified
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return products
     
-    if farmer_id:
-        query = query.filter(Product.farmer_id == farmer_id)
+    generation = catalog_cache.generation()
+    versions = get_table_versions(db, ["products", "categories"])
+    not_modified = check_not_modified(request, response, db, ["products", "categories"], versions=versions)
+    if not_modified:
+        return not_modified
     
-    if is_organic is not None:
-        query = query.filter(Product.is_organic == is_organic)
+    column_name, descending = (None, False) if sort == RELEVANCE else PRODUCT_SORTS[sort]
     
+    matches = None
     if search:
-        query = query.filter(Product.name.contains(search))
+        terms = search_terms(search)
+        if not terms:
+            return []
+        dialect = db.get_bind().dialect.name
+        # The listing filters go inside the match statement, ahead of its cap on ranked matches
+        conditions = ["p.is_active = TRUE", "p.quantity_available > 0"]
+        conditions += [f"p.{name} = :{name}" for name in filters]
+        if column_name == 'harvest_date':
+            conditions.append("p.harvest_date IS NOT NULL")
+        matches = text(match_sql(dialect, ":search", conditions)).bindparams(
+            search=search_expression(terms, dialect), **filters
+        ).columns(id=Integer, rank=Float).subquery("matches")
+    
+    if sort == RELEVANCE:
+        sort_key = matches.c.rank
+    else:
+        # Page on the value as stored rather than as parsed, so a cursor taken from a
+        # timestamp compares equal to the row it came from whatever format the driver wrote
+        sort_key = type_coerce(getattr(Product, column_name), String)
+    
+    query = db.query(Product, sort_key).filter(Product.is_active == True, Product.quantity_available > 0)
+    
+    if matches is not None:
+        query = query.join(matches, matches.c.id == Product.id)
+    
+    for name, value in filters.items():
+        query = query.filter(getattr(Product, name) == value)
     
-    products = query.offset(skip).limit(limit).all()
+    if column_name == 'harvest_date':
+        query = query.filter(Product.harvest_date.isnot(None))
+    
+    if cursor_values is not None:
+        # A row-value comparison is a single range on the (column, id) index order
+        position = tuple_(sort_key, Product.id)
+        query = query.filter(position < tuple_(*cursor_values) if descending else position > tuple_(*cursor_values))
+    
+    if descending:
+        query = query.order_by(sort_key.desc(), Product.id.desc())
+    else:
+        query = query.order_by(sort_key, Product.id)
+    
+    # Fetch one extra row to know whether another page exists
+    rows = query.offset(skip).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_product, last_key = rows[-1]
+        next_cursor = encode_cursor(sort, last_key, last_product.id)
+        response.headers["X-Next-Cursor"] = next_cursor
+    products = jsonable_encoder([product for product, _ in rows])
+    catalog_cache.set(cache_key, (versions, products, next_cursor), generation)
     return products
 
 
+@router.get("/facets")
+def get_product_facets(
+    request: Request,
+    response: Response,
+    category_id: Optional[int] = None,
+    farmer_id: Optional[int] = None,
+    is_organic: Optional[bool] = None,
+    search: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Listed product counts by category, organic flag, price bucket and farmer.
+
+    Takes the filters of ``GET /products/``. Each facet is counted under every filter
+    except its own, so the counts show what picking another value would list.
+    """
+    not_modified = check_not_modified(request, response, db, ["products", "categories"])
+    if not_modified:
+        return not_modified
+    
+    filters = {"category_id": category_id, "farmer_id": farmer_id, "is_organic": is_organic}
+    filters = {name: value for name, value in filters.items() if value is not None}
+    dialect = db.get_bind().dialect.name
+    placeholder = "?" if dialect == "sqlite" else "%s"
+    match, params = None, []
+    if search:
+        terms = search_terms(search)
+        if not terms:
+            return facet_response([])
+        match = match_ids_sql(dialect, placeholder)
+        params.append(search_expression(terms, dialect))
+    sql, filter_params = facet_sql(filters, placeholder, dialect, match, farm_profiles=True)
+    rows = db.connection().exec_driver_sql(sql, tuple(params + filter_params)).fetchall()
+    return facet_response(rows)
+
+
+@router.get("/suggest")
+def suggest_products(q: str = "", limit: int = Query(SUGGEST_MAX_RESULTS, ge=1, le=SUGGEST_MAX_RESULTS)):
+    """Completions for a partly typed search: product, category and farm names.
+
+    Any word of a name may match ``q``; names leading to the most active products come
+    first. Served from the in-memory prefix index, without a database round trip.
+    """
+    return suggest_index.suggest(q, limit)
+
+
 @router.get("/{product_id}")
 def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Get a specific product by ID."""
+    """Get a specific product by ID (served from the catalog cache when it is there)."""
+    cache_key = catalog_cache.product_key(product_id)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    generation = catalog_cache.generation()
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
+    product = jsonable_encoder(product)
+    catalog_cache.set(cache_key, product, generation)
     return product
 
 
@@ -79,6 +261,8 @@ def create_product(
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    suggest_index.product_changed(None, listed_name(db_product))
+    catalog_cache.product_changed(db_product.id, product_state(db_product))
     return db_product
 
 
@@ -107,12 +291,15 @@ def update_product(
     validated_data = ProductUpdate(**product_data)
     
     # Update fields
+    old_name, old_state = listed_name(product), product_state(product)
     update_data = validated_data.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(product, field, value)
     
     db.commit()
     db.refresh(product)
+    suggest_index.product_changed(old_name, listed_name(product))
+    catalog_cache.product_changed(product.id, old_state, product_state(product))
     return product
 
 
@@ -134,16 +321,28 @@ def delete_product(
             detail="Product not found or not owned by you"
         )
     
+    old_name, old_state = listed_name(product), product_state(product)
     db.delete(product)
     db.commit()
+    suggest_index.product_changed(old_name, None)
+    catalog_cache.product_changed(product_id, old_state)
     return {"message": "Product deleted successfully"}
 
 
 @router.get("/farmer/my-products")
 def get_my_products(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_farmer),
     db: Session = Depends(get_db)
 ):
     """Get all products for the current farmer."""
+    not_modified = check_not_modified(
+        request, response, db, ["products", "categories"], current_user.id,
+        cache_control=PRIVATE_CACHE_CONTROL
+    )
+    if not_modified:
+        return not_modified
+    
     products = db.query(Product).filter(Product.farmer_id == current_user.id).all()
     return products
\ No newline at end of file
@@ -7,6 +7,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from ..config import settings
 from ..database import get_db
+from .metrics import timed_phase
 from ..models.user import User, UserRole
 
 # Password hashing - using PBKDF2 instead of bcrypt to avoid 72-byte limitation
@@ -57,17 +58,18 @@ def get_current_user(
     db: Session = Depends(get_db)
 ) -> User:
     """Get the current authenticated user."""
-    token = credentials.credentials
-    payload = verify_token(token)
-    
-    user_id: int = payload.get("sub")
-    if user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-        )
-    
-    user = db.query(User).filter(User.id == user_id).first()
+    with timed_phase("auth"):
+        token = credentials.credentials
+        payload = verify_token(token)
+        
+        user_id: int = payload.get("sub")
+        if user_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+            )
+        
+        user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,138 @@
+"""Read-through cache of product reads, shared by the FastAPI app and simple_server.
+
+Each process keeps recent ``GET /products/{id}`` bodies and ``GET /products/`` pages
+(keyed by the whole query: filters, search, sort, limit and cursor) in one LRU cache. A hit
+answers without touching the database, including the ETag: a cached page stores the table
+versions it was read under.
+
+Product writes made through the same process drop exactly what they can change: the
+product itself and every cached listing whose filters match the product before or after
+the write. A listing with a search is dropped whenever its filters match, since a rename
+can move the product in or out of it. Writes made elsewhere (other workers, direct SQL)
+are not seen; entries live at most CATALOG_CACHE_TTL seconds, which bounds how long they
+go unnoticed.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from .lru import LRUCache
+
+CATALOG_CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "true").lower() == "true"
+
+# Cached products and listing pages per process
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", 1000))
+
+# Longest a write made by another process can go unnoticed
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", 10))
+
+# Listings with a larger encoded body are served but not cached
+CATALOG_CACHE_MAX_BODY = int(os.getenv("CATALOG_CACHE_MAX_BODY", 131072))
+
+PRODUCT = "product"
+LISTING = "listing"
+
+
+def listing_state(category_id: Any = None, farmer_id: Any = None, is_organic: Any = None) -> dict:
+    """The filter values of a product, as matched against cached listings (None matches any)."""
+    return {
+        "category_id": category_id,
+        "farmer_id": farmer_id,
+        "is_organic": None if is_organic is None else bool(is_organic),
+    }
+
+
+class CatalogCache:
+    """LRU cache of product and listing responses with write invalidation."""
+
+    def __init__(self, max_size: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL,
+                 enabled: bool = CATALOG_CACHE_ENABLED):
+        self.enabled = enabled
+        self._entries = LRUCache(max_size, ttl)
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a read that raced a write is not stored
+        self._generation = 0
+        self.invalidations = 0
+        self.skipped = 0
+
+    @staticmethod
+    def product_key(product_id: int) -> tuple:
+        return (PRODUCT, product_id)
+
+    @staticmethod
+    def listing_key(filters: dict, *shape: Hashable) -> tuple:
+        """Key of a listing page: its filters, then everything else the body depends on."""
+        return (LISTING, tuple(sorted(filters.items())), shape)
+
+    def generation(self) -> int:
+        """Token to take before reading from the database and hand back to set()."""
+        return self._generation
+
+    def get(self, key: tuple) -> Any:
+        if not self.enabled:
+            return None
+        return self._entries.get(key)
+
+    def set(self, key: tuple, value: Any, generation: int):
+        """Store ``value`` unless an invalidation happened since ``generation`` was taken."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self._generation:
+                self.skipped += 1
+                return
+            self._entries.set(key, value)
+
+    def product_changed(self, product_id: int, *states: dict):
+        """Drop a written product and the listings it may appear in.
+
+        ``states`` are the product's listing_state() before and after the write (one for a
+        create or a delete).
+        """
+        def affected(key: tuple) -> bool:
+            if key[0] == PRODUCT:
+                return key[1] == product_id
+            filters = dict(key[1])
+            return any(
+                all(state.get(name) is None or state.get(name) == value for name, value in filters.items())
+                for state in states
+            )
+
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if self.enabled:
+                self._entries.pop_matching(affected)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return dict(
+            {"enabled": self.enabled, "ttl": self._entries.ttl, "max_body": CATALOG_CACHE_MAX_BODY},
+            **self._entries.stats(),
+            invalidations=self.invalidations,
+            skipped_stores=self.skipped,
+        )
+
+
+def capture_body(chunks, store: Callable[[bytes], None], max_body: Optional[int] = None):
+    """Pass encoded JSON chunks through, handing the whole body to ``store`` if it stays small.
+
+    Lets a streamed listing fill the cache without holding more than ``max_body`` bytes.
+    """
+    max_body = CATALOG_CACHE_MAX_BODY if max_body is None else max_body
+    captured, size = [], 0
+    for chunk in chunks:
+        if captured is not None:
+            size += len(chunk)
+            if size > max_body:
+                captured = None
+            else:
+                captured.append(chunk)
+        yield chunk
+    if captured is not None:
+        store(b"".join(captured))
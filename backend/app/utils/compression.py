@@ -0,0 +1,156 @@
+"""Response compression helpers shared by the FastAPI app and simple_server.
+
+Only the standard library is required. Brotli is used when the optional
+``brotli`` package is installed, otherwise clients are offered gzip.
+"""
+
+import gzip
+import os
+import threading
+import zlib
+from typing import Optional, Tuple
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))  # gzip level 1-9
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))  # brotli quality 0-11
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def supported_encodings():
+    """Encodings this process can produce, in order of preference."""
+    return ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best encoding from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding or not COMPRESSION_ENABLED:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Whether a response with this Content-Type is worth compressing."""
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a complete response body."""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Incremental compressor for chunked responses."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data)
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything buffered so far without ending the stream."""
+        if self.encoding == "br":
+            return self._br.flush()
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionStats:
+    """Thread-safe byte counters for compressed responses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.responses = 0
+            self.compressed_responses = 0
+            self.uncompressed_bytes = 0
+            self.compressed_bytes = 0
+            self.by_encoding = {}
+
+    def record(self, original_size: int, sent_size: int, encoding: Optional[str]):
+        with self._lock:
+            self.responses += 1
+            self.uncompressed_bytes += original_size
+            self.compressed_bytes += sent_size
+            if encoding:
+                self.compressed_responses += 1
+                self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            saved = self.uncompressed_bytes - self.compressed_bytes
+            return {
+                "responses": self.responses,
+                "compressed_responses": self.compressed_responses,
+                "uncompressed_bytes": self.uncompressed_bytes,
+                "compressed_bytes": self.compressed_bytes,
+                "bytes_saved": saved,
+                "ratio": round(self.compressed_bytes / self.uncompressed_bytes, 4) if self.uncompressed_bytes else None,
+                "by_encoding": dict(self.by_encoding),
+                "available_encodings": list(supported_encodings()),
+            }
+
+
+compression_stats = CompressionStats()
+
+
+def compress_response_body(body: bytes, content_type: Optional[str], accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Compress ``body`` if the client accepts it and it is large enough.
+
+    Returns the bytes to send and the Content-Encoding used (None for identity).
+    """
+    encoding = None
+    if len(body) >= COMPRESSION_MIN_SIZE and is_compressible(content_type):
+        encoding = negotiate_encoding(accept_encoding)
+    sent = compress(body, encoding) if encoding else body
+    compression_stats.record(len(body), len(sent), encoding)
+    return sent, encoding
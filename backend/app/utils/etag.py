@@ -0,0 +1,102 @@
+"""Conditional GET support shared by the FastAPI app and simple_server.
+
+Catalog responses get a strong ETag derived from per-table change
+counters kept in ``table_versions``. Database triggers bump a table's
+counter on every INSERT, UPDATE or DELETE, so checking freshness costs
+one primary-key lookup instead of the full SELECT and serialization.
+"""
+
+import hashlib
+import os
+from typing import Iterable, Optional
+
+# Tables whose changes invalidate cached catalog responses
+VERSIONED_TABLES = ("products", "categories")
+
+# Cache-Control for public catalog responses and for per-user responses
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, no-cache")
+PRIVATE_CACHE_CONTROL = os.getenv("PRIVATE_CACHE_CONTROL", "private, no-cache")
+
+SQLITE_TABLE_VERSION_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS table_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+] + [
+    # Seed counters with the current time so a recreated database never reuses old ETags
+    f"INSERT OR IGNORE INTO table_versions (table_name, version) "
+    f"VALUES ('{table}', CAST(strftime('%s', 'now') AS INTEGER) * 1000)"
+    for table in VERSIONED_TABLES
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{op.lower()}
+    AFTER {op} ON {table}
+    BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+    END
+    """
+    for table in VERSIONED_TABLES
+    for op in ("INSERT", "UPDATE", "DELETE")
+]
+
+POSTGRES_TABLE_VERSION_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS table_versions (
+        table_name VARCHAR(100) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+] + [
+    f"INSERT INTO table_versions (table_name, version) "
+    f"VALUES ('{table}', (EXTRACT(EPOCH FROM NOW()) * 1000)::BIGINT) ON CONFLICT (table_name) DO NOTHING"
+    for table in VERSIONED_TABLES
+] + [
+    statement
+    for table in VERSIONED_TABLES
+    for statement in (
+        f"DROP TRIGGER IF EXISTS trg_{table}_version ON {table}",
+        f"CREATE TRIGGER trg_{table}_version AFTER INSERT OR UPDATE OR DELETE ON {table} "
+        f"FOR EACH STATEMENT EXECUTE PROCEDURE bump_table_version()",
+    )
+]
+
+
+def make_etag(versions: Iterable, *parts, encoding: Optional[str] = None) -> Optional[str]:
+    """Build a strong ETag from table versions plus anything else the body depends on.
+
+    Returns None when a version is unknown, so callers fall back to a plain 200.
+    """
+    versions = list(versions)
+    if not versions or any(v is None for v in versions):
+        return None
+    key = "|".join(str(p) for p in (*versions, *parts))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:20]
+    # Compressed and identity bodies are different representations
+    if encoding:
+        digest = f"{digest}-{encoding}"
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Evaluate If-None-Match (weak comparison, as RFC 9110 requires for this header)."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,244 @@
+"""Facet counts for product listings, shared by the FastAPI app and simple_server.
+
+``product_facet_counts`` holds the number of listed (active, in-stock) products per
+category, farmer, organic flag and price bucket, kept current by triggers on products.
+Stock updates only reach it when a product sells out or comes back. The facet statement
+groups that table, one row per combination instead of one per product, four ways in a
+single UNION ALL. Each facet is counted under every filter except its own, so with a
+category picked the other categories still show what they hold.
+
+A search narrows the listing to individual products, so with a search the same statement
+groups the full-text matches instead of the counter table. It counts every match, while the
+search listing ranks only the newest SEARCH_MAX_MATCHES, so for a broad word the counts can
+exceed what the listing pages through.
+"""
+
+import os
+from typing import Iterable, List, Optional, Tuple
+
+# Upper bounds of the price buckets; the last bucket is open-ended
+PRICE_BUCKET_EDGES = (5, 10, 20, 50, 100)
+
+# Farmers listed in the farmer facet, most products first
+FACET_MAX_FARMERS = int(os.getenv("FACET_MAX_FARMERS", 20))
+
+_KEY_COLUMNS = "category_id, farmer_id, is_organic, price_bucket"
+
+
+def price_bucket_sql(column: str) -> str:
+    """SQL for the bucket index of a price."""
+    cases = " ".join(f"WHEN {column} < {edge} THEN {n}" for n, edge in enumerate(PRICE_BUCKET_EDGES))
+    return f"CASE {cases} ELSE {len(PRICE_BUCKET_EDGES)} END"
+
+
+def _key_values(row: str, false: str) -> str:
+    return (f"{row}.category_id, {row}.farmer_id, COALESCE({row}.is_organic, {false}), "
+            f"{price_bucket_sql(row + '.price_per_unit')}")
+
+
+def _key_match(row: str, false: str) -> str:
+    return (f"category_id = {row}.category_id AND farmer_id = {row}.farmer_id "
+            f"AND is_organic = COALESCE({row}.is_organic, {false}) "
+            f"AND price_bucket = {price_bucket_sql(row + '.price_per_unit')}")
+
+
+def _listed(row: str) -> str:
+    return f"({row}.is_active AND {row}.quantity_available > 0)"
+
+
+def _changed(distinct: str, false: str) -> str:
+    """Trigger condition: the update moved the product to another count (or in or out of the listing)."""
+    return " OR ".join([
+        f"{_listed('old')} {distinct} {_listed('new')}",
+        f"old.category_id {distinct} new.category_id",
+        f"old.farmer_id {distinct} new.farmer_id",
+        f"COALESCE(old.is_organic, {false}) {distinct} COALESCE(new.is_organic, {false})",
+        f"{price_bucket_sql('old.price_per_unit')} {distinct} {price_bucket_sql('new.price_per_unit')}",
+    ])
+
+
+def _fill(false: str) -> str:
+    # Count the rows that predate the table; a no-op once anything is counted
+    return (
+        f"INSERT INTO product_facet_counts ({_KEY_COLUMNS}, products) "
+        f"SELECT category_id, farmer_id, COALESCE(is_organic, {false}), {price_bucket_sql('price_per_unit')}, COUNT(*) "
+        f"FROM products WHERE is_active = TRUE AND quantity_available > 0 "
+        f"AND NOT EXISTS (SELECT 1 FROM product_facet_counts) GROUP BY 1, 2, 3, 4"
+    )
+
+
+def _count_statements(false: str) -> Tuple[str, str, str]:
+    """(add new, remove old, drop emptied old) statements for trigger bodies."""
+    return (
+        f"INSERT INTO product_facet_counts ({_KEY_COLUMNS}, products) SELECT {_key_values('new', false)}, 1 "
+        f"WHERE {_listed('new')} ON CONFLICT ({_KEY_COLUMNS}) DO UPDATE SET products = product_facet_counts.products + 1",
+        f"UPDATE product_facet_counts SET products = products - 1 WHERE {_key_match('old', false)} AND {_listed('old')}",
+        f"DELETE FROM product_facet_counts WHERE {_key_match('old', false)} AND products <= 0",
+    )
+
+
+_SQLITE_ADD, _SQLITE_REMOVE, _SQLITE_DROP = _count_statements("0")
+
+SQLITE_FACET_COUNTS_FILL = _fill("0")
+
+SQLITE_PRODUCT_FACETS_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS product_facet_counts (
+        category_id INTEGER NOT NULL,
+        farmer_id INTEGER NOT NULL,
+        is_organic BOOLEAN NOT NULL,
+        price_bucket INTEGER NOT NULL,
+        products INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY ({_KEY_COLUMNS})
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_product_facet_counts_farmer_id ON product_facet_counts (farmer_id)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_products_facets_insert AFTER INSERT ON products
+    BEGIN
+        {_SQLITE_ADD};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_products_facets_delete AFTER DELETE ON products
+    BEGIN
+        {_SQLITE_REMOVE};
+        {_SQLITE_DROP};
+    END
+    """,
+    # Selling one unit of a product that stays in stock changes none of its counts
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_products_facets_update
+    AFTER UPDATE OF category_id, farmer_id, is_organic, price_per_unit, quantity_available, is_active ON products
+    WHEN {_changed('IS NOT', '0')}
+    BEGIN
+        {_SQLITE_REMOVE};
+        {_SQLITE_DROP};
+        {_SQLITE_ADD};
+    END
+    """,
+    SQLITE_FACET_COUNTS_FILL,
+]
+
+_PG_ADD, _PG_REMOVE, _PG_DROP = _count_statements("FALSE")
+
+POSTGRES_PRODUCT_FACETS_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS product_facet_counts (
+        category_id INTEGER NOT NULL,
+        farmer_id INTEGER NOT NULL,
+        is_organic BOOLEAN NOT NULL,
+        price_bucket INTEGER NOT NULL,
+        products INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY ({_KEY_COLUMNS})
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_product_facet_counts_farmer_id ON product_facet_counts (farmer_id)",
+    f"""
+    CREATE OR REPLACE FUNCTION update_product_facet_counts() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            {_PG_REMOVE};
+            {_PG_DROP};
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            {_PG_ADD};
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_products_facets ON products",
+    "CREATE TRIGGER trg_products_facets AFTER INSERT OR DELETE ON products "
+    "FOR EACH ROW EXECUTE PROCEDURE update_product_facet_counts()",
+    # Selling one unit of a product that stays in stock changes none of its counts
+    "DROP TRIGGER IF EXISTS trg_products_facets_update ON products",
+    f"CREATE TRIGGER trg_products_facets_update "
+    f"AFTER UPDATE OF category_id, farmer_id, is_organic, price_per_unit, quantity_available, is_active ON products "
+    f"FOR EACH ROW WHEN ({_changed('IS DISTINCT FROM', 'FALSE')}) EXECUTE PROCEDURE update_product_facet_counts()",
+    _fill("FALSE"),
+]
+
+# Facet column per filter; the price facet has no filter and always sees all of them
+_FACETS = (("category", "category_id"), ("organic", "is_organic"), ("price", "price_bucket"), ("farmer", "farmer_id"))
+
+
+def facet_sql(filters: dict, placeholder: str, dialect: str, match: Optional[str] = None,
+              farm_profiles: bool = False) -> Tuple[str, List]:
+    """The facet statement for ``filters`` (category_id, farmer_id, is_organic) and its parameters.
+
+    ``match`` is a full-text match statement (search.match_ids_sql) whose one parameter the
+    caller appends first; every match is counted, not only those a search listing ranks.
+    Without it the counter table is grouped. Rows are (facet, value, products, category
+    name, farmer name).
+    """
+    false = "0" if dialect == "sqlite" else "FALSE"
+    params = []
+    prefix = ""
+    source = "product_facet_counts"
+    if match is not None:
+        prefix = (
+            f"WITH listed AS (SELECT p.category_id, p.farmer_id, COALESCE(p.is_organic, {false}) AS is_organic, "
+            f"{price_bucket_sql('p.price_per_unit')} AS price_bucket, 1 AS products "
+            f"FROM products p JOIN ({match}) m ON m.id = p.id "
+            f"WHERE p.is_active = TRUE AND p.quantity_available > 0) "
+        )
+        source = "listed"
+    branches = []
+    for facet, column in _FACETS:
+        where = []
+        for name, value in filters.items():
+            if name != column:
+                where.append(f"{name} = {placeholder}")
+                params.append(value)
+        branches.append(
+            f"SELECT '{facet}' AS facet, CAST({column} AS INTEGER) AS value, SUM(products) AS products "
+            f"FROM {source} {'WHERE ' + ' AND '.join(where) if where else ''} GROUP BY {column}"
+        )
+    farmer_name = "u.first_name || ' ' || u.last_name"
+    farm_join = ""
+    if farm_profiles:
+        farmer_name = f"COALESCE(fp.farm_name, {farmer_name})"
+        farm_join = "LEFT JOIN farmer_profiles fp ON fp.user_id = u.id"
+    sql = (
+        f"{prefix}SELECT f.facet, f.value, f.products, c.name AS category_name, {farmer_name} AS farmer_name "
+        f"FROM ({' UNION ALL '.join(branches)}) f "
+        f"LEFT JOIN categories c ON f.facet = 'category' AND c.id = f.value "
+        f"LEFT JOIN users u ON f.facet = 'farmer' AND u.id = f.value {farm_join}"
+    )
+    return sql, params
+
+
+def price_buckets() -> List[dict]:
+    bounds = (0,) + PRICE_BUCKET_EDGES
+    return [{"min": low, "max": PRICE_BUCKET_EDGES[n] if n < len(PRICE_BUCKET_EDGES) else None}
+            for n, low in enumerate(bounds)]
+
+
+def facet_response(rows: Iterable[tuple]) -> dict:
+    """The GET /products/facets body from facet statement rows."""
+    categories, organic, farmers = [], {True: 0, False: 0}, []
+    prices = price_buckets()
+    for bucket in prices:
+        bucket["count"] = 0
+    for facet, value, products, category_name, farmer_name in rows:
+        products = int(products or 0)
+        if not products:
+            continue
+        if facet == "category":
+            categories.append({"id": value, "name": category_name, "count": products})
+        elif facet == "organic":
+            organic[bool(value)] += products
+        elif facet == "price":
+            prices[value]["count"] = products
+        else:
+            farmers.append({"id": value, "name": farmer_name, "count": products})
+    categories.sort(key=lambda entry: (-entry["count"], entry["name"] or ""))
+    farmers.sort(key=lambda entry: (-entry["count"], entry["id"]))
+    return {
+        "total": sum(bucket["count"] for bucket in prices),
+        "categories": categories,
+        "is_organic": [{"value": value, "count": organic[value]} for value in (True, False)],
+        "price": prices,
+        "farmers": farmers[:FACET_MAX_FARMERS],
+    }
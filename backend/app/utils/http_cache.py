@@ -0,0 +1,58 @@
+"""Conditional GETs for the FastAPI app's catalog routes.
+
+Reads the change counters in ``table_versions`` through the session, builds the response's
+ETag from them (see etag.py) and answers a matching ``If-None-Match`` with a 304 before the
+route runs its query. Databases that predate table_versions are served without ETags.
+"""
+
+from typing import Optional, Sequence
+from fastapi import Request, Response
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from ..models.table_version import TableVersion
+from .compression import negotiate_encoding
+from .etag import CATALOG_CACHE_CONTROL, make_etag, etag_matches
+
+
+def get_table_versions(db: Session, tables: Sequence[str]) -> list:
+    """Current change counters for ``tables`` (None where unknown)."""
+    try:
+        rows = db.query(TableVersion.table_name, TableVersion.version).filter(
+            TableVersion.table_name.in_(tables)
+        ).all()
+    except SQLAlchemyError:
+        # Database created before table_versions existed: serve without ETags
+        db.rollback()
+        return [None for _ in tables]
+    versions = dict(rows)
+    return [versions.get(table) for table in tables]
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    db: Session,
+    tables: Sequence[str],
+    *parts,
+    cache_control: str = CATALOG_CACHE_CONTROL,
+    versions: Optional[list] = None
+) -> Optional[Response]:
+    """Return a 304 response if the client's ETag is current, otherwise set caching headers.
+
+    ``parts`` holds anything else the body depends on (query string, user id). ``versions``
+    are counters read earlier (a cached body's), so no query runs.
+    """
+    if versions is None:
+        versions = get_table_versions(db, tables)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    etag = make_etag(versions, request.url.path, request.url.query, *parts, encoding=encoding)
+    if etag is None:
+        return None
+    
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        # The compression middleware adds Vary to 200s; 304s bypass it
+        return Response(status_code=304, headers={**headers, "Vary": "Accept-Encoding"})
+    
+    response.headers.update(headers)
+    return None
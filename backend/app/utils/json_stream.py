@@ -0,0 +1,47 @@
+"""Incremental JSON encoding for large list responses.
+
+Rows are pulled from a DB-API cursor with ``fetchmany`` and each one is encoded on its own
+into a bytes fragment; fragments are joined into chunks of about ``STREAM_CHUNK_SIZE``
+bytes, so memory stays flat however many rows a query returns. Output is byte-for-byte
+what ``serialization.dumps(list)`` would produce.
+"""
+
+import os
+from typing import Any, Callable, Iterable, Iterator
+
+from .serialization import dumps as json_dumps
+
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "65536"))  # bytes per written chunk
+STREAM_FETCH_SIZE = int(os.getenv("STREAM_FETCH_SIZE", "500"))  # rows per fetchmany()
+
+
+def iter_cursor(cursor, size: int = STREAM_FETCH_SIZE) -> Iterator[Any]:
+    """Yield the rows of an executed cursor, ``size`` rows per round trip."""
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def iter_json_array(items: Iterable[Any], chunk_size: int = STREAM_CHUNK_SIZE,
+                    dumps: Callable[[Any], bytes] = json_dumps) -> Iterator[bytes]:
+    """Encode ``items`` as a JSON array, yielding chunks of roughly ``chunk_size`` bytes.
+
+    Items that are already ``bytes`` are treated as pre-encoded JSON and copied as-is.
+    """
+    parts = [b"["]
+    size = 1
+    separator = b""
+    for item in items:
+        encoded = item if isinstance(item, bytes) else dumps(item)
+        parts.append(separator)
+        parts.append(encoded)
+        size += len(separator) + len(encoded)
+        separator = b","
+        if size >= chunk_size:
+            yield b"".join(parts)
+            parts = []
+            size = 0
+    parts.append(b"]")
+    yield b"".join(parts)
@@ -0,0 +1,259 @@
+"""Request metrics shared by simple_server and the FastAPI app, exposed at ``/metrics``.
+
+Per route template and method: request counts by status code, a latency histogram, a
+histogram of time spent in the database and a histogram of response body sizes (bytes
+on the wire, after compression). Rendered in the Prometheus text exposition format.
+
+Recording a request takes one lock and three bisects. Database time is collected through
+a per-request ``RequestTimings`` held in a context variable, so the cursor hooks need no
+reference to the handler. Each process keeps its own registry; in pre-fork mode a scrape
+sees the worker that answered it. Set ``METRICS_ENABLED=false`` to switch recording off.
+
+With ``SERVER_TIMING=true`` the same RequestTimings also splits each request into phases
+(auth, acquire, db, map, encode) that both servers report in a ``Server-Timing`` header.
+Phases are exclusive: time spent in the database while authenticating counts as db only.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+# Server-Timing entries in the order they are reported (db comes from db_seconds)
+SERVER_TIMING_PHASES = ("auth", "acquire", "db", "map", "encode")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+
+# Route label for requests that matched no route, so unknown paths cannot explode cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+
+_END = object()
+
+
+class RequestTimings:
+    """Time accumulated by one request; the database hooks add to ``db_seconds``."""
+
+    __slots__ = ("started", "db_seconds", "phases", "_nested")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.phases: Dict[str, float] = {}
+        self._nested = 0.0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def add_db(self, seconds: float) -> None:
+        self.db_seconds += seconds
+        self._nested += seconds
+
+    def add(self, name: str, seconds: float) -> None:
+        """Charge ``seconds`` measured by the caller to phase ``name``."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        self._nested += seconds
+
+    def accounted(self) -> float:
+        """Seconds charged to db and every phase so far."""
+        return self.db_seconds + sum(self.phases.values())
+
+    @contextmanager
+    def phase(self, name: str):
+        """Charge the block to ``name``, minus whatever nested phases and db time took."""
+        outer_nested, self._nested = self._nested, 0.0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - self._nested
+            self._nested = outer_nested + elapsed
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value, durations in milliseconds."""
+        entries = []
+        for name in SERVER_TIMING_PHASES:
+            seconds = self.db_seconds if name == "db" else self.phases.get(name)
+            if seconds:
+                entries.append(f"{name};dur={seconds * 1000:.3f}")
+        entries.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(entries)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timing() -> RequestTimings:
+    """Begin timing the request handled by the current thread or task."""
+    timings = RequestTimings()
+    _current_timings.set(timings)
+    return timings
+
+
+def finish_request_timing() -> None:
+    """Stop charging work on this thread or task to the last request."""
+    _current_timings.set(None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+
+def add_db_time(seconds: float) -> None:
+    """Charge ``seconds`` of database work to the current request, if one is being timed."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_db(seconds)
+
+
+def timed_phase(name: str):
+    """Context manager charging its block to phase ``name`` when SERVER_TIMING is on."""
+    timings = _current_timings.get() if SERVER_TIMING else None
+    if timings is None:
+        return nullcontext()
+    return timings.phase(name)
+
+
+def timed_iter(name: str, items: Iterable) -> Iterator:
+    """Iterate ``items``, charging the time spent producing each one to phase ``name``."""
+    timings = _current_timings.get() if SERVER_TIMING else None
+    if timings is None:
+        return iter(items)
+
+    def timed():
+        iterator = iter(items)
+        while True:
+            with timings.phase(name):
+                item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item
+    return timed()
+
+
+def map_rows(mapper: Callable, rows: Iterable) -> Iterator:
+    """``map(mapper, rows)`` that charges the mapper's time to the "map" phase."""
+    timings = _current_timings.get() if SERVER_TIMING else None
+    if timings is None:
+        return map(mapper, rows)
+
+    def timed():
+        perf_counter = time.perf_counter
+        for row in rows:
+            start = perf_counter()
+            item = mapper(row)
+            timings.add("map", perf_counter() - start)
+            yield item
+    return timed()
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``counts[i]`` holds observations in (buckets[i-1], buckets[i]]."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class _RouteStats:
+    __slots__ = ("statuses", "latency", "db_time", "response_size")
+
+    def __init__(self):
+        self.statuses: Dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class RequestMetrics:
+    """Thread-safe registry of per-route request metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteStats] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float,
+                db_seconds: float, response_bytes: int) -> None:
+        key = (method, route)
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = _RouteStats()
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.latency.observe(seconds)
+            stats.db_time.observe(db_seconds)
+            stats.response_size.observe(response_bytes)
+
+    def render(self) -> str:
+        """The registry in Prometheus text exposition format."""
+        with self._lock:
+            snapshot = [
+                (method, route, dict(stats.statuses),
+                 [(h.buckets, list(h.counts), h.total, h.count)
+                  for h in (stats.latency, stats.db_time, stats.response_size)])
+                for (method, route), stats in sorted(self._routes.items())
+            ]
+
+        lines = [
+            "# HELP http_requests_total Requests handled, by route template, method and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for method, route, statuses, _ in snapshot:
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for status, count in sorted(statuses.items()):
+                lines.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+
+        histograms = (
+            ("http_request_duration_seconds", "Time from routing to the last byte of the response."),
+            ("http_request_db_seconds", "Time spent executing statements and fetching rows per request."),
+            ("http_response_size_bytes", "Response body bytes sent, after compression."),
+        )
+        for index, (name, help_text) in enumerate(histograms):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for method, route, _, histogram_data in snapshot:
+                buckets, counts, total, count = histogram_data[index]
+                labels = f'method="{method}",route="{_escape(route)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{_format_number(bound)}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {_format_number(total)}")
+                lines.append(f"{name}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,114 @@
+"""Versioned schema migrations for simple_server (SQLite and PostgreSQL).
+
+Each migration is a numbered list of idempotent DDL statements; AddColumn steps stand in
+for ``ADD COLUMN IF NOT EXISTS``, which SQLite lacks. Applied versions are
+recorded in ``schema_version``, so a database that is already current costs a single
+``SELECT MAX(version)`` at boot. Every migration runs in its own transaction together
+with its schema_version row; on PostgreSQL an advisory lock keeps concurrently booting
+instances from racing each other.
+"""
+
+from typing import List, NamedTuple, Sequence, Union
+
+# Arbitrary constant identifying this application's migration lock
+POSTGRES_MIGRATION_LOCK_ID = 7_311_402
+
+SCHEMA_VERSION_DDL = {
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    "postgresql": """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+}
+
+
+class AddColumn(NamedTuple):
+    """Add ``column`` to ``table`` unless a previous schema already has it."""
+    table: str
+    column: str
+    definition: str
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    statements: Sequence[Union[str, AddColumn]]
+
+
+def latest_version(migrations: Sequence[Migration]) -> int:
+    return max((m.version for m in migrations), default=0)
+
+
+def current_version(conn, dialect: str) -> int:
+    """Highest applied version, or 0 for a database that predates schema_version."""
+    cursor = conn.cursor()
+    if dialect == "sqlite":
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'")
+    else:
+        cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL AS present")
+    row = cursor.fetchone()
+    present = row and (row[0] if isinstance(row, tuple) else row["present"])
+    if not present:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+    row = cursor.fetchone()
+    return row[0] if isinstance(row, tuple) else row["version"]
+
+
+def add_column(cursor, step: AddColumn, dialect: str):
+    if dialect == "sqlite":
+        cursor.execute(f"PRAGMA table_info({step.table})")
+        if any(row[1] == step.column for row in cursor.fetchall()):
+            return
+        cursor.execute(f"ALTER TABLE {step.table} ADD COLUMN {step.column} {step.definition}")
+    else:
+        cursor.execute(f"ALTER TABLE {step.table} ADD COLUMN IF NOT EXISTS {step.column} {step.definition}")
+
+
+def migrate(conn, migrations: Sequence[Migration], dialect: str) -> List[Migration]:
+    """Apply every migration newer than the database's version; return the ones applied."""
+    ordered = sorted(migrations, key=lambda m: m.version)
+    if current_version(conn, dialect) >= latest_version(ordered):
+        conn.rollback()
+        return []
+
+    placeholder = "?" if dialect == "sqlite" else "%s"
+    cursor = conn.cursor()
+    applied = []
+    for migration in ordered:
+        if dialect == "sqlite":
+            # Take the write lock up front so two processes cannot interleave DDL
+            conn.rollback()
+            cursor.execute("BEGIN IMMEDIATE")
+        else:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (POSTGRES_MIGRATION_LOCK_ID,))
+        try:
+            cursor.execute(SCHEMA_VERSION_DDL[dialect])
+            # Re-check under the lock: another process may have applied it meanwhile
+            if current_version(conn, dialect) >= migration.version:
+                conn.rollback()
+                continue
+            for statement in migration.statements:
+                if isinstance(statement, AddColumn):
+                    add_column(cursor, statement, dialect)
+                else:
+                    cursor.execute(statement)
+            cursor.execute(
+                f"INSERT INTO schema_version (version, name) VALUES ({placeholder}, {placeholder})",
+                (migration.version, migration.name),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration)
+    return applied
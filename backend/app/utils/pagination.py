@@ -0,0 +1,49 @@
+"""Opaque cursor tokens for keyset pagination, shared by both servers."""
+
+import base64
+import json
+from typing import Optional
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that was not issued by the server."""
+
+
+def encode_cursor(*values) -> str:
+    """Pack the sort-key values of the last row into a URL-safe token."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str], size: int) -> Optional[list]:
+    """Unpack a token produced by encode_cursor; None when no cursor was given."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+# Product listing sorts: name -> (sort column, descending). Ties are broken by id in the
+# same direction, so (column, id) is a total order and every product appears exactly once.
+PRODUCT_SORTS = {
+    'newest': ('created_at', True),
+    'price_asc': ('price_per_unit', False),
+    'price_desc': ('price_per_unit', True),
+    'harvest_date': ('harvest_date', True),
+}
+
+
+def decode_product_cursor(token: Optional[str], sort: str) -> Optional[list]:
+    """Unpack a product listing cursor into [sort value, id]; it must come from the same sort."""
+    values = decode_cursor(token, 3)
+    if values is None:
+        return None
+    if values[0] != sort:
+        raise InvalidCursor("Invalid cursor")
+    return values[1:]
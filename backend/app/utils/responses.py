@@ -0,0 +1,12 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from .metrics import timed_phase
+from .serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the shared encoder (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        with timed_phase("encode"):
+            return dumps(content)
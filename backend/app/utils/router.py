@@ -0,0 +1,166 @@
+"""Table-driven request routing for the stdlib HTTP server.
+
+Routes are declared with path patterns such as ``/products/{product_id:int}``. Patterns are
+compiled once at registration: literal paths resolve with a dict lookup, and parameterised
+paths are bucketed by segment count and first segment so a lookup only tries the few
+patterns that could possibly match.
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# name -> (regex fragment, converter)
+PARAM_TYPES = {
+    "int": (r"[0-9]+", int),
+    "str": (r"[^/]+", str),
+}
+
+_PARAM_RE = re.compile(r"^\{(?P<name>[A-Za-z_][A-Za-z0-9_]*)(?::(?P<type>[a-z]+))?\}$")
+
+
+class RouteNotFound(LookupError):
+    """No route matches the path."""
+
+
+class MethodNotAllowed(LookupError):
+    """The path matches, but not for this method."""
+
+    def __init__(self, allowed: Iterable[str]):
+        self.allowed = sorted(allowed)
+        super().__init__(", ".join(self.allowed))
+
+
+class Route:
+    """One (method, pattern) entry and the policy that guards it."""
+
+    __slots__ = ("method", "pattern", "handler", "auth", "roles", "forbidden_detail", "needs_database",
+                 "regex", "converters", "segments", "prefix")
+
+    def __init__(self, method: str, pattern: str, handler: Callable, auth: bool = False,
+                 roles: Optional[Iterable[str]] = None, forbidden_detail: Optional[str] = None,
+                 needs_database: bool = True):
+        self.method = method
+        self.pattern = pattern
+        self.handler = handler
+        self.needs_database = needs_database
+        self.roles = frozenset(roles) if roles else None
+        self.auth = auth or self.roles is not None
+        self.forbidden_detail = forbidden_detail or "Not enough permissions"
+        self.regex, self.converters = _compile(pattern)
+        self.segments = pattern.count("/")
+        first = pattern.split("/", 2)[1] if self.segments else ""
+        self.prefix = None if first.startswith("{") else first
+
+    @property
+    def is_static(self) -> bool:
+        return self.regex is None
+
+    def match(self, path: str) -> Optional[Dict[str, object]]:
+        m = self.regex.match(path)
+        if m is None:
+            return None
+        return {name: convert(m.group(name)) for name, convert in self.converters}
+
+    def allows(self, user: Optional[dict]) -> bool:
+        return self.roles is None or (user is not None and user.get("role") in self.roles)
+
+
+def _compile(pattern: str):
+    if not pattern.startswith("/"):
+        raise ValueError(f"Route pattern must start with '/': {pattern!r}")
+    if "{" not in pattern:
+        return None, ()
+    parts = []
+    converters = []
+    for segment in pattern.split("/")[1:]:
+        m = _PARAM_RE.match(segment)
+        if m is None:
+            if "{" in segment or "}" in segment:
+                raise ValueError(f"Path parameters must fill a whole segment: {pattern!r}")
+            parts.append(re.escape(segment))
+            continue
+        type_name = m.group("type") or "str"
+        if type_name not in PARAM_TYPES:
+            raise ValueError(f"Unknown path parameter type {type_name!r} in {pattern!r}")
+        fragment, convert = PARAM_TYPES[type_name]
+        parts.append(f"(?P<{m.group('name')}>{fragment})")
+        converters.append((m.group("name"), convert))
+    return re.compile("/" + "/".join(parts) + r"\Z"), tuple(converters)
+
+
+class Router:
+    """Registry of routes with O(1) dispatch for literal paths."""
+
+    def __init__(self):
+        self.routes: List[Route] = []
+        self._static: Dict[str, Dict[str, Route]] = {}
+        # (segment count, first segment or None) -> [(route for matching, {method: route})]
+        self._dynamic: Dict[Tuple[int, Optional[str]], List[Tuple[Route, Dict[str, Route]]]] = {}
+
+    def add(self, method: str, paths, handler: Callable, **options) -> None:
+        """Register ``handler`` for ``method`` on one path pattern or a sequence of aliases."""
+        for pattern in ([paths] if isinstance(paths, str) else paths):
+            route = Route(method.upper(), pattern, handler, **options)
+            self.routes.append(route)
+            if route.is_static:
+                methods = self._static.setdefault(pattern, {})
+                if route.method in methods:
+                    raise ValueError(f"Duplicate route: {route.method} {pattern}")
+                methods[route.method] = route
+            else:
+                bucket = self._dynamic.setdefault((route.segments, route.prefix), [])
+                methods = next((m for r, m in bucket if r.pattern == pattern), None)
+                if methods is None:
+                    methods = {}
+                    bucket.append((route, methods))
+                if route.method in methods:
+                    raise ValueError(f"Duplicate route: {route.method} {pattern}")
+                methods[route.method] = route
+
+    def route(self, method: str, paths, **options):
+        """Decorator form of :meth:`add`."""
+        def decorator(handler):
+            self.add(method, paths, handler, **options)
+            return handler
+        return decorator
+
+    def get(self, paths, **options):
+        return self.route("GET", paths, **options)
+
+    def post(self, paths, **options):
+        return self.route("POST", paths, **options)
+
+    def put(self, paths, **options):
+        return self.route("PUT", paths, **options)
+
+    def delete(self, paths, **options):
+        return self.route("DELETE", paths, **options)
+
+    def resolve(self, method: str, path: str) -> Tuple[Route, Dict[str, object]]:
+        """Find the route for a request path (without query string).
+
+        Raises RouteNotFound or MethodNotAllowed.
+        """
+        allowed = set()
+        methods = self._static.get(path)
+        if methods is not None:
+            route = methods.get(method)
+            if route is not None:
+                return route, {}
+            allowed.update(methods)
+
+        segments = path.count("/")
+        first = path.split("/", 2)[1] if segments else ""
+        for key in ((segments, first), (segments, None)):
+            for pattern_route, methods in self._dynamic.get(key, ()):
+                params = pattern_route.match(path)
+                if params is None:
+                    continue
+                route = methods.get(method)
+                if route is not None:
+                    return route, params
+                allowed.update(methods)
+
+        if allowed:
+            raise MethodNotAllowed(allowed)
+        raise RouteNotFound(path)
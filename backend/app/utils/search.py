@@ -0,0 +1,127 @@
+"""Full-text product search shared by the FastAPI app and simple_server.
+
+SQLite indexes product names and descriptions in an FTS5 table kept in sync by
+triggers; PostgreSQL keeps a weighted tsvector in a generated column with a GIN
+index. Both match every search term, the last one as a prefix so results follow
+the user's typing, and rank with the name weighted above the description.
+
+The match statements yield ``(id, rank)`` rows where a lower rank is a better
+match on both dialects, so callers join them to ``products`` and page through
+``(rank, id)`` like any other ascending sort key. Ranking costs a few microseconds
+per match, so only the SEARCH_MAX_MATCHES most recently listed matches are ranked;
+a word found in most of the catalog would otherwise take seconds to order. The
+listing's filters go inside the match statement, so the cap counts only products
+the listing can show and a narrow filter still finds its older matches.
+"""
+
+import os
+import re
+from typing import List, Optional, Sequence
+
+# Sort name for ranked results; only valid together with a search
+RELEVANCE = "relevance"
+
+# Longer queries are cut to this many terms
+MAX_SEARCH_TERMS = 8
+
+# Matches ranked per search, newest first, after the listing filters; broader searches only see this many
+SEARCH_MAX_MATCHES = int(os.getenv("SEARCH_MAX_MATCHES", 10000))
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+SQLITE_PRODUCT_SEARCH_DDL = [
+    # External content: the index stores no copy of the text, only the terms.
+    # prefix='2 3 4' adds prefix indexes so short "tom*" lookups avoid merging every term they cover.
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='porter unicode61 remove_diacritics 2', prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_fts_insert AFTER INSERT ON products
+    BEGIN
+        INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_fts_delete AFTER DELETE ON products
+    BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    # Only text changes touch the index; stock and price updates skip it
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_fts_update AFTER UPDATE OF name, description ON products
+    BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+    END
+    """,
+    # Index the rows that predate the table; a no-op once anything is indexed
+    """
+    INSERT INTO products_fts (products_fts) SELECT 'rebuild'
+    WHERE EXISTS (SELECT 1 FROM products) AND NOT EXISTS (SELECT 1 FROM products_fts_docsize)
+    """,
+]
+
+POSTGRES_PRODUCT_SEARCH_DDL = [
+    """
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector)",
+]
+
+# (id, rank) of the newest SEARCH_MAX_MATCHES matching products ``p`` that meet {conditions};
+# bind search_expression() first
+SQLITE_MATCH_SQL = (
+    "SELECT products_fts.rowid AS id, bm25(products_fts, 10.0, 1.0) AS rank "
+    "FROM products_fts JOIN products p ON p.id = products_fts.rowid "
+    "WHERE products_fts MATCH {placeholder}{conditions} ORDER BY products_fts.rowid DESC LIMIT {limit}"
+)
+POSTGRES_MATCH_SQL = (
+    "SELECT id, -ts_rank_cd(search_vector, search_query) AS rank FROM ("
+    "SELECT p.id, p.search_vector, search_query "
+    "FROM products p, to_tsquery('english', {placeholder}) AS search_query "
+    "WHERE p.search_vector @@ search_query{conditions} ORDER BY p.id DESC LIMIT {limit}"
+    ") AS candidates"
+)
+
+# Every matching id, unranked and uncapped, for counting
+SQLITE_MATCH_IDS_SQL = "SELECT rowid AS id FROM products_fts WHERE products_fts MATCH {placeholder}"
+POSTGRES_MATCH_IDS_SQL = "SELECT id FROM products WHERE search_vector @@ to_tsquery('english', {placeholder})"
+
+
+def search_terms(text: Optional[str]) -> List[str]:
+    """The words of a user's query, lower-cased, without operators or punctuation."""
+    return _TERM.findall((text or "").lower())[:MAX_SEARCH_TERMS]
+
+
+def search_expression(terms: List[str], dialect: str) -> str:
+    """MATCH / to_tsquery argument requiring every term, the last one as a prefix."""
+    if dialect == "sqlite":
+        # Quoted, so words like "and" or "near" are never read as FTS5 operators
+        return " ".join(f'"{term}"' for term in terms) + "*"
+    return " & ".join(terms) + ":*"
+
+
+def match_sql(dialect: str, placeholder: str, conditions: Sequence[str] = ()) -> str:
+    """The (id, rank) match statement for ``dialect`` over products ``p`` meeting ``conditions``.
+
+    The search parameter comes first, followed by the parameters of ``conditions`` in order.
+    """
+    template = SQLITE_MATCH_SQL if dialect == "sqlite" else POSTGRES_MATCH_SQL
+    return template.format(placeholder=placeholder, limit=SEARCH_MAX_MATCHES,
+                           conditions="".join(f" AND {condition}" for condition in conditions))
+
+
+def match_ids_sql(dialect: str, placeholder: str) -> str:
+    """Every id matching the search parameter, without ranking or the SEARCH_MAX_MATCHES cap."""
+    template = SQLITE_MATCH_IDS_SQL if dialect == "sqlite" else POSTGRES_MATCH_IDS_SQL
+    return template.format(placeholder=placeholder)
@@ -0,0 +1,56 @@
+"""JSON encoding shared by the FastAPI app and simple_server.
+
+Uses orjson when it is installed and the standard library otherwise; ``JSON_ENCODER``
+(``auto``, ``orjson`` or ``stdlib``) forces one. Both produce the same compact UTF-8
+output, and both encode Decimal as a number and date/datetime/time as ISO 8601 strings,
+so handlers can pass database values straight through.
+"""
+
+import datetime
+import json
+import os
+from decimal import Decimal
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+JSON_ENCODER = os.getenv("JSON_ENCODER", "auto").lower()
+
+
+def _default(obj: Any) -> Any:
+    """Encode the types database drivers return that JSON has no literal for."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    """Serialize ``obj`` to compact UTF-8 JSON bytes."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    """Serialize ``obj`` to compact UTF-8 JSON bytes."""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+if JSON_ENCODER == "stdlib" or (JSON_ENCODER == "auto" and not ORJSON_AVAILABLE):
+    encoder_name = "stdlib"
+    dumps = _stdlib_dumps
+    loads = json.loads
+else:
+    if not ORJSON_AVAILABLE:
+        raise ImportError("JSON_ENCODER=orjson but the orjson package is not installed")
+    encoder_name = "orjson"
+    dumps = _orjson_dumps
+    loads = orjson.loads
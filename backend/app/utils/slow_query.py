@@ -0,0 +1,238 @@
+"""Slow-query log shared by simple_server and the FastAPI app.
+
+Statements that take at least ``SLOW_QUERY_MS`` milliseconds are appended to a rotating
+JSON-lines file (``SLOW_QUERY_LOG``), one object per statement:
+
+    {"ts": ..., "source": "simple_server", "fingerprint": "3f1c...", "duration_ms": 412.7,
+     "sql": "SELECT ... WHERE p.id IN (...) AND p.name LIKE ?", "params": [7, "<str:9>"],
+     "explain": ["SCAN p", "SEARCH c USING INTEGER PRIMARY KEY (rowid=?)"], "pid": 4242}
+
+The SQL is normalized (literals and placeholders become ``?``, lists collapse to
+``(...)``) so repeated statements share a fingerprint. Parameters are redacted: numbers,
+booleans and NULLs are kept, strings and bytes are reduced to their type and length, and
+values bound to names that look like secrets are dropped entirely. ``SLOW_QUERY_EXPLAIN``
+adds the EXPLAIN (PostgreSQL) / EXPLAIN QUERY PLAN (SQLite) output for SELECT, UPDATE
+and DELETE statements (plans only; nothing is executed twice).
+
+SLOW_QUERY_MS follows PostgreSQL's log_min_duration_statement: -1 (default) disables the
+log, 0 logs every statement. Summarize a log by fingerprint with:
+
+    python -m app.utils.slow_query slow_queries.jsonl --top 20
+"""
+
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Dict, List, Optional
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "-1"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.jsonl")  # "{pid}" is replaced per process
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+SECRET_PARAM_NAMES = re.compile(r"password|passwd|secret|token|hash|key", re.IGNORECASE)
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Statement text with literals and placeholders replaced, for grouping."""
+    sql = _COMMENT.sub(" ", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _VALUE_LIST.sub("(...)", sql)
+    sql = _REPEATED_LISTS.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode("utf-8")).hexdigest()[:16]
+
+
+def _redact_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (str, bytes, bytearray, memoryview)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_params(params):
+    """Parameters with anything that could be personal data or a secret masked."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {
+            name: "<redacted>" if SECRET_PARAM_NAMES.search(str(name)) else _redact_value(value)
+            for name, value in params.items()
+        }
+    if isinstance(params, (list, tuple)):
+        return [_redact_value(value) for value in params]
+    return _redact_value(params)
+
+
+def is_explainable(sql: str) -> bool:
+    head = sql.lstrip().split(None, 1)
+    return bool(head) and head[0].upper() in ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+def explain(dbapi_connection, dialect: str, sql: str, params) -> List[str]:
+    """Plan of ``sql`` as text lines, run on a separate cursor of a DB-API connection."""
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    cursor = dbapi_connection.cursor()
+    try:
+        if params is None:
+            cursor.execute(prefix + sql)
+        else:
+            cursor.execute(prefix + sql, params)
+        lines = []
+        for row in cursor.fetchall():
+            if isinstance(row, dict):
+                row = tuple(row.values())
+            # SQLite rows are (id, parent, notused, detail); PostgreSQL rows are one text column
+            lines.append(str(row[-1]))
+        return lines
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Appends slow statements to a size-rotated JSONL file."""
+
+    def __init__(self, threshold_ms: float, path: str, explain_plans: bool = False,
+                 max_bytes: int = SLOW_QUERY_LOG_MAX_BYTES, backups: int = SLOW_QUERY_LOG_BACKUPS):
+        self.threshold = threshold_ms / 1000.0
+        self.enabled = threshold_ms >= 0
+        self.explain_plans = explain_plans
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._logger = None
+        self._logger_pid = None
+
+    def _get_logger(self) -> logging.Logger:
+        # One handler per process: pre-forked workers must not share a file descriptor
+        if self._logger is None or self._logger_pid != os.getpid():
+            path = self.path.replace("{pid}", str(os.getpid()))
+            logger = logging.getLogger(f"{__name__}.{os.getpid()}.{id(self)}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(path, maxBytes=self.max_bytes, backupCount=self.backups, delay=True)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.handlers = [handler]
+            self._logger, self._logger_pid = logger, os.getpid()
+        return self._logger
+
+    def is_slow(self, seconds: float) -> bool:
+        return self.enabled and seconds >= self.threshold
+
+    def record(self, source: str, sql: str, params, seconds: float,
+               plan: Optional[Callable[[], List[str]]] = None) -> None:
+        """Log one slow statement; ``plan`` is called for its EXPLAIN output if enabled."""
+        normalized = normalize_sql(sql)
+        entry = {
+            "ts": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "source": source,
+            "fingerprint": fingerprint(normalized),
+            "duration_ms": round(seconds * 1000, 3),
+            "sql": normalized,
+            "params": redact_params(params),
+            "pid": os.getpid(),
+        }
+        if self.explain_plans and plan is not None and is_explainable(sql):
+            try:
+                entry["explain"] = plan()
+            except Exception as e:
+                entry["explain_error"] = str(e)
+        self._get_logger().info(json.dumps(entry, default=str))
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG, SLOW_QUERY_EXPLAIN)
+
+
+def _log_files(path: str) -> List[str]:
+    """The log and its rotated backups (``path.1`` ...), oldest first."""
+    backups = [f for f in glob.glob(glob.escape(path) + ".*") if f.rsplit(".", 1)[-1].isdigit()]
+    backups.sort(key=lambda f: int(f.rsplit(".", 1)[-1]), reverse=True)
+    return backups + ([path] if os.path.exists(path) else [])
+
+
+def summarize(paths: List[str]) -> List[Dict]:
+    """Aggregate log entries by fingerprint, slowest total first."""
+    groups: Dict[str, Dict] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as log_file:
+            for line in log_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                group = groups.setdefault(entry["fingerprint"], {
+                    "fingerprint": entry["fingerprint"], "sql": entry["sql"], "sources": set(),
+                    "durations": [], "last_seen": entry["ts"], "explain": None,
+                })
+                group["durations"].append(entry["duration_ms"])
+                group["sources"].add(entry["source"])
+                group["last_seen"] = max(group["last_seen"], entry["ts"])
+                group["explain"] = entry.get("explain") or group["explain"]
+
+    summary = []
+    for group in groups.values():
+        durations = sorted(group.pop("durations"))
+        count = len(durations)
+        summary.append({
+            **group,
+            "sources": sorted(group["sources"]),
+            "count": count,
+            "total_ms": round(sum(durations), 3),
+            "mean_ms": round(sum(durations) / count, 3),
+            "p95_ms": durations[min(count - 1, int(0.95 * count))],
+            "max_ms": durations[-1],
+        })
+    summary.sort(key=lambda group: group["total_ms"], reverse=True)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a slow-query log by statement fingerprint")
+    parser.add_argument("log", nargs="?", default=SLOW_QUERY_LOG, help="JSONL log file (rotated backups are included)")
+    parser.add_argument("--top", type=int, default=20, help="number of fingerprints to show")
+    parser.add_argument("--sort", default="total_ms", choices=("total_ms", "count", "mean_ms", "p95_ms", "max_ms"))
+    parser.add_argument("--json", action="store_true", help="print JSON lines instead of a table")
+    args = parser.parse_args(argv)
+
+    paths = _log_files(args.log)
+    if not paths:
+        parser.error(f"no log file at {args.log}")
+    summary = sorted(summarize(paths), key=lambda group: group[args.sort], reverse=True)[:args.top]
+
+    if args.json:
+        for group in summary:
+            print(json.dumps(group))
+        return
+    print(f"{'count':>7} {'total_ms':>11} {'mean_ms':>9} {'p95_ms':>9} {'max_ms':>9}  fingerprint       sql")
+    for group in summary:
+        sql = group["sql"] if len(group["sql"]) <= 100 else group["sql"][:97] + "..."
+        print(f"{group['count']:>7} {group['total_ms']:>11.1f} {group['mean_ms']:>9.1f} {group['p95_ms']:>9.1f} "
+              f"{group['max_ms']:>9.1f}  {group['fingerprint']}  {sql}")
+        for line in group["explain"] or ():
+            print(f"{'':>50}  | {line}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""SQLite tuning profile applied to every connection both servers open.
+
+Defaults favour a small web service: write-ahead logging so readers never block the
+writer, synchronous=NORMAL (durable across application crashes, and in WAL mode the
+database stays consistent after power loss), a busy timeout instead of immediate
+"database is locked" errors, memory-mapped reads and a larger page cache.
+Set ``SQLITE_TUNING=false`` to open connections with SQLite's stock settings.
+"""
+
+import os
+from typing import Dict, List, Tuple
+
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() == "true"
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB, positive = pages
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY").upper()
+
+_CHOICES = {
+    "journal_mode": ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"),
+    "synchronous": ("OFF", "NORMAL", "FULL", "EXTRA"),
+    "temp_store": ("DEFAULT", "FILE", "MEMORY"),
+}
+
+
+def sqlite_pragmas() -> List[Tuple[str, object]]:
+    """The configured (pragma, value) pairs, in the order they must be applied."""
+    if not SQLITE_TUNING:
+        return []
+    pragmas = [
+        # busy_timeout first so switching journal_mode can wait for other connections
+        ("busy_timeout", SQLITE_BUSY_TIMEOUT_MS),
+        ("journal_mode", SQLITE_JOURNAL_MODE),
+        ("synchronous", SQLITE_SYNCHRONOUS),
+        ("mmap_size", SQLITE_MMAP_SIZE),
+        ("cache_size", SQLITE_CACHE_SIZE),
+        ("temp_store", SQLITE_TEMP_STORE),
+    ]
+    for name, value in pragmas:
+        if name in _CHOICES and value not in _CHOICES[name]:
+            raise ValueError(f"Invalid SQLite {name}: {value!r} (expected one of {', '.join(_CHOICES[name])})")
+    return pragmas
+
+
+def apply_sqlite_pragmas(conn) -> None:
+    """Apply the tuning profile to a DB-API sqlite3 connection."""
+    cursor = conn.cursor()
+    try:
+        for name, value in sqlite_pragmas():
+            cursor.execute(f"PRAGMA {name} = {value}")
+            if name == "journal_mode":
+                cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def read_sqlite_pragmas(conn) -> Dict[str, object]:
+    """The values a connection is actually running with, for startup logs."""
+    names = ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size", "temp_store")
+    cursor = conn.cursor()
+    try:
+        effective = {}
+        for name in names:
+            cursor.execute(f"PRAGMA {name}")
+            row = cursor.fetchone()
+            effective[name] = row[0] if row else None
+        return effective
+    finally:
+        cursor.close()
+
+
+def describe_sqlite_pragmas(conn) -> str:
+    """One-line summary of a connection's effective settings."""
+    effective = read_sqlite_pragmas(conn)
+    synchronous = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}.get(effective["synchronous"], effective["synchronous"])
+    temp_store = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}.get(effective["temp_store"], effective["temp_store"])
+    profile = "tuned" if SQLITE_TUNING else "stock"
+    return (
+        f"{profile}: journal_mode={effective['journal_mode']} synchronous={synchronous} "
+        f"busy_timeout={effective['busy_timeout']}ms mmap_size={effective['mmap_size']} "
+        f"cache_size={effective['cache_size']} temp_store={temp_store}"
+    )
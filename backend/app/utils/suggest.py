@@ -0,0 +1,429 @@
+"""Search-as-you-type suggestions shared by the FastAPI app and simple_server.
+
+Active product names, category names and farm names live in an in-process compressed
+prefix trie (radix tree): edges carry whole substrings, so a catalog of a few thousand
+distinct names needs only a few thousand nodes. Every node also keeps the best
+SUGGEST_MAX_RESULTS completions of its subtree, so a lookup walks at most the length of the
+typed prefix and returns a precomputed tuple, in microseconds whatever the catalog size.
+
+Names are indexed under each of their words ("tom" completes "Heirloom Tomatoes") and rank
+by how many active products they lead to, then shortest first.
+
+The index loads on first use with one grouped query per source. Product writes made
+through the same process update it right away; everything else (other workers, category
+and farm changes, direct SQL) is picked up by a background thread that polls the
+``suggestions`` counter in table_versions. Triggers bump that counter only when a name, an
+active flag or an owner changes, never for stock or price updates, and a refresh applies
+just the difference between the trie and a fresh load.
+"""
+
+import heapq
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Completions kept per trie node, and the most a request can ask for
+SUGGEST_MAX_RESULTS = int(os.getenv("SUGGEST_MAX_RESULTS", 10))
+
+# How often each process checks the suggestions counter for changes made elsewhere
+SUGGEST_REFRESH_SECONDS = float(os.getenv("SUGGEST_REFRESH_SECONDS", 30))
+
+# table_versions row bumped by every change that can alter suggestions
+SUGGEST_VERSION = "suggestions"
+
+# Suggestion types
+PRODUCT = "product"
+CATEGORY = "category"
+FARM = "farm"
+
+# (name, products) per source; a suggestion's weight is the number of active products it leads to
+SUGGEST_SOURCES_SQL = {
+    PRODUCT: "SELECT name AS name, COUNT(*) AS products FROM products WHERE is_active = TRUE GROUP BY name",
+    CATEGORY: (
+        "SELECT c.name AS name, COUNT(*) AS products FROM categories c "
+        "JOIN products p ON p.category_id = c.id "
+        "WHERE c.is_active = TRUE AND p.is_active = TRUE GROUP BY c.name"
+    ),
+    FARM: (
+        "SELECT f.farm_name AS name, COUNT(*) AS products FROM farmer_profiles f "
+        "JOIN products p ON p.farmer_id = f.user_id "
+        "WHERE p.is_active = TRUE GROUP BY f.farm_name"
+    ),
+}
+
+SUGGEST_VERSION_SQL = f"SELECT version FROM table_versions WHERE table_name = '{SUGGEST_VERSION}'"
+
+# Columns whose changes can alter suggestions, per table
+_SUGGEST_COLUMNS = {
+    "products": "name, is_active, category_id, farmer_id",
+    "categories": "name, is_active",
+    "farmer_profiles": "farm_name, user_id",
+}
+
+
+def _sqlite_triggers(table: str) -> List[str]:
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_suggestions_{event.split()[0].lower()}
+        AFTER {event} ON {table}
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = '{SUGGEST_VERSION}';
+        END
+        """
+        for event in ("INSERT", "DELETE", f"UPDATE OF {_SUGGEST_COLUMNS[table]}")
+    ]
+
+
+def _postgres_triggers(table: str) -> List[str]:
+    return [
+        f"DROP TRIGGER IF EXISTS trg_{table}_suggestions ON {table}",
+        f"CREATE TRIGGER trg_{table}_suggestions AFTER INSERT OR DELETE OR UPDATE OF {_SUGGEST_COLUMNS[table]} "
+        f"ON {table} FOR EACH STATEMENT EXECUTE PROCEDURE bump_suggestions_version()",
+    ]
+
+
+# Needs table_versions (etag.py); the farm triggers only apply to the SQLAlchemy schema
+SQLITE_SUGGEST_DDL = [
+    f"INSERT OR IGNORE INTO table_versions (table_name, version) "
+    f"VALUES ('{SUGGEST_VERSION}', CAST(strftime('%s', 'now') AS INTEGER) * 1000)",
+] + _sqlite_triggers("products") + _sqlite_triggers("categories")
+
+SQLITE_FARM_SUGGEST_DDL = _sqlite_triggers("farmer_profiles")
+
+POSTGRES_SUGGEST_DDL = [
+    f"INSERT INTO table_versions (table_name, version) "
+    f"VALUES ('{SUGGEST_VERSION}', (EXTRACT(EPOCH FROM NOW()) * 1000)::BIGINT) ON CONFLICT (table_name) DO NOTHING",
+    f"""
+    CREATE OR REPLACE FUNCTION bump_suggestions_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE table_name = '{SUGGEST_VERSION}';
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+] + _postgres_triggers("products") + _postgres_triggers("categories")
+
+POSTGRES_FARM_SUGGEST_DDL = _postgres_triggers("farmer_profiles")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+Suggestion = Tuple[str, str]  # (type, text)
+
+# Above this many changes at once, recomputing every node's completions once beats doing it per path
+_BULK_CHANGES = 100
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lower-cased words without accents or punctuation, joined by single spaces."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_WORD.findall(text))
+
+
+def index_keys(text: str) -> List[str]:
+    """The keys ``text`` is found under: its normalized form starting at each word."""
+    words = normalize(text).split(" ")
+    return [" ".join(words[start:]) for start in range(len(words)) if words[start]]
+
+
+class _Node:
+    __slots__ = ("label", "children", "entries", "top")
+
+    def __init__(self, label: str):
+        self.label = label      # edge from the parent
+        self.children = None    # first character of the child's label -> child
+        self.entries = None     # suggestions with a key ending here
+        self.top = ()           # best suggestions in this subtree, best first
+
+
+class PrefixIndex:
+    """Compressed prefix trie of weighted suggestions with precomputed top completions.
+
+    ``add`` and ``discard`` adjust a suggestion's weight by a product count; a suggestion
+    whose weight drops to zero leaves the trie. Updates touch only the nodes on the paths
+    of the suggestion's keys. Thread-safe.
+    """
+
+    def __init__(self, max_results: int = SUGGEST_MAX_RESULTS):
+        self.max_results = max_results
+        self._root = _Node("")
+        self._weights: Dict[Suggestion, int] = {}
+        self._keys = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def add(self, kind: str, text: str, count: int = 1):
+        if text:
+            with self._lock:
+                self._set_weight((kind, text), self._weights.get((kind, text), 0) + count)
+
+    def discard(self, kind: str, text: str, count: int = 1):
+        if text:
+            with self._lock:
+                self._set_weight((kind, text), self._weights.get((kind, text), 0) - count)
+
+    def set_counts(self, counts: Dict[Suggestion, int]) -> int:
+        """Make the weights equal ``counts``, touching only what differs. Returns the changes."""
+        with self._lock:
+            changed = [(s, w) for s, w in counts.items() if self._weights.get(s) != w]
+            changed += [(s, 0) for s in self._weights if s not in counts]
+            bulk = len(changed) > _BULK_CHANGES
+            for suggestion, weight in changed:
+                self._set_weight(suggestion, weight, refresh=not bulk)
+            if bulk:
+                self._refresh_all(self._root)
+            return len(changed)
+
+    def complete(self, prefix: str, limit: int = SUGGEST_MAX_RESULTS) -> List[dict]:
+        """The best ``limit`` suggestions with a word starting with ``prefix``, best first."""
+        key = normalize(prefix)
+        if not key:
+            return []
+        if prefix[-1:].isspace():
+            key += " "  # a finished word: "pea " completes "pea pods" but not "peaches"
+        with self._lock:
+            node = self._root
+            while key:
+                child = node.children.get(key[0]) if node.children else None
+                if child is None:
+                    return []
+                label = child.label
+                if key.startswith(label):
+                    key = key[len(label):]
+                elif label.startswith(key):
+                    key = ""
+                else:
+                    return []
+                node = child
+            weights = self._weights
+            return [{"text": text, "type": kind, "products": weights[(kind, text)]}
+                    for kind, text in node.top[:limit]]
+
+    def stats(self) -> dict:
+        """Size of the trie, with its approximate memory footprint in bytes."""
+        with self._lock:
+            nodes = 0
+            size = sys.getsizeof(self._weights)
+            stack = [self._root]
+            while stack:
+                node = stack.pop()
+                nodes += 1
+                size += sys.getsizeof(node) + sys.getsizeof(node.label) + sys.getsizeof(node.top)
+                if node.entries:
+                    size += sys.getsizeof(node.entries)
+                if node.children:
+                    size += sys.getsizeof(node.children)
+                    stack.extend(node.children.values())
+            for kind, text in self._weights:
+                size += sys.getsizeof((kind, text)) + sys.getsizeof(text)
+            return {
+                "suggestions": len(self._weights),
+                "keys": self._keys,
+                "nodes": nodes,
+                "memory_bytes": size,
+            }
+
+    # Callers hold self._lock
+
+    def _rank(self, suggestion: Suggestion):
+        # A suggestion being removed can linger in completions until its last key is gone
+        return -self._weights.get(suggestion, 0), len(suggestion[1]), suggestion[1], suggestion[0]
+
+    def _set_weight(self, suggestion: Suggestion, weight: int, refresh: bool = True):
+        previous = self._weights.get(suggestion, 0)
+        if weight == previous or (weight <= 0 and previous <= 0):
+            return
+        keys = index_keys(suggestion[1])
+        if weight <= 0:
+            del self._weights[suggestion]
+            for key in keys:
+                self._remove(key, suggestion, refresh)
+            self._keys -= len(keys)
+        elif previous <= 0:
+            self._weights[suggestion] = weight
+            for key in keys:
+                self._insert(key, suggestion, refresh)
+            self._keys += len(keys)
+        else:
+            # Same keys, new rank: refresh the completions along each path
+            self._weights[suggestion] = weight
+            for key in keys if refresh else ():
+                self._refresh_tops(self._path(key))
+
+    def _path(self, key: str) -> List[_Node]:
+        path, node = [self._root], self._root
+        while key:
+            node = node.children[key[0]]
+            key = key[len(node.label):]
+            path.append(node)
+        return path
+
+    def _refresh_tops(self, path: Iterable[_Node]):
+        for node in reversed(path):
+            self._refresh_top(node)
+
+    def _refresh_top(self, node: _Node):
+        # Children's completions are already ranked, so merge them and stop after max_results
+        sources = [sorted(node.entries, key=self._rank)] if node.entries else []
+        if node.children:
+            sources.extend(child.top for child in node.children.values())
+        top, seen = [], set()
+        for suggestion in heapq.merge(*sources, key=self._rank):
+            if suggestion not in seen:
+                seen.add(suggestion)
+                top.append(suggestion)
+                if len(top) == self.max_results:
+                    break
+        node.top = tuple(top)
+
+    def _refresh_all(self, root: _Node):
+        """Recompute every node's completions, children before parents."""
+        order, stack = [], [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend((node.children or {}).values())
+        for node in reversed(order):
+            self._refresh_top(node)
+
+    def _insert(self, key: str, suggestion: Suggestion, refresh: bool = True):
+        path, node = [self._root], self._root
+        while key:
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(key[0])
+            if child is None:
+                child = node.children[key[0]] = _Node(key)
+                key = ""
+            else:
+                label = child.label
+                common = 0
+                while common < len(label) and common < len(key) and label[common] == key[common]:
+                    common += 1
+                if common < len(label):
+                    # Split the edge where the new key leaves it
+                    middle = _Node(label[:common])
+                    child.label = label[common:]
+                    middle.children = {child.label[0]: child}
+                    middle.top = child.top
+                    node.children[key[0]] = child = middle
+                key = key[common:]
+            path.append(child)
+            node = child
+        if node.entries is None:
+            node.entries = set()
+        node.entries.add(suggestion)
+        if refresh:
+            self._refresh_tops(path)
+
+    def _remove(self, key: str, suggestion: Suggestion, refresh: bool = True):
+        path = self._path(key)
+        path[-1].entries.discard(suggestion)
+        # Drop emptied leaves and merge pass-through nodes into their only child
+        for depth in range(len(path) - 1, 0, -1):
+            node, parent = path[depth], path[depth - 1]
+            if node.entries or (node.children and len(node.children) > 1):
+                continue
+            if node.children:
+                (child,) = node.children.values()
+                child.label = node.label + child.label
+                parent.children[node.label[0]] = child
+                path[depth] = child
+            else:
+                del parent.children[node.label[0]]
+                path[depth] = None
+        if refresh:
+            self._refresh_tops([node for node in path if node is not None])
+
+
+class SuggestIndex:
+    """A PrefixIndex kept in step with the database, one per process.
+
+    ``load`` returns every suggestion with its product count; ``read_version`` returns the
+    suggestions counter. Loads on the first lookup in each process (including after a
+    fork), then a daemon thread refreshes whenever the counter moves.
+    """
+
+    def __init__(self, load: Callable[[], Dict[Suggestion, int]], read_version: Callable[[], Optional[int]],
+                 refresh_seconds: float = SUGGEST_REFRESH_SECONDS):
+        self.load = load
+        self.read_version = read_version
+        self.refresh_seconds = refresh_seconds
+        self.index = PrefixIndex()
+        self.version = None
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_refresh_ms = None
+        self.last_changes = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_MAX_RESULTS) -> List[dict]:
+        if self._pid != os.getpid():
+            self._start()
+        return self.index.complete(prefix, limit)
+
+    def product_changed(self, old_name: Optional[str], new_name: Optional[str]):
+        """Apply a committed product write: the name it was listed under and the new one (None if inactive)."""
+        if self._pid != os.getpid() or old_name == new_name:
+            return  # not loaded here yet; the first load will include it
+        if old_name:
+            self.index.discard(PRODUCT, old_name)
+        if new_name:
+            self.index.add(PRODUCT, new_name)
+
+    def refresh(self):
+        """Reload from the database and apply the difference."""
+        started = time.perf_counter()
+        version = self.read_version()
+        changes = self.index.set_counts(self.load())
+        self.version = version
+        self.refreshes += 1
+        self.last_changes = changes
+        self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    def stats(self) -> dict:
+        return dict(
+            self.index.stats(),
+            loaded=self._pid == os.getpid(),
+            version=self.version,
+            refreshes=self.refreshes,
+            refresh_errors=self.refresh_errors,
+            last_refresh_ms=self.last_refresh_ms,
+            last_changes=self.last_changes,
+            refresh_seconds=self.refresh_seconds,
+        )
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.refresh()
+            self._pid = os.getpid()
+            if self.refresh_seconds > 0:
+                threading.Thread(target=self._poll, name="suggest-refresh", daemon=True).start()
+
+    def _poll(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.refresh_seconds)
+            try:
+                if self.read_version() != self.version:
+                    self.refresh()
+            except Exception:
+                self.refresh_errors += 1
+                logger.warning("Suggestion refresh failed", exc_info=True)
+
+
+def rows_to_counts(kind: str, rows: Iterable) -> Dict[Suggestion, int]:
+    """{(kind, name): products} from (name, products) rows."""
+    return {(kind, name): int(products) for name, products in rows if name}
@@ -0,0 +1,204 @@
+"""Shared helpers for the benchmark scripts.
+
+The benchmarks start ``simple_server.py`` as a subprocess in a scratch
+directory, so they never touch the checked-in SQLite database.
+"""
+
+import http.client
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIMPLE_SERVER = os.path.join(BACKEND_DIR, 'simple_server.py')
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def free_port():
+    """Return a TCP port that is free on localhost."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_http(port, path='/health', timeout=30.0):
+    """Poll until the server answers ``path`` with a 200."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', path)
+            if conn.getresponse().status == 200:
+                conn.close()
+                return True
+            conn.close()
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not become ready")
+
+
+class SimpleServerProcess:
+    """Context manager that runs simple_server.py in a scratch directory."""
+
+    def __init__(self, env=None, workdir=None, quiet=True, seed=True):
+        self.env = dict(os.environ)
+        self.env.pop('DATABASE_URL', None)
+        self.env.update(env or {})
+        self.port = int(self.env.get('PORT') or free_port())
+        self.env['PORT'] = str(self.port)
+        self.env['PYTHONUNBUFFERED'] = '1'
+        self._own_workdir = workdir is None
+        self.workdir = workdir or tempfile.mkdtemp(prefix='farmer-bench-')
+        self.quiet = quiet
+        self.seed = seed
+        self.proc = None
+
+    def __enter__(self):
+        out = subprocess.DEVNULL if self.quiet else None
+        if self.seed:
+            subprocess.run(
+                [sys.executable, SIMPLE_SERVER, 'seed'],
+                cwd=self.workdir, env=self.env, stdout=out, stderr=out, check=True,
+            )
+        self.proc = subprocess.Popen(
+            [sys.executable, SIMPLE_SERVER],
+            cwd=self.workdir, env=self.env, stdout=out, stderr=out,
+        )
+        wait_for_http(self.port, path='/health/ready')
+        return self
+
+    def __exit__(self, *exc):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        if self._own_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class FastAPIServerProcess:
+    """Context manager that runs app.main:app under uvicorn on a scratch SQLite database.
+
+    The tables and categories come from ``init_db.py``; everything else is up to the caller.
+    uvicorn is not a dependency of simple_server, so check ``available()`` first.
+    """
+
+    def __init__(self, env=None, workdir=None, quiet=True, workers=1):
+        self._own_workdir = workdir is None
+        self.workdir = workdir or tempfile.mkdtemp(prefix='farmer-bench-')
+        self.env = dict(os.environ)
+        self.env.update({
+            'DATABASE_URL': 'sqlite:///' + os.path.join(self.workdir, 'farmer_marketplace.db'),
+            'DEBUG': 'false',
+            'PYTHONPATH': os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get('PYTHONPATH')])),
+            'PYTHONUNBUFFERED': '1',
+        })
+        self.env.update(env or {})
+        self.port = int(env.get('PORT') if env and env.get('PORT') else free_port())
+        self.quiet = quiet
+        self.workers = workers
+        self.proc = None
+
+    @staticmethod
+    def available():
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def __enter__(self):
+        out = subprocess.DEVNULL if self.quiet else None
+        subprocess.run(
+            [sys.executable, os.path.join(BACKEND_DIR, 'init_db.py')],
+            cwd=self.workdir, env=self.env, stdout=out, stderr=out, check=True,
+        )
+        self.proc = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(self.port),
+             '--workers', str(self.workers), '--log-level', 'warning', '--no-access-log'],
+            cwd=self.workdir, env=self.env, stdout=out, stderr=out,
+        )
+        wait_for_http(self.port, path='/health')
+        return self
+
+    __exit__ = SimpleServerProcess.__exit__
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _client_loop(port, method, path, headers, body, duration, keep_alive):
+    latencies = []
+    errors = 0
+    conn = None
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+            if not keep_alive or response.will_close:
+                conn.close()
+                conn = None
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            if conn is not None:
+                conn.close()
+            conn = None
+        latencies.append(time.perf_counter() - start)
+    if conn is not None:
+        conn.close()
+    return latencies, errors
+
+
+def run_load(port, path, concurrency, duration, method='GET', headers=None, body=None, keep_alive=False):
+    """Hammer one endpoint from ``concurrency`` client processes for ``duration`` seconds."""
+    headers = dict(headers or {})
+    if not keep_alive:
+        headers['Connection'] = 'close'
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(_client_loop, port, method, path, headers, body, duration, keep_alive)
+            for _ in range(concurrency)
+        ]
+        latencies, errors = [], 0
+        for future in futures:
+            lat, err = future.result()
+            latencies.extend(lat)
+            errors += err
+    return summarize(latencies, errors, duration)
+
+
+def summarize(latencies, errors, elapsed):
+    """Reduce raw latencies (seconds) to a JSON-friendly report in milliseconds."""
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'rps': round(count / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
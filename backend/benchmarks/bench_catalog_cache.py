@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Latency of product reads with the catalog cache on and off.
+
+Generates a catalog for each schema (generate_data.py), then replays the same read mix
+against each server twice, with ``CATALOG_CACHE_ENABLED`` true and false:
+
+  product   ``GET /products/{id}`` over a set of popular products
+  page      the first 20 products of each sort
+  category  the first 20 products of each category
+  search    a 20-result full-text search
+
+Each request of a workload is repeated, so with the cache on all but the first round are
+hits. The cache counters from ``/health/catalog`` are reported after each run.
+
+simple_server runs as a subprocess; the FastAPI app runs in-process through TestClient (so
+uvicorn is not needed) and toggles its cache in place.
+
+Usage: python benchmarks/bench_catalog_cache.py --products 250000 --rounds 20
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from _harness import BACKEND_DIR, SimpleServerProcess, summarize
+
+GENERATE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate_data.py')
+
+sys.path.insert(0, BACKEND_DIR)
+from app.utils.pagination import PRODUCT_SORTS  # noqa: E402
+
+
+def generate(url, schema, args):
+    env = {k: v for k, v in os.environ.items() if not k.startswith(('SLOW_QUERY', 'DATABASE_URL'))}
+    subprocess.run([
+        sys.executable, GENERATE_DATA, url, '--schema', schema, '--users', str(args.users),
+        '--products', str(args.products), '--orders', '0', '--seed', str(args.seed),
+    ], env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def workloads(db_path, args):
+    """name -> request paths, each requested once per round."""
+    conn = sqlite3.connect(db_path)
+    try:
+        product_ids = [row[0] for row in conn.execute("SELECT id FROM products")]
+        category_ids = [row[0] for row in conn.execute("SELECT id FROM categories ORDER BY id")]
+    finally:
+        conn.close()
+    popular = random.Random(args.seed).sample(product_ids, min(args.popular, len(product_ids)))
+    return {
+        'product': [f'/products/{product_id}' for product_id in popular],
+        'page': [f'/products/?sort={sort}&limit=20' for sort in PRODUCT_SORTS],
+        'category': [f'/products/?category_id={category_id}&limit=20' for category_id in category_ids],
+        'search': ['/products/?search=tomatoes&limit=20'],
+    }
+
+
+def run_target(target, cache, get, db_path, args):
+    for name, paths in workloads(db_path, args).items():
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for path in paths:
+                begin = time.perf_counter()
+                status = get(path)[0]
+                latencies.append(time.perf_counter() - begin)
+                if status != 200:
+                    raise SystemExit(f"{target}: GET {path} answered {status}")
+        stats = summarize(latencies, 0, time.perf_counter() - start)
+        print(json.dumps({
+            'bench': 'catalog_cache', 'target': target, 'cache': cache, 'workload': name,
+            'requests': len(latencies), 'p50_ms': stats['p50_ms'], 'p90_ms': stats['p90_ms'],
+            'p99_ms': stats['p99_ms'],
+        }), flush=True)
+    print(json.dumps(dict({'bench': 'catalog_cache', 'target': target, 'cache': cache, 'step': 'stats'},
+                          **get('/health/catalog')[1])), flush=True)
+
+
+def simple_server_target(workdir, args):
+    db_path = os.path.join(workdir, 'farmer_marketplace.db')
+    for cache in ('on', 'off'):
+        env = {'SERVER_MODE': 'single', 'CATALOG_CACHE_ENABLED': 'true' if cache == 'on' else 'false'}
+        with SimpleServerProcess(workdir=workdir, seed=False, env=env) as server:
+            conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=60)
+
+            def get(path):
+                conn.request('GET', path)
+                response = conn.getresponse()
+                return response.status, json.loads(response.read())
+
+            try:
+                run_target('simple_server', cache, get, db_path, args)
+            finally:
+                conn.close()
+
+
+def fastapi_target(db_path, args):
+    # The app reads DATABASE_URL at import
+    os.environ.update({'DATABASE_URL': 'sqlite:///' + db_path, 'DEBUG': 'false'})
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.routes.products import catalog_cache
+    client = TestClient(app)
+
+    def get(path):
+        response = client.get(path)
+        return response.status_code, response.json()
+
+    for cache in ('on', 'off'):
+        catalog_cache.enabled = cache == 'on'
+        run_target('fastapi', cache, get, db_path, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', nargs='+', choices=('simple_server', 'fastapi'),
+                        default=['simple_server', 'fastapi'])
+    parser.add_argument('--products', type=int, default=250000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--popular', type=int, default=200, help='distinct products read by id')
+    parser.add_argument('--rounds', type=int, default=20, help='times each request is repeated')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='farmer-bench-')
+    try:
+        if 'simple_server' in args.targets:
+            os.makedirs(os.path.join(workdir, 'simple'))
+            generate('sqlite:///' + os.path.join(workdir, 'simple', 'farmer_marketplace.db'), 'simple', args)
+            simple_server_target(os.path.join(workdir, 'simple'), args)
+            shutil.rmtree(os.path.join(workdir, 'simple'))
+        if 'fastapi' in args.targets:
+            db_path = os.path.join(workdir, 'models.db')
+            generate('sqlite:///' + db_path, 'models', args)
+            fastapi_target(db_path, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Benchmark simple_server throughput as the worker count grows.
+
+Starts simple_server.py once per (mode, workers) combination and drives
+GET /products/ from a fixed number of client processes. Prints one JSON
+object per run with requests/sec and latency percentiles.
+
+Usage: python benchmarks/bench_concurrency.py --modes threaded prefork --max-workers 8
+"""
+
+import argparse
+import json
+import os
+
+from _harness import SimpleServerProcess, run_load
+
+
+def worker_steps(max_workers):
+    steps = [1]
+    while steps[-1] * 2 <= max_workers:
+        steps.append(steps[-1] * 2)
+    if steps[-1] != max_workers:
+        steps.append(max_workers)
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=['single', 'threaded', 'prefork'])
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--clients', type=int, default=16, help='concurrent client processes')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per run')
+    parser.add_argument('--path', default='/products/')
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        steps = [1] if mode == 'single' else worker_steps(args.max_workers)
+        for workers in steps:
+            env = {'SERVER_MODE': mode, 'WEB_THREADS': str(workers), 'WEB_CONCURRENCY': str(workers)}
+            with SimpleServerProcess(env=env) as server:
+                result = run_load(server.port, args.path, args.clients, args.duration)
+            result.update({'mode': mode, 'workers': workers, 'clients': args.clients})
+            print(json.dumps(result), flush=True)
+
+
+if __name__ == '__main__':
+    main()
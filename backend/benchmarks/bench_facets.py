@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Latency of ``GET /products/facets`` at catalog scale (default 1M products).
+
+Generates a catalog for each schema (generate_data.py), which fills the
+product_facet_counts table, then requests the facet counts for a fixed set of filters:
+
+  all               no filter: every listed product
+  category          one category
+  organic           organic products only
+  farmer            the farmer with the most products
+  category_organic  a category and the organic flag together
+  search            a full-text search (grouped over its matches, not the counter table)
+
+simple_server runs as a subprocess; the FastAPI app runs in-process through TestClient (so
+uvicorn is not needed). For contrast, ``product_scan`` runs the same facet statement
+directly against the SQLite file with the counter table swapped for a grouped scan of the
+products table, which is what the counts cost without it.
+
+Usage: python benchmarks/bench_facets.py --products 1000000 --requests 30
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from _harness import BACKEND_DIR, SimpleServerProcess, summarize
+
+GENERATE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate_data.py')
+
+sys.path.insert(0, BACKEND_DIR)
+from app.utils.facets import facet_sql, price_bucket_sql  # noqa: E402
+
+# name -> query parameters; farmer_id is filled in from the data
+FILTERS = {
+    'all': {},
+    'category': {'category_id': 1},
+    'organic': {'is_organic': 'true'},
+    'farmer': {'farmer_id': None},
+    'category_organic': {'category_id': 2, 'is_organic': 'true'},
+    'search': {'search': 'tomatoes'},
+}
+
+PRODUCT_SCAN = (
+    f"(SELECT category_id, farmer_id, COALESCE(is_organic, 0) AS is_organic, "
+    f"{price_bucket_sql('price_per_unit')} AS price_bucket, 1 AS products "
+    f"FROM products WHERE is_active = 1 AND quantity_available > 0)"
+)
+
+
+def generate(url, schema, args):
+    env = {k: v for k, v in os.environ.items() if not k.startswith(('SLOW_QUERY', 'DATABASE_URL'))}
+    subprocess.run([
+        sys.executable, GENERATE_DATA, url, '--schema', schema, '--users', str(args.users),
+        '--products', str(args.products), '--orders', '0', '--seed', str(args.seed),
+    ], env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def biggest_farmer(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT farmer_id FROM product_facet_counts GROUP BY farmer_id "
+                            "ORDER BY SUM(products) DESC LIMIT 1").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def filter_sets(db_path):
+    farmer_id = biggest_farmer(db_path)
+    return {name: {key: farmer_id if key == 'farmer_id' else value for key, value in params.items()}
+            for name, params in FILTERS.items()}
+
+
+def measure(call, requests):
+    """Latency report for ``requests`` sequential calls, plus the total of the last result."""
+    total = call()  # warm-up
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        begin = time.perf_counter()
+        total = call()
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, 0, time.perf_counter() - start), total
+
+
+def report(target, name, stats, total):
+    print(json.dumps({
+        'bench': 'facets', 'target': target, 'filters': name, 'total': total,
+        'p50_ms': stats['p50_ms'], 'p90_ms': stats['p90_ms'], 'p99_ms': stats['p99_ms'],
+    }), flush=True)
+
+
+def run_target(target, get, db_path, args):
+    for name, params in filter_sets(db_path).items():
+        path = '/products/facets?' + urlencode(params)
+
+        def call():
+            status, facets = get(path)
+            if status != 200:
+                raise SystemExit(f"{target}: GET {path} answered {status}")
+            return facets['total']
+
+        stats, total = measure(call, args.requests)
+        report(target, name, stats, total)
+
+
+def simple_server_target(workdir, args):
+    with SimpleServerProcess(workdir=workdir, seed=False, env={'SERVER_MODE': 'single'}) as server:
+        conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=120)
+
+        def get(path):
+            conn.request('GET', path)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+
+        try:
+            run_target('simple_server', get, os.path.join(workdir, 'farmer_marketplace.db'), args)
+        finally:
+            conn.close()
+
+
+def fastapi_target(db_path, args):
+    # The app reads DATABASE_URL at import
+    os.environ.update({'DATABASE_URL': 'sqlite:///' + db_path, 'DEBUG': 'false'})
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+
+    def get(path):
+        response = client.get(path)
+        return response.status_code, response.json()
+
+    run_target('fastapi', get, db_path, args)
+
+
+def product_scan_target(db_path, args):
+    conn = sqlite3.connect(db_path)
+    try:
+        for name, params in filter_sets(db_path).items():
+            if 'search' in params:
+                continue  # searches group their matches either way
+            filters = {key: value == 'true' if key == 'is_organic' else value for key, value in params.items()}
+            sql, params = facet_sql(filters, '?', 'sqlite')
+            sql = sql.replace('FROM product_facet_counts', 'FROM ' + PRODUCT_SCAN)
+            stats, total = measure(
+                lambda: sum(row[2] for row in conn.execute(sql, params).fetchall() if row[0] == 'price'),
+                args.requests)
+            report('product_scan', name, stats, total)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', nargs='+', choices=('simple_server', 'fastapi', 'product_scan'),
+                        default=['simple_server', 'fastapi', 'product_scan'])
+    parser.add_argument('--products', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=30, help='timed requests per filter set')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='farmer-bench-')
+    try:
+        if 'simple_server' in args.targets:
+            os.makedirs(os.path.join(workdir, 'simple'))
+            generate('sqlite:///' + os.path.join(workdir, 'simple', 'farmer_marketplace.db'), 'simple', args)
+            simple_server_target(os.path.join(workdir, 'simple'), args)
+            shutil.rmtree(os.path.join(workdir, 'simple'))
+        if {'fastapi', 'product_scan'} & set(args.targets):
+            db_path = os.path.join(workdir, 'models.db')
+            generate('sqlite:///' + db_path, 'models', args)
+            if 'fastapi' in args.targets:
+                fastapi_target(db_path, args)
+            if 'product_scan' in args.targets:
+                product_scan_target(db_path, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
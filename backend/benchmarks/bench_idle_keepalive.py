@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Latency of an active client while other keep-alive clients sit idle on the server.
+
+Opens ``--idle`` persistent connections that each make one request and then go quiet,
+more than the server has worker threads (``--threads``, per process in prefork mode). An
+active client then makes ``--requests`` sequential GETs, half on new connections and
+half on its own persistent connection. Idle connections must not hold a worker, so the
+active client should see the same latency as with no idle clients at all; a request
+stuck behind one shows up as a stall of KEEPALIVE_TIMEOUT seconds.
+
+Each server mode runs twice: with keep-alive (HTTP/1.1) and with HTTP_KEEPALIVE=false
+(HTTP/1.0, one request per connection) as the baseline.
+
+Usage: python benchmarks/bench_idle_keepalive.py --idle 50 --threads 2 --requests 200
+"""
+
+import argparse
+import http.client
+import json
+import time
+
+from _harness import SimpleServerProcess, summarize
+
+# Requests slower than this count as stalled behind an idle connection
+STALL_SECONDS = 1.0
+
+
+def open_idle(port, count):
+    connections = []
+    for _ in range(count):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.request('GET', '/health')
+        conn.getresponse().read()
+        connections.append(conn)
+    return connections
+
+
+def active_client(port, path, count):
+    latencies, errors = [], 0
+    persistent = None
+    start_all = time.perf_counter()
+    for i in range(count):
+        start = time.perf_counter()
+        if i % 2 == 0:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        else:
+            persistent = persistent or http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn = persistent
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            will_close = response.will_close
+            if response.status != 200:
+                errors += 1
+        except (ConnectionError, http.client.HTTPException):
+            errors += 1
+            will_close = True
+        if conn is not persistent or will_close:
+            conn.close()
+            if conn is persistent:
+                persistent = None
+        latencies.append(time.perf_counter() - start)
+    if persistent is not None:
+        persistent.close()
+    result = summarize(latencies, errors, time.perf_counter() - start_all)
+    result['stalled'] = sum(1 for latency in latencies if latency > STALL_SECONDS)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='+', choices=('threaded', 'prefork'), default=['threaded', 'prefork'])
+    parser.add_argument('--idle', type=int, default=50, help='idle keep-alive connections held open')
+    parser.add_argument('--threads', type=int, default=2, help='WEB_THREADS for threaded mode')
+    parser.add_argument('--processes', type=int, default=2, help='WEB_CONCURRENCY for prefork mode')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--path', default='/categories/')
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        for keep_alive in (True, False):
+            env = {'SERVER_MODE': mode, 'WEB_THREADS': str(args.threads),
+                   'WEB_CONCURRENCY': str(args.processes), 'HTTP_KEEPALIVE': 'true' if keep_alive else 'false'}
+            with SimpleServerProcess(env=env) as server:
+                active_client(server.port, args.path, 20)  # warm-up
+                idle = open_idle(server.port, args.idle)
+                try:
+                    result = active_client(server.port, args.path, args.requests)
+                finally:
+                    for conn in idle:
+                        conn.close()
+            result.update({'mode': mode, 'keep_alive': keep_alive, 'idle_connections': args.idle})
+            print(json.dumps(result), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Serialization microbenchmarks for product and order payloads.
+
+Payloads mimic PostgreSQL rows (Decimal prices, date and datetime columns). Each encoder
+is timed on the same payload:
+
+  legacy          float()/str() every value by hand, then json.dumps().encode()
+  stdlib          app.utils.serialization with JSON_ENCODER=stdlib
+  orjson          app.utils.serialization with orjson (skipped if not installed)
+  starlette       fastapi JSONResponse.render
+  fast_response   app.utils.responses.FastJSONResponse.render
+
+The two response classes are timed on render() alone, fed the JSON-compatible payload
+FastAPI has already produced with jsonable_encoder / the response model by that point.
+
+Usage: python benchmarks/bench_json.py --products 50 1000 10000 --orders 20 500
+"""
+
+import argparse
+import datetime
+import json
+import sys
+import timeit
+from decimal import Decimal
+
+from _harness import BACKEND_DIR
+
+sys.path.insert(0, BACKEND_DIR)
+from app.utils import serialization  # noqa: E402
+
+
+def product_rows(count):
+    created = datetime.datetime(2026, 3, 1, 8, 30, 12, 345678)
+    return [{
+        "id": i,
+        "name": f"Organic Heirloom Tomatoes #{i}",
+        "description": "Fresh, vine-ripened organic tomatoes. Perfect for salads and cooking.",
+        "price_per_unit": Decimal("4.99") + i % 20,
+        "unit_type": "lb",
+        "quantity_available": 50 + i % 40,
+        "is_organic": i % 2 == 0,
+        "category": {"name": "Vegetables"},
+        "harvest_date": datetime.date(2026, 2, 27),
+        "created_at": created,
+        "is_active": True,
+        "is_available": True,
+    } for i in range(count)]
+
+
+def order_rows(count, items_per_order=4):
+    created = datetime.datetime(2026, 3, 1, 12, 0, 5, 120000)
+    return [{
+        "id": i,
+        "customer_id": 17,
+        "farmer_id": 3,
+        "total_amount": Decimal("42.85"),
+        "delivery_address": "12 Orchard Lane, Springfield",
+        "delivery_date": datetime.date(2026, 3, 4),
+        "delivery_time": "morning",
+        "notes": None,
+        "status": "confirmed",
+        "created_at": created,
+        "items": [{
+            "product_id": 100 + j,
+            "quantity": j + 1,
+            "unit_price": Decimal("3.49"),
+            "total_price": Decimal("3.49") * (j + 1),
+        } for j in range(items_per_order)],
+    } for i in range(count)]
+
+
+def legacy_convert(value):
+    """What the handlers used to do before encoding: convert every driver type by hand."""
+    if isinstance(value, dict):
+        return {k: legacy_convert(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [legacy_convert(v) for v in value]
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return str(value)
+    return value
+
+
+def encoders():
+    """name -> (prepare payload once, encode prepared payload)."""
+    identity = lambda obj: obj  # noqa: E731
+    found = {
+        'legacy': (identity, lambda obj: json.dumps(legacy_convert(obj)).encode()),
+        'stdlib': (identity, serialization._stdlib_dumps),
+    }
+    if serialization.ORJSON_AVAILABLE:
+        found['orjson'] = (identity, serialization._orjson_dumps)
+    try:
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse
+        from app.utils.responses import FastJSONResponse
+    except ImportError:
+        return found
+    found['starlette'] = (jsonable_encoder, JSONResponse(None).render)
+    found['fast_response'] = (jsonable_encoder, FastJSONResponse(None).render)
+    return found
+
+
+def bench(name, payload, encode, rows):
+    size = len(encode(payload))
+    runs, _ = timeit.Timer(lambda: encode(payload)).autorange()
+    best = min(timeit.repeat(lambda: encode(payload), number=runs, repeat=5)) / runs
+    return {
+        'payload': name,
+        'rows': rows,
+        'bytes': size,
+        'us_per_op': round(best * 1e6, 1),
+        'mb_per_s': round(size / best / 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, nargs='+', default=[50, 1000, 10000])
+    parser.add_argument('--orders', type=int, nargs='+', default=[20, 500])
+    args = parser.parse_args()
+
+    payloads = [('products', count, product_rows(count)) for count in args.products]
+    payloads += [('orders', count, order_rows(count)) for count in args.orders]
+    for encoder, (prepare, encode) in encoders().items():
+        for name, rows, payload in payloads:
+            result = bench(name, prepare(payload), encode, rows)
+            print(json.dumps({'encoder': encoder, **result}), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Compare per-request latency for a burst of sequential calls with and without keep-alive.
+
+Mimics the mobile client loading a screen: a burst of back-to-back GETs.
+With keep-alive the burst reuses one TCP connection; without it every call
+opens a new one.
+
+Usage: python benchmarks/bench_keepalive.py --requests 500
+"""
+
+import argparse
+import http.client
+import json
+import time
+
+from _harness import SimpleServerProcess, summarize
+
+
+def burst(port, paths, count, keep_alive):
+    latencies, errors = [], 0
+    conn = None
+    start_all = time.perf_counter()
+    for i in range(count):
+        path = paths[i % len(paths)]
+        start = time.perf_counter()
+        if conn is None:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        headers = {} if keep_alive else {'Connection': 'close'}
+        conn.request('GET', path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            errors += 1
+        if not keep_alive or response.will_close:
+            conn.close()
+            conn = None
+        latencies.append(time.perf_counter() - start)
+    if conn is not None:
+        conn.close()
+    return summarize(latencies, errors, time.perf_counter() - start_all)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--paths', nargs='+', default=['/health', '/categories/', '/products/'])
+    args = parser.parse_args()
+
+    with SimpleServerProcess() as server:
+        burst(server.port, args.paths, 20, keep_alive=True)  # warm-up
+        for keep_alive in (False, True):
+            result = burst(server.port, args.paths, args.requests, keep_alive)
+            result['keep_alive'] = keep_alive
+            result['mean_ms'] = round(1000.0 / result['rps'], 3) if result['rps'] else None
+            print(json.dumps(result), flush=True)
+
+
+if __name__ == '__main__':
+    main()
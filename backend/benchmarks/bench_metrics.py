@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Cost of the request instrumentation behind /metrics.
+
+In-process microbenchmarks (microseconds per operation):
+
+  observe         recording one request in the registry (lock, status counter, 3 histograms)
+  timing          start_request_timing() + elapsed(), done once per request
+  cursor_raw      sqlite3 execute + fetchone of a point lookup, no instrumentation
+  cursor_timed    the same through simple_server's TimedCursor (per-statement DB time)
+  render          producing the /metrics body for the given number of routes
+
+Then end to end: sequential keep-alive bursts against simple_server with METRICS_ENABLED
+on and off, alternating rounds so drift affects both; reports the best mean per request.
+On a shared machine the end-to-end difference is within run-to-run noise, so the
+microbenchmarks are the precise figure.
+
+Usage: python benchmarks/bench_metrics.py --requests 2000 --rounds 3
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import timeit
+
+from _harness import BACKEND_DIR, SimpleServerProcess
+
+sys.path.insert(0, BACKEND_DIR)
+from app.utils.metrics import RequestMetrics, start_request_timing  # noqa: E402
+
+
+def per_op_us(fn):
+    runs, _ = timeit.Timer(fn).autorange()
+    best = min(timeit.repeat(fn, number=runs, repeat=5)) / runs
+    return round(best * 1e6, 3)
+
+
+def micro(routes):
+    registry = RequestMetrics()
+    paths = [f'/route/{i}' for i in range(routes)]
+    for path in paths:
+        registry.observe('GET', path, 200, 0.004, 0.001, 1500)
+    state = {'i': 0}
+
+    def observe():
+        state['i'] += 1
+        registry.observe('GET', paths[state['i'] % routes], 200, 0.004, 0.001, 1500)
+
+    def timing():
+        start_request_timing().elapsed()
+
+    os.chdir(tempfile.mkdtemp(prefix='farmer-bench-'))
+    import simple_server
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO t (name) VALUES (?)", [(f'row {i}',) for i in range(1000)])
+    raw = conn.cursor()
+    timed = simple_server.TimedCursor(conn.cursor(), start_request_timing(), conn)
+    query = "SELECT id, name FROM t WHERE id = ?"
+
+    results = {
+        'observe': per_op_us(observe),
+        'timing': per_op_us(timing),
+        'cursor_raw': per_op_us(lambda: raw.execute(query, (500,)).fetchone()),
+        'cursor_timed': per_op_us(lambda: timed.execute(query, (500,)).fetchone()),
+        'render': per_op_us(registry.render),
+    }
+    for name, us in results.items():
+        print(json.dumps({'bench': name, 'routes': routes, 'us_per_op': us}), flush=True)
+    print(json.dumps({
+        'bench': 'cursor_overhead', 'us_per_statement': round(results['cursor_timed'] - results['cursor_raw'], 3),
+    }), flush=True)
+
+
+def burst(port, paths, count):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    start = time.perf_counter()
+    for i in range(count):
+        conn.request('GET', paths[i % len(paths)])
+        response = conn.getresponse()
+        response.read()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed / count
+
+
+def end_to_end(args):
+    servers = {}
+    try:
+        for enabled in ('false', 'true'):
+            servers[enabled] = SimpleServerProcess(env={'METRICS_ENABLED': enabled, 'SERVER_MODE': 'single'})
+            servers[enabled].__enter__()
+            burst(servers[enabled].port, args.paths, 200)  # warm-up
+        means = {'false': [], 'true': []}
+        for _ in range(args.rounds):
+            for enabled, server in servers.items():
+                means[enabled].append(burst(server.port, args.paths, args.requests))
+    finally:
+        for server in servers.values():
+            server.__exit__(None, None, None)
+
+    best = {enabled: min(values) for enabled, values in means.items()}
+    for enabled, mean in best.items():
+        print(json.dumps({
+            'bench': 'end_to_end', 'metrics_enabled': enabled == 'true', 'requests': args.requests,
+            'paths': args.paths, 'mean_us': round(mean * 1e6, 1),
+        }), flush=True)
+    print(json.dumps({
+        'bench': 'end_to_end_overhead', 'us_per_request': round((best['true'] - best['false']) * 1e6, 1),
+    }), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--routes', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--paths', nargs='+', default=['/categories/', '/products/'])
+    parser.add_argument('--skip-server', action='store_true', help='only run the in-process benchmarks')
+    args = parser.parse_args()
+
+    micro(args.routes)
+    if not args.skip_server:
+        end_to_end(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Regression benchmark: GET /orders must issue a constant number of queries.
+
+Runs simple_server in-process against a scratch SQLite database, seeds a
+farmer with N orders (3 items each), and counts the SELECT statements each
+GET /orders request executes. Exits non-zero if the count grows with N.
+
+Usage: python benchmarks/bench_order_queries.py --orders 10 100 1000 2000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from _harness import BACKEND_DIR
+
+
+def load_server(workdir):
+    os.chdir(workdir)
+    os.environ.pop('DATABASE_URL', None)
+    sys.path.insert(0, BACKEND_DIR)
+    import simple_server
+    simple_server.seed_sample_data()
+    simple_server.prepare_schema(verbose=False)
+    return simple_server
+
+
+def seed_orders(db_file, farmer_id, customer_id, count):
+    conn = sqlite3.connect(db_file)
+    conn.execute("DELETE FROM order_items")
+    conn.execute("DELETE FROM orders")
+    orders = [
+        (i + 1, customer_id, farmer_id, 'pending' if i % 3 else 'delivered', 14.97, 'Farm Road 1',
+         f'2026-01-01 00:{(i // 60) % 60:02d}:{i % 60:02d}')
+        for i in range(count)
+    ]
+    conn.executemany(
+        "INSERT INTO orders (id, customer_id, farmer_id, status, total_amount, delivery_address, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)", orders
+    )
+    items = [(order[0], product_id, 1, 4.99, 4.99) for order in orders for product_id in (1, 2, 3)]
+    conn.executemany(
+        "INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price) VALUES (?, ?, ?, ?, ?)",
+        items
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, nargs='+', default=[10, 100, 1000, 2000])
+    parser.add_argument('--limit', type=int, default=None, help='also page with ?limit=')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='farmer-bench-')
+    server = load_server(workdir)
+    db_file = os.path.join(workdir, server.DB_FILE)
+
+    statements = []
+    original_connect = server.SQLiteConnectionPool._connect
+
+    def traced_connect(pool):
+        raw = original_connect(pool)
+        raw.set_trace_callback(statements.append)
+        return raw
+
+    server.SQLiteConnectionPool._connect = traced_connect
+
+    # Log in as the sample farmer through the normal handler
+    token = server.secrets.token_urlsafe(32)
+    server.token_store.set(token, {'id': 1, 'role': 'farmer', 'email': 'farmer@example.com'})
+
+    httpd = server.create_server(('127.0.0.1', 0), mode='single')
+    port = httpd.server_address[1]
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    path = '/orders' + (f'?limit={args.limit}' if args.limit else '')
+    counts = []
+    for count in args.orders:
+        seed_orders(db_file, farmer_id=1, customer_id=1, count=count)
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        del statements[:]
+        start = time.perf_counter()
+        conn.request('GET', path, headers={'Authorization': f'Bearer {token}'})
+        response = conn.getresponse()
+        body = json.loads(response.read())
+        elapsed = time.perf_counter() - start
+        conn.close()
+        selects = [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+        counts.append(len(selects))
+        print(json.dumps({
+            'orders': count,
+            'returned': len(body),
+            'items': sum(len(o['items']) for o in body),
+            'select_queries': len(selects),
+            'latency_ms': round(elapsed * 1000, 2),
+        }), flush=True)
+
+    httpd.server_close()
+    if len(set(counts)) != 1:
+        print(f"❌ Query count grows with the number of orders: {counts}")
+        sys.exit(1)
+    print(f"✅ Constant query count: {counts[0]} per request")
+
+
+if __name__ == '__main__':
+    main()
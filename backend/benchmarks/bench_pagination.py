@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Latency of product listing pages by depth: keyset cursors vs. the old offset.
+
+Generates a catalog for each schema (generate_data.py), then for every sort requests page 1
+and each deeper page (default 10,000 at 20 per page) repeatedly and reports latency
+percentiles. The cursor for page N is built from the last row of page N - 1, exactly what
+X-Next-Cursor would have returned after walking there; the script checks that it yields
+the same rows as the deprecated ``skip`` offset on the FastAPI app, and reports that offset
+for contrast. simple_server runs as a subprocess; the FastAPI app runs in-process through
+TestClient (so uvicorn is not needed).
+
+With keyset pagination ``ratio`` (p50 of page N over p50 of page 1) stays close to 1.
+
+Usage: python benchmarks/bench_pagination.py --products 250000 --pages 1 100 10000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from _harness import BACKEND_DIR, SimpleServerProcess, summarize
+
+GENERATE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate_data.py')
+
+sys.path.insert(0, BACKEND_DIR)
+from app.utils.pagination import PRODUCT_SORTS, encode_cursor  # noqa: E402
+
+
+def generate(url, schema, args):
+    env = {k: v for k, v in os.environ.items() if not k.startswith(('SLOW_QUERY', 'DATABASE_URL'))}
+    subprocess.run([
+        sys.executable, GENERATE_DATA, url, '--schema', schema, '--users', str(args.users),
+        '--products', str(args.products), '--orders', '0', '--seed', str(args.seed),
+    ], env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def page_cursor(path, sort, page, limit):
+    """The X-Next-Cursor of page ``page - 1``, read straight from the database."""
+    if page == 1:
+        return None
+    import sqlite3
+    column, descending = PRODUCT_SORTS[sort]
+    direction = 'DESC' if descending else 'ASC'
+    where = "is_active = 1 AND quantity_available > 0"
+    if column == 'harvest_date':
+        where += " AND harvest_date IS NOT NULL"
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute(
+            f"SELECT {column}, id FROM products WHERE {where} ORDER BY {column} {direction}, id {direction} "
+            f"LIMIT 1 OFFSET ?", ((page - 1) * limit - 1,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        raise SystemExit(f"the catalog has fewer than {page - 1} pages for {sort}; raise --products")
+    return encode_cursor(sort, *row)
+
+
+def measure(send, path, requests):
+    """Latency report for ``requests`` sequential calls, plus the ids the page returned."""
+    status, ids = send(path)  # warm-up
+    if status != 200:
+        raise SystemExit(f"GET {path} answered {status}")
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        begin = time.perf_counter()
+        send(path)
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, 0, time.perf_counter() - start), ids
+
+
+def report(target, sort, page, method, stats, first):
+    print(json.dumps({
+        'bench': 'pagination', 'target': target, 'sort': sort, 'page': page, 'method': method,
+        'p50_ms': stats['p50_ms'], 'p90_ms': stats['p90_ms'], 'p99_ms': stats['p99_ms'],
+        'ratio': round(stats['p50_ms'] / first, 2) if first else None,
+    }), flush=True)
+
+
+def run_target(target, send, db_path, args, offset=False):
+    for sort in args.sorts:
+        first = None
+        for page in args.pages:
+            cursor = page_cursor(db_path, sort, page, args.limit)
+            path = f'/products/?limit={args.limit}&sort={sort}' + (f'&cursor={cursor}' if cursor else '')
+            stats, ids = measure(send, path, args.requests)
+            first = first or stats['p50_ms']
+            report(target, sort, page, 'cursor', stats, first)
+            if offset and page > 1:
+                skip_path = f'/products/?limit={args.limit}&sort={sort}&skip={(page - 1) * args.limit}'
+                skip_stats, skip_ids = measure(send, skip_path, args.requests)
+                if skip_ids != ids:
+                    raise SystemExit(f"{target} {sort} page {page}: cursor and offset pages differ")
+                report(target, sort, page, 'offset', skip_stats, first)
+
+
+def simple_server_target(workdir, args):
+    with SimpleServerProcess(workdir=workdir, seed=False, env={'SERVER_MODE': 'single'}) as server:
+        conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=60)
+
+        def send(path):
+            conn.request('GET', path)
+            response = conn.getresponse()
+            body = response.read()
+            return response.status, [product['id'] for product in json.loads(body)]
+
+        try:
+            run_target('simple_server', send, os.path.join(workdir, 'farmer_marketplace.db'), args)
+        finally:
+            conn.close()
+
+
+def fastapi_target(db_path, args):
+    # The app reads DATABASE_URL at import
+    os.environ.update({'DATABASE_URL': 'sqlite:///' + db_path, 'DEBUG': 'false'})
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+
+    def send(path):
+        response = client.get(path)
+        return response.status_code, [product['id'] for product in response.json()]
+
+    run_target('fastapi', send, db_path, args, offset=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', nargs='+', choices=('simple_server', 'fastapi'),
+                        default=['simple_server', 'fastapi'])
+    parser.add_argument('--sorts', nargs='+', choices=sorted(PRODUCT_SORTS), default=list(PRODUCT_SORTS))
+    parser.add_argument('--pages', nargs='+', type=int, default=[1, 10000])
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--products', type=int, default=250000,
+                        help='about 85%% are listed (active and in stock); enough for the deepest page')
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=50, help='timed requests per page')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    if 1 not in args.pages:
+        args.pages.insert(0, 1)
+    args.pages.sort()
+
+    workdir = tempfile.mkdtemp(prefix='farmer-bench-')
+    try:
+        if 'simple_server' in args.targets:
+            os.makedirs(os.path.join(workdir, 'simple'))
+            generate('sqlite:///' + os.path.join(workdir, 'simple', 'farmer_marketplace.db'), 'simple', args)
+            simple_server_target(os.path.join(workdir, 'simple'), args)
+        if 'fastapi' in args.targets:
+            db_path = os.path.join(workdir, 'models.db')
+            generate('sqlite:///' + db_path, 'models', args)
+            fastapi_target(db_path, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
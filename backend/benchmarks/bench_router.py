@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Compare route-table dispatch with the if/elif chain APIHandler used to have.
+
+Registers N synthetic resources (each with a static collection path and a typed
+``/{id:int}`` item path, several methods apiece) in app.utils.router.Router, and
+generates the equivalent if/elif chain of string comparisons and startswith()
+checks. Both are timed on the first route, the last routes and a miss.
+
+Usage: python benchmarks/bench_router.py --routes 10 100 300
+"""
+
+import argparse
+import json
+import sys
+import timeit
+
+from _harness import BACKEND_DIR
+
+sys.path.insert(0, BACKEND_DIR)
+from app.utils.router import MethodNotAllowed, RouteNotFound, Router  # noqa: E402
+
+
+def handler(**params):
+    return params
+
+
+def build_router(resources):
+    router = Router()
+    for i in range(resources):
+        router.add('GET', f'/resource{i}/', handler)
+        router.add('POST', f'/resource{i}/', handler, auth=True)
+        router.add('GET', f'/resource{i}/{{item_id:int}}', handler)
+        router.add('PUT', f'/resource{i}/{{item_id:int}}', handler, roles=('farmer',))
+        router.add('DELETE', f'/resource{i}/{{item_id:int}}', handler, auth=True)
+    return router
+
+
+def build_chain(resources):
+    """Generate dispatch(method, path) in the style of the old do_GET/do_PUT chains."""
+    lines = ['def dispatch(method, path):', '    path = path.split("?", 1)[0]']
+    for method in ('GET', 'POST', 'PUT', 'DELETE'):
+        lines.append(f'    if method == {method!r}:')
+        keyword = 'if'
+        for i in range(resources):
+            if method in ('GET', 'POST'):
+                lines.append(f'        {keyword} path == "/resource{i}/":')
+                lines.append('            return handler()')
+                keyword = 'elif'
+            if method in ('GET', 'PUT', 'DELETE'):
+                lines.append(f'        {keyword} path.startswith("/resource{i}/"):')
+                lines.append('            return handler(item_id=int(path.split("/")[2]))')
+                keyword = 'elif'
+        lines.append('        raise LookupError(path)')
+    lines.append('    raise LookupError(path)')
+    namespace = {'handler': handler}
+    exec('\n'.join(lines), namespace)
+    return namespace['dispatch']
+
+
+def router_dispatch(router):
+    def dispatch(method, path):
+        route, params = router.resolve(method, path.split('?', 1)[0])
+        return route.handler(**params)
+    return dispatch
+
+
+def time_call(dispatch, method, path, number):
+    def call():
+        try:
+            dispatch(method, path)
+        except (LookupError, MethodNotAllowed, RouteNotFound):
+            pass
+    best = min(timeit.repeat(call, number=number, repeat=5))
+    return round(best / number * 1e9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--routes', type=int, nargs='+', default=[10, 100, 300],
+                        help='synthetic resources to register (5 routes each)')
+    parser.add_argument('--number', type=int, default=20000, help='calls per timing run')
+    args = parser.parse_args()
+
+    for resources in args.routes:
+        router = build_router(resources)
+        dispatchers = {'route_table': router_dispatch(router), 'if_elif_chain': build_chain(resources)}
+        last = resources - 1
+        cases = {
+            'first_static': ('GET', '/resource0/'),
+            'last_static': ('POST', f'/resource{last}/'),
+            'last_param': ('DELETE', f'/resource{last}/42?fields=all'),
+            'miss': ('GET', '/does-not-exist'),
+        }
+        for name, dispatch in dispatchers.items():
+            result = {'dispatcher': name, 'routes': len(router.routes)}
+            for case, (method, path) in cases.items():
+                result[f'{case}_ns'] = time_call(dispatch, method, path, args.number)
+            print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Latency of full-text product search at catalog scale (default 1M products).
+
+Generates a catalog for each schema (generate_data.py), which builds the FTS5 index, then
+runs a fixed set of searches through ``GET /products/?search=`` with 20 results per page:
+
+  broad       a word in every description ("farm"): the SEARCH_MAX_MATCHES cap, worst case
+  word        a product name shared by about 1% of the catalog
+  prefix      a partial word, as typed
+  two_words   two words, the last one a prefix
+  filtered    a search combined with category and organic filters
+  sorted      a search ordered by price instead of relevance
+  no_match    a word that is not in the index
+
+simple_server runs as a subprocess; the FastAPI app runs in-process through TestClient (so
+uvicorn is not needed). Each server is first checked to find the matches of a filtered
+broad search that are older than the newest SEARCH_MAX_MATCHES, in its results and in
+its facet counts. For contrast, ``like_scan`` times the statement the FastAPI app used
+before, ``name LIKE '%word%'``, directly against the same SQLite file.
+
+Usage: python benchmarks/bench_search.py --products 1000000 --requests 30
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from _harness import BACKEND_DIR, SimpleServerProcess, summarize
+
+GENERATE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate_data.py')
+
+sys.path.insert(0, BACKEND_DIR)
+from app.utils.search import SEARCH_MAX_MATCHES, search_expression  # noqa: E402
+
+# name -> query parameters (besides limit)
+SEARCHES = {
+    'broad': {'search': 'farm'},
+    'word': {'search': 'tomatoes'},
+    'prefix': {'search': 'cauli'},
+    'two_words': {'search': 'organic straw'},
+    'filtered': {'search': 'honey', 'category_id': 8, 'is_organic': 'true'},
+    'sorted': {'search': 'cheese', 'sort': 'price_asc'},
+    'no_match': {'search': 'durian'},
+}
+
+LIKE_SCAN = ("SELECT * FROM products WHERE is_active = 1 AND quantity_available > 0 "
+             "AND name LIKE '%' || ? || '%' LIMIT ?")
+
+
+def generate(url, schema, args):
+    env = {k: v for k, v in os.environ.items() if not k.startswith(('SLOW_QUERY', 'DATABASE_URL'))}
+    subprocess.run([
+        sys.executable, GENERATE_DATA, url, '--schema', schema, '--users', str(args.users),
+        '--products', str(args.products), '--orders', '0', '--seed', str(args.seed),
+    ], env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def measure(call, requests):
+    """Latency report for ``requests`` sequential calls, plus the size of the last result."""
+    results = call()  # warm-up
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        begin = time.perf_counter()
+        results = call()
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, 0, time.perf_counter() - start), results
+
+
+def report(target, name, stats, results):
+    print(json.dumps({
+        'bench': 'search', 'target': target, 'search': name, 'results': results,
+        'p50_ms': stats['p50_ms'], 'p90_ms': stats['p90_ms'], 'p99_ms': stats['p99_ms'],
+    }), flush=True)
+
+
+def filtered_search_case(db_path):
+    """(farmer id, its listed 'farm' matches, oldest id among the newest SEARCH_MAX_MATCHES matches)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        expression = search_expression(['farm'], 'sqlite')
+        newest = conn.execute("SELECT rowid FROM products_fts WHERE products_fts MATCH ? "
+                              "ORDER BY rowid DESC LIMIT 1 OFFSET ?", (expression, SEARCH_MAX_MATCHES - 1)).fetchone()
+        if newest is None:
+            raise SystemExit(f"the filtered search check needs more than {SEARCH_MAX_MATCHES} products")
+        farmer_id = conn.execute("SELECT farmer_id FROM products WHERE is_active = 1 AND quantity_available > 0 "
+                                 "ORDER BY id LIMIT 1").fetchone()[0]
+        expected = [row[0] for row in conn.execute(
+            "SELECT id FROM products WHERE farmer_id = ? AND is_active = 1 AND quantity_available > 0 "
+            "AND id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)", (farmer_id, expression))]
+    finally:
+        conn.close()
+    return farmer_id, expected, newest[0]
+
+
+def check_filtered_search(target, get, db_path):
+    """Fail unless a farmer-filtered broad search lists and counts matches older than the cap."""
+    farmer_id, expected, newest = filtered_search_case(db_path)
+    limit = 100
+    status, products = get('/products/?' + urlencode({'search': 'farm', 'farmer_id': farmer_id, 'limit': limit}))
+    ids = [product['id'] for product in products] if status == 200 else []
+    if len(ids) != min(len(expected), limit) or not any(product_id < newest for product_id in ids):
+        raise SystemExit(f"{target}: filtered search listed {len(ids)} of {len(expected)} matches, "
+                         f"{sum(product_id < newest for product_id in ids)} older than the newest {SEARCH_MAX_MATCHES}")
+    status, facets = get('/products/facets?' + urlencode({'search': 'farm', 'farmer_id': farmer_id}))
+    if status != 200 or facets['total'] != len(expected):
+        raise SystemExit(f"{target}: filtered search facets counted {facets.get('total')} of {len(expected)} matches")
+    print(json.dumps({'bench': 'search', 'target': target, 'check': 'filtered_search',
+                      'matches': len(expected), 'listed': len(ids)}), flush=True)
+
+
+def run_target(target, get, db_path, args):
+    check_filtered_search(target, get, db_path)
+    for name, params in SEARCHES.items():
+        path = '/products/?' + urlencode(dict(params, limit=args.limit))
+
+        def call():
+            status, products = get(path)
+            if status != 200:
+                raise SystemExit(f"{target}: GET {path} answered {status}")
+            return len(products)
+
+        stats, results = measure(call, args.requests)
+        report(target, name, stats, results)
+
+
+def simple_server_target(workdir, args):
+    with SimpleServerProcess(workdir=workdir, seed=False, env={'SERVER_MODE': 'single'}) as server:
+        conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=120)
+
+        def get(path):
+            conn.request('GET', path)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+
+        try:
+            run_target('simple_server', get, os.path.join(workdir, 'farmer_marketplace.db'), args)
+        finally:
+            conn.close()
+
+
+def fastapi_target(db_path, args):
+    # The app reads DATABASE_URL at import
+    os.environ.update({'DATABASE_URL': 'sqlite:///' + db_path, 'DEBUG': 'false'})
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+
+    def get(path):
+        response = client.get(path)
+        return response.status_code, response.json()
+
+    run_target('fastapi', get, db_path, args)
+
+
+def like_scan_target(db_path, args):
+    conn = sqlite3.connect(db_path)
+    try:
+        for name, params in SEARCHES.items():
+            word = params['search'].split()[-1]
+            stats, results = measure(lambda: len(conn.execute(LIKE_SCAN, (word, args.limit)).fetchall()),
+                                     args.requests)
+            report('like_scan', name, stats, results)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', nargs='+', choices=('simple_server', 'fastapi', 'like_scan'),
+                        default=['simple_server', 'fastapi', 'like_scan'])
+    parser.add_argument('--products', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=30, help='timed requests per search')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='farmer-bench-')
+    try:
+        if 'simple_server' in args.targets:
+            os.makedirs(os.path.join(workdir, 'simple'))
+            generate('sqlite:///' + os.path.join(workdir, 'simple', 'farmer_marketplace.db'), 'simple', args)
+            simple_server_target(os.path.join(workdir, 'simple'), args)
+            shutil.rmtree(os.path.join(workdir, 'simple'))
+        if {'fastapi', 'like_scan'} & set(args.targets):
+            db_path = os.path.join(workdir, 'models.db')
+            generate('sqlite:///' + db_path, 'models', args)
+            if 'fastapi' in args.targets:
+                fastapi_target(db_path, args)
+            if 'like_scan' in args.targets:
+                like_scan_target(db_path, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
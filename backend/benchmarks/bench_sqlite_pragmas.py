@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Mixed read/write load against SQLite with the stock settings and the tuning profile.
+
+Starts simple_server twice on fresh scratch databases, once with SQLITE_TUNING=false
+(rollback journal, synchronous=FULL, no mmap, small cache) and once with the profile
+(WAL, synchronous=NORMAL, busy_timeout, mmap, 64 MiB cache, in-memory temp store).
+Client processes mix catalog and order-history reads with checkouts; the report
+separates read and write latency and counts errors such as "database is locked".
+
+Usage: python benchmarks/bench_sqlite_pragmas.py --clients 16 --duration 15 --write-ratio 0.2
+"""
+
+import argparse
+import http.client
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from _harness import SimpleServerProcess, summarize
+
+READ_PATHS = ('/products/', '/categories/', '/orders?limit=20')
+
+
+def call(port, method, path, body=None, token=None, conn=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn = conn or http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    payload = response.read()
+    return response.status, payload
+
+
+def login(port, email, password):
+    status, payload = call(port, 'POST', '/auth/login', {'email': email, 'password': password})
+    return json.loads(payload)['access_token']
+
+
+def client(port, token, duration, write_ratio, seed):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    results = {'read': ([], 0), 'write': ([], 0)}
+    locked = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        kind = 'write' if rng.random() < write_ratio else 'read'
+        if kind == 'write':
+            items = [{'product_id': pid, 'quantity': 1} for pid in rng.sample(range(1, 11), 2)]
+            args = ('POST', '/orders', {'delivery_address': 'Bench Road 1', 'items': items})
+        else:
+            args = ('GET', rng.choice(READ_PATHS), None)
+        start = time.perf_counter()
+        try:
+            status, payload = call(port, *args, token=token, conn=conn)
+            failed = status >= 400
+            locked += b'locked' in payload if failed else 0
+        except (OSError, http.client.HTTPException):
+            failed = True
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        latencies, errors = results[kind]
+        latencies.append(time.perf_counter() - start)
+        results[kind] = (latencies, errors + failed)
+    conn.close()
+    return results, locked
+
+
+def run(profile, args):
+    env = {
+        'SQLITE_TUNING': 'true' if profile == 'tuned' else 'false',
+        'SERVER_MODE': args.mode,
+        'WEB_THREADS': str(args.workers),
+        'WEB_CONCURRENCY': str(args.workers),
+    }
+    with SimpleServerProcess(env=env) as server:
+        port = server.port
+        farmer = login(port, 'farmer@example.com', 'password123')
+        for product_id in range(1, 11):
+            call(port, 'PUT', f'/products/{product_id}', {'quantity_available': 10 ** 7}, farmer)
+        tokens = []
+        for i in range(args.clients):
+            email = f'mixed{i}@example.com'
+            call(port, 'POST', '/auth/register', {
+                'email': email, 'password': 'pw', 'role': 'customer', 'first_name': 'Mixed', 'last_name': str(i),
+            })
+            tokens.append(login(port, email, 'pw'))
+
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            futures = [
+                pool.submit(client, port, tokens[i], args.duration, args.write_ratio, args.seed + i)
+                for i in range(args.clients)
+            ]
+            merged = {'read': ([], 0), 'write': ([], 0)}
+            locked = 0
+            for future in futures:
+                results, client_locked = future.result()
+                locked += client_locked
+                for kind, (latencies, errors) in results.items():
+                    merged[kind][0].extend(latencies)
+                    merged[kind] = (merged[kind][0], merged[kind][1] + errors)
+
+    for kind, (latencies, errors) in merged.items():
+        print(json.dumps({
+            'profile': profile, 'mode': args.mode, 'workers': args.workers, 'clients': args.clients,
+            'kind': kind, **summarize(latencies, errors, args.duration),
+            **({'database_locked': locked} if kind == 'write' else {}),
+        }), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--mode', default='prefork', choices=('single', 'threaded', 'prefork'))
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--profiles', nargs='+', default=['stock', 'tuned'], choices=('stock', 'tuned'))
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    for profile in args.profiles:
+        run(profile, args)
+
+
+if __name__ == '__main__':
+    main()
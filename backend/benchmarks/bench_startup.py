@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Time from exec of simple_server.py to its first 200 responses.
+
+Each run starts the server with Popen and polls every couple of milliseconds, recording
+when GET /health first answers 200 (port bound, process serving) and when GET /products/
+first answers 200 (background schema check finished). "cold" runs start on an empty
+scratch directory, so every migration is applied; "warm" runs reuse a seeded database,
+so the schema check is a version lookup.
+
+Usage: python benchmarks/bench_startup.py --runs 10 --mode threaded
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from _harness import SIMPLE_SERVER, free_port, percentile
+
+
+def first_200(port, path, proc, deadline):
+    """Poll ``path`` until it answers 200; return the perf_counter timestamp."""
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status == 200:
+                return time.perf_counter()
+        except OSError:
+            pass
+        time.sleep(0.002)
+    raise RuntimeError(f"no 200 from {path} on port {port}")
+
+
+def boot(workdir, mode, workers):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), SERVER_MODE=mode, WEB_THREADS=str(workers),
+               WEB_CONCURRENCY=str(workers))
+    env.pop('DATABASE_URL', None)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, SIMPLE_SERVER], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + 30
+        health = first_200(port, '/health', proc, deadline)
+        ready = first_200(port, '/products/', proc, deadline)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return (health - start) * 1000, (ready - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--mode', default='threaded', choices=('single', 'threaded', 'prefork'))
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    results = {'cold': ([], []), 'warm': ([], [])}
+    warm_dir = tempfile.mkdtemp(prefix='farmer-bench-')
+    subprocess.run([sys.executable, SIMPLE_SERVER, 'seed'], cwd=warm_dir, check=True,
+                   stdout=subprocess.DEVNULL, env={k: v for k, v in os.environ.items() if k != 'DATABASE_URL'})
+    try:
+        for _ in range(args.runs):
+            cold_dir = tempfile.mkdtemp(prefix='farmer-bench-')
+            try:
+                for kind, workdir in (('cold', cold_dir), ('warm', warm_dir)):
+                    health_ms, ready_ms = boot(workdir, args.mode, args.workers)
+                    results[kind][0].append(health_ms)
+                    results[kind][1].append(ready_ms)
+            finally:
+                shutil.rmtree(cold_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(warm_dir, ignore_errors=True)
+
+    for kind, (health, ready) in results.items():
+        print(json.dumps({
+            'boot': kind, 'mode': args.mode, 'runs': args.runs,
+            'health_p50_ms': round(percentile(health, 50), 1),
+            'health_max_ms': round(max(health), 1),
+            'ready_p50_ms': round(percentile(ready, 50), 1),
+            'ready_max_ms': round(max(ready), 1),
+        }), flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Peak memory of GET /products/ with streaming vs. the old fetchall()/json.dumps path.
+
+Runs simple_server in-process against a scratch SQLite database seeded with N active
+products. For each size it records the tracemalloc peak while the server streams the
+response (client reads it in 64 KiB pieces and hashes it), then the peak of building the
+same body the buffered way: fetchall(), a list of dicts and one dumps() of the whole list.
+The two bodies must be byte-identical.
+
+Usage: python benchmarks/bench_stream_memory.py --rows 10000 100000 1000000
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from _harness import BACKEND_DIR
+
+sys.path.insert(0, BACKEND_DIR)
+from app.utils.serialization import dumps  # noqa: E402
+
+
+def load_server(workdir):
+    os.chdir(workdir)
+    os.environ.pop('DATABASE_URL', None)
+    import simple_server
+    simple_server.seed_sample_data()
+    simple_server.prepare_schema(verbose=False)
+    return simple_server
+
+
+def seed_products(db_file, count):
+    conn = sqlite3.connect(db_file)
+    conn.execute("DELETE FROM products")
+    rows = (
+        (1, i % 6 + 1, f"Product {i}", f"Seeded product number {i}, grown with care on the farm.",
+         round(1 + (i % 500) / 10, 2), 'lb', i % 90 + 1, i % 2)
+        for i in range(count)
+    )
+    conn.executemany(
+        "INSERT INTO products (farmer_id, category_id, name, description, price_per_unit, unit_type, "
+        "quantity_available, is_organic) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+    )
+    conn.commit()
+    conn.close()
+
+
+def buffered_body(db_file):
+    """The pre-streaming implementation of GET /products/ (same encoder)."""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT p.id, p.name, p.description, p.price_per_unit, p.unit_type,
+               p.quantity_available, p.is_organic, c.name as category_name
+        FROM products p
+        JOIN categories c ON p.category_id = c.id
+        WHERE p.is_active = 1 AND p.quantity_available > 0
+    ''')
+    products = []
+    for row in cursor.fetchall():
+        products.append({
+            "id": row[0], "name": row[1], "description": row[2], "price_per_unit": row[3],
+            "unit_type": row[4], "quantity_available": row[5], "is_organic": bool(row[6]),
+            "category": {"name": row[7]}, "is_active": True, "is_available": True
+        })
+    conn.close()
+    return dumps(products)
+
+
+def measure(fn):
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - base
+    return result, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--skip-buffered', action='store_true', help='only measure the streaming path')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='farmer-bench-')
+    server = load_server(workdir)
+    db_file = os.path.join(workdir, server.DB_FILE)
+
+    httpd = server.create_server(('127.0.0.1', 0), mode='single')
+    port = httpd.server_address[1]
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    def streamed():
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        conn.request('GET', '/products/')
+        response = conn.getresponse()
+        digest = hashlib.sha256()
+        size = 0
+        while True:
+            piece = response.read(65536)
+            if not piece:
+                break
+            digest.update(piece)
+            size += len(piece)
+        conn.close()
+        return response.getheader('Transfer-Encoding'), size, digest.hexdigest()
+
+    tracemalloc.start()
+    for count in args.rows:
+        seed_products(db_file, count)
+        streamed()  # warm the pooled connection and statement cache
+
+        (transfer_encoding, size, digest), peak, elapsed = measure(streamed)
+        print(json.dumps({
+            'rows': count, 'path': 'streaming', 'transfer_encoding': transfer_encoding,
+            'body_bytes': size, 'peak_kib': round(peak / 1024), 'seconds': round(elapsed, 3),
+        }), flush=True)
+
+        if args.skip_buffered:
+            continue
+        body, peak, elapsed = measure(lambda: buffered_body(db_file))
+        print(json.dumps({
+            'rows': count, 'path': 'buffered', 'body_bytes': len(body),
+            'peak_kib': round(peak / 1024), 'seconds': round(elapsed, 3),
+            'identical': hashlib.sha256(body).hexdigest() == digest,
+        }), flush=True)
+        del body
+    tracemalloc.stop()
+    httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Latency and memory of the search-as-you-type suggestion index.
+
+Generates a catalog for each schema (generate_data.py), then:
+
+  index          loads the prefix index straight from the SQLAlchemy schema's SQLite file
+                 (product, category and farm names) and reports the load time, its size
+                 and memory footprint, the lookup latency of each prefix in microseconds,
+                 and the cost of the incremental updates a product write makes
+  simple_server  times ``GET /products/suggest?q=`` per prefix over HTTP (a subprocess)
+  fastapi        the same through TestClient, in-process (so uvicorn is not needed)
+
+The first request of each server loads the index; it is reported as ``load`` and left out
+of the timed requests.
+
+Usage: python benchmarks/bench_suggest.py --products 250000 --lookups 20000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from _harness import BACKEND_DIR, SimpleServerProcess, summarize
+
+GENERATE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate_data.py')
+
+sys.path.insert(0, BACKEND_DIR)
+from app.utils.suggest import PRODUCT, SUGGEST_SOURCES_SQL, PrefixIndex, rows_to_counts  # noqa: E402
+
+# Typed prefixes: one letter, a word start, two words, a farm, a category and a miss
+PREFIXES = ['t', 'tom', 'organic to', 'willow', 'veg', 'durian']
+
+
+def generate(url, schema, args):
+    env = {k: v for k, v in os.environ.items() if not k.startswith(('SLOW_QUERY', 'DATABASE_URL'))}
+    subprocess.run([
+        sys.executable, GENERATE_DATA, url, '--schema', schema, '--users', str(args.users),
+        '--products', str(args.products), '--orders', '0', '--seed', str(args.seed),
+    ], env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def timed(call, repeat):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - begin)
+    return latencies, time.perf_counter() - start
+
+
+def micros(latencies):
+    latencies = sorted(latencies)
+    return {f'p{p}_us': round(latencies[min(len(latencies) - 1, len(latencies) * p // 100)] * 1e6, 2)
+            for p in (50, 90, 99)}
+
+
+def index_target(db_path, args):
+    conn = sqlite3.connect(db_path)
+    try:
+        started = time.perf_counter()
+        counts = {}
+        for kind, statement in SUGGEST_SOURCES_SQL.items():
+            counts.update(rows_to_counts(kind, conn.execute(statement).fetchall()))
+        queried = time.perf_counter()
+    finally:
+        conn.close()
+    index = PrefixIndex()
+    index.set_counts(counts)
+    built = time.perf_counter()
+    print(json.dumps(dict(
+        {'bench': 'suggest', 'target': 'index', 'step': 'load', 'query_ms': round((queried - started) * 1000, 1),
+         'build_ms': round((built - queried) * 1000, 1)},
+        **index.stats(),
+    )), flush=True)
+
+    for prefix in PREFIXES:
+        results = len(index.complete(prefix))
+        latencies, _ = timed(lambda: index.complete(prefix), args.lookups)
+        print(json.dumps(dict({'bench': 'suggest', 'target': 'index', 'prefix': prefix, 'results': results},
+                              **micros(latencies))), flush=True)
+
+    # What a product write costs: a new name appears, is renamed, then leaves
+    names = iter(range(args.lookups * 3))
+    for step, call in (
+        ('add_new_name', lambda: index.add(PRODUCT, f'Benchmark Turnips {next(names)}')),
+        ('add_existing_name', lambda: index.add(PRODUCT, 'Organic Tomatoes')),
+        ('discard_existing_name', lambda: index.discard(PRODUCT, 'Organic Tomatoes')),
+    ):
+        latencies, _ = timed(call, min(args.lookups, 2000))
+        print(json.dumps(dict({'bench': 'suggest', 'target': 'index', 'step': step}, **micros(latencies))),
+              flush=True)
+
+
+def run_http(target, get, args):
+    started = time.perf_counter()
+    status, _ = get('/products/suggest?q=a')
+    if status != 200:
+        raise SystemExit(f"{target}: GET /products/suggest answered {status}")
+    print(json.dumps({'bench': 'suggest', 'target': target, 'step': 'load',
+                      'first_request_ms': round((time.perf_counter() - started) * 1000, 1)}), flush=True)
+    for prefix in PREFIXES:
+        path = '/products/suggest?' + urlencode({'q': prefix})
+        results = len(get(path)[1])
+        latencies, elapsed = timed(lambda: get(path), args.requests)
+        stats = summarize(latencies, 0, elapsed)
+        print(json.dumps({
+            'bench': 'suggest', 'target': target, 'prefix': prefix, 'results': results,
+            'p50_ms': stats['p50_ms'], 'p90_ms': stats['p90_ms'], 'p99_ms': stats['p99_ms'],
+        }), flush=True)
+    print(json.dumps(dict({'bench': 'suggest', 'target': target, 'step': 'stats'},
+                          **get('/health/suggest')[1])), flush=True)
+
+
+def simple_server_target(workdir, args):
+    with SimpleServerProcess(workdir=workdir, seed=False, env={'SERVER_MODE': 'single'}) as server:
+        conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=60)
+
+        def get(path):
+            conn.request('GET', path)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+
+        try:
+            run_http('simple_server', get, args)
+        finally:
+            conn.close()
+
+
+def fastapi_target(db_path, args):
+    # The app reads DATABASE_URL at import
+    os.environ.update({'DATABASE_URL': 'sqlite:///' + db_path, 'DEBUG': 'false'})
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+
+    def get(path):
+        response = client.get(path)
+        return response.status_code, response.json()
+
+    run_http('fastapi', get, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', nargs='+', choices=('index', 'simple_server', 'fastapi'),
+                        default=['index', 'simple_server', 'fastapi'])
+    parser.add_argument('--products', type=int, default=250000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--lookups', type=int, default=20000, help='timed index lookups per prefix')
+    parser.add_argument('--requests', type=int, default=500, help='timed requests per prefix')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='farmer-bench-')
+    try:
+        if 'simple_server' in args.targets:
+            os.makedirs(os.path.join(workdir, 'simple'))
+            generate('sqlite:///' + os.path.join(workdir, 'simple', 'farmer_marketplace.db'), 'simple', args)
+            simple_server_target(os.path.join(workdir, 'simple'), args)
+            shutil.rmtree(os.path.join(workdir, 'simple'))
+        if {'index', 'fastapi'} & set(args.targets):
+            db_path = os.path.join(workdir, 'models.db')
+            generate('sqlite:///' + db_path, 'models', args)
+            if 'index' in args.targets:
+                index_target(db_path, args)
+            if 'fastapi' in args.targets:
+                fastapi_target(db_path, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
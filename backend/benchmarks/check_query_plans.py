@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""Query-plan regression check for every statement both servers issue.
+
+Generates a dataset for each schema (generate_data.py), then tours every database-backed
+route: simple_server runs as a subprocess, the FastAPI app runs in-process through
+TestClient (so uvicorn is not needed). Both log every statement with its plan through the
+slow-query log (SLOW_QUERY_MS=0, SLOW_QUERY_EXPLAIN=true). The check fails if the tour
+missed a database-backed route. Each statement's plan is compared with the baseline in
+query_plans.json, by fingerprint. A statement fails when it:
+
+  - no longer uses an index it used in the baseline
+  - scans a table in full that the baseline did not
+  - needs a temporary B-tree sort that the baseline did not
+  - has an estimated cost above --cost-factor times the baseline (PostgreSQL only)
+
+New statements and baseline statements the tour no longer issues are reported, but they
+only fail with --strict. After an intended plan change, rerun with --update and commit
+query_plans.json.
+
+Both schemas default to scratch SQLite files. Pass --simple-url / --models-url with scratch
+PostgreSQL databases to check the PostgreSQL plans; the generated rows are added to them.
+
+Usage: python benchmarks/check_query_plans.py [--update] [--strict]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from _harness import SimpleServerProcess
+from app.utils.pagination import PRODUCT_SORTS
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'query_plans.json')
+GENERATE_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate_data.py')
+PASSWORD = 'password123'
+
+# SQLite: "SEARCH p USING INDEX idx_products_farmer_id (farmer_id=?)", "SCAN c USING COVERING INDEX x";
+# PostgreSQL: "Index Scan using ix_products_id on products", "Bitmap Index Scan on ix_orders_customer_id"
+INDEX_USE = re.compile(r"USING (?:COVERING )?INDEX (\w+)|Index (?:Only )?Scan(?: Backward)? using (\w+)"
+                       r"|Bitmap Index Scan on (\w+)")
+# SQLite may reach a row by rowid through an index on the rowid alias ("ix_products_id (id=? AND
+# rowid=?)") or the table itself, depending on its statistics; both are one rowid lookup
+ROWID_USE = re.compile(r"USING (?:INTEGER PRIMARY KEY|ROWID SEARCH)|USING (?:COVERING )?INDEX \w+ \([^)]*\browid=\?")
+FULL_SCAN = re.compile(r"^SCAN (\w+)$|Seq Scan on (\w+)")
+TEMP_SORT = re.compile(r"USE TEMP B-TREE|Sort Method|^\s*(?:->\s*)?(?:Incremental )?Sort\b")
+COST = re.compile(r"cost=[\d.]+\.\.([\d.]+)")
+METRIC_LINE = re.compile(r'^http_requests_total\{method="(\w+)",route="([^"]*)",status="(\d+)"\} (\d+)')
+
+
+def plan_facts(lines):
+    """Indexes used, tables scanned in full, temp sorts and estimated cost of one plan."""
+    indexes, scans, sorts = set(), set(), 0
+    for line in lines:
+        if ROWID_USE.search(line):
+            indexes.add('<rowid>')
+        else:
+            indexes.update(name for match in INDEX_USE.findall(line) for name in match if name)
+        scans.update(name for match in FULL_SCAN.findall(line.strip()) for name in match if name)
+        if TEMP_SORT.search(line):
+            sorts += 1
+    cost = COST.search(lines[0]) if lines else None
+    return {'indexes': sorted(indexes), 'full_scans': sorted(scans), 'temp_sorts': sorts,
+            'cost': float(cost.group(1)) if cost else None}
+
+
+def compare(baseline, current, cost_factor):
+    """Reasons a statement's current plan is worse than its baseline."""
+    problems = []
+    for index in sorted(set(baseline['indexes']) - set(current['indexes'])):
+        problems.append(f"stopped using index {index}")
+    for table in sorted(set(current['full_scans']) - set(baseline['full_scans'])):
+        problems.append(f"new full scan of {table}")
+    if current['temp_sorts'] > baseline['temp_sorts']:
+        problems.append("new temporary sort")
+    if baseline['cost'] and current['cost'] and current['cost'] > baseline['cost'] * cost_factor:
+        problems.append(f"estimated cost {current['cost']:.0f} vs. {baseline['cost']:.0f}")
+    return problems
+
+
+def routes_hit(metrics_text):
+    """(method, route) pairs that answered with a 2xx or 304, from a /metrics body."""
+    hit = set()
+    for line in metrics_text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match and (match.group(3).startswith('2') or match.group(3) == '304'):
+            hit.add((match.group(1), match.group(2)))
+    return hit
+
+
+def dialect_of(url):
+    return 'sqlite' if url.startswith('sqlite') else 'postgresql'
+
+
+def generate(url, schema, args):
+    env = {k: v for k, v in os.environ.items() if not k.startswith(('SLOW_QUERY', 'DATABASE_URL'))}
+    subprocess.run([
+        sys.executable, GENERATE_DATA, url, '--schema', schema, '--users', str(args.users),
+        '--products', str(args.products), '--orders', str(args.orders), '--seed', str(args.seed),
+        '--end-date', '2026-06-30',
+    ], env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def heavy_users(url, farmer_role, orderable="1 = 1"):
+    """The biggest farmer (email, id), the busiest customer's email and an orderable product id."""
+    from generate_data import open_loader
+    loader = open_loader(url)
+    try:
+        farmer_email, farmer_id = loader.query(
+            "SELECT u.email, u.id FROM users u JOIN products p ON p.farmer_id = u.id "
+            "WHERE u.is_active AND u.role = ? GROUP BY u.email, u.id ORDER BY COUNT(*) DESC LIMIT 1", (farmer_role,))[0]
+        customer_email = loader.query(
+            "SELECT u.email FROM users u JOIN orders o ON o.customer_id = u.id "
+            "WHERE u.is_active GROUP BY u.email ORDER BY COUNT(*) DESC LIMIT 1")[0][0]
+        product_id = loader.query(
+            f"SELECT id FROM products WHERE farmer_id = ? AND is_active AND quantity_available >= 10 "
+            f"AND {orderable} LIMIT 1", (farmer_id,))[0][0]
+    finally:
+        loader.conn.close()
+    return farmer_email, farmer_id, customer_email, product_id
+
+
+class Tour:
+    """Calls routes through ``send(method, path, body, headers) -> (status, headers, data)``."""
+
+    def __init__(self, send):
+        self.send = send
+        self.failures = []
+
+    def call(self, method, path, body=None, token=None, headers=None, expect=(200, 201)):
+        headers = dict(headers or {})
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        status, response_headers, data = self.send(method, path, body, headers)
+        if status not in expect:
+            self.failures.append(f"{method} {path} answered {status}: {str(data)[:200]}")
+        return response_headers, data
+
+    def login(self, email):
+        _, data = self.call('POST', '/auth/login', {'email': email, 'password': PASSWORD})
+        return (data or {}).get('access_token')
+
+    def register(self, email, role):
+        self.call('POST', '/auth/register', {'email': email, 'password': PASSWORD, 'role': role,
+                                             'first_name': 'Plan', 'last_name': 'Check'})
+        return self.login(email)
+
+    def run_common(self, farmer_email, customer_email, product_id, category_id):
+        """The journey both servers share; returns the tokens for server-specific steps."""
+        farmer = self.login(farmer_email)
+        customer = self.login(customer_email)
+        new_farmer = self.register('plan-check-farmer@example.com', 'farmer')
+        self.register('plan-check-customer@example.com', 'customer')
+        self.call('GET', '/auth/me', token=customer)
+
+        headers, _ = self.call('GET', '/categories/')
+        self.call('GET', '/categories/', headers={'If-None-Match': headers.get('etag', '')}, expect=(304,))
+        headers, _ = self.call('GET', '/products/')
+        self.call('GET', '/products/', headers={'If-None-Match': headers.get('etag', '')}, expect=(304,))
+        for sort in PRODUCT_SORTS:
+            headers, _ = self.call('GET', f'/products/?sort={sort}&limit=20')
+            if headers.get('x-next-cursor'):
+                self.call('GET', f"/products/?sort={sort}&limit=20&cursor={headers['x-next-cursor']}")
+        headers, _ = self.call('GET', '/products/?search=tom&limit=20')
+        if headers.get('x-next-cursor'):
+            self.call('GET', f"/products/?search=tom&limit=20&cursor={headers['x-next-cursor']}")
+        self.call('GET', '/products/?search=organic+carr&category_id=1&is_organic=true')
+        self.call('GET', '/products/?search=cheese&sort=price_asc&limit=20')
+        self.call('GET', '/products/suggest?q=tom')
+        self.call('GET', '/products/facets')
+        self.call('GET', f'/products/facets?category_id={category_id}&is_organic=true')
+        self.call('GET', '/products/facets?search=tom')
+        self.call('GET', f'/products/{product_id}')
+        self.call('GET', '/products/farmer/my-products', token=farmer)
+
+        _, product = self.call('POST', '/products/', {
+            'name': 'Plan Check Radishes', 'description': 'Created by check_query_plans.py',
+            'price_per_unit': 2.5, 'unit_type': 'bunch', 'quantity_available': 40, 'category_id': category_id,
+        }, token=new_farmer)
+        new_id = (product or {}).get('id')
+        self.call('PUT', f'/products/{new_id}', {'quantity_available': 35}, token=new_farmer)
+        self.call('DELETE', f'/products/{new_id}', token=new_farmer)
+
+        _, order = self.call('POST', '/orders/', {
+            'delivery_address': '1 Plan Street', 'items': [{'product_id': product_id, 'quantity': 1}],
+        }, token=customer)
+        self.call('GET', '/orders/', token=customer)
+        self.call('GET', '/orders/', token=farmer)
+        return farmer, customer, (order or {}).get('id')
+
+
+def http_sender(port):
+    def send(method, path, body, headers):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        if body is not None:
+            headers = dict(headers, **{'Content-Type': 'application/json'})
+            body = json.dumps(body)
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        payload = response.read()
+        conn.close()
+        if payload and response.getheader('Content-Type', '').startswith('application/json'):
+            payload = json.loads(payload)
+        else:
+            payload = payload.decode('utf-8', 'replace')
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, payload
+    return send
+
+
+def tour_simple_server(url, log_path, failures):
+    farmer_email, _, customer_email, product_id = heavy_users(url, 'farmer')
+    env = {'SLOW_QUERY_MS': '0', 'SLOW_QUERY_EXPLAIN': 'true', 'SLOW_QUERY_LOG': log_path,
+           'TOKEN_STORE': 'database', 'METRICS_ENABLED': 'true', 'SERVER_MODE': 'threaded'}
+    workdir = None
+    if url.startswith('sqlite:///'):
+        workdir = os.path.dirname(url[len('sqlite:///'):])
+    else:
+        env['DATABASE_URL'] = url
+    with SimpleServerProcess(env=env, workdir=workdir, seed=False) as server:
+        send = http_sender(server.port)
+        tour = Tour(send)
+        farmer, customer, _ = tour.run_common(farmer_email, customer_email, product_id, 1)
+        tour.call('GET', '/health/db')
+        tour.call('PUT', '/users/profile', {'phone': '+15550000000'}, token=customer)
+        tour.call('POST', '/users/profile', {'first_name': 'Plan'}, token=customer)
+        headers, _ = tour.call('GET', '/orders?limit=20', token=customer)
+        if headers.get('x-next-cursor'):
+            tour.call('GET', f"/orders?limit=20&cursor={headers['x-next-cursor']}", token=customer)
+        tour.call('GET', '/orders?status=delivered&limit=20', token=farmer)
+        hit = routes_hit(send('GET', '/metrics', None, {})[2])
+
+    import simple_server
+    handlers = {}
+    for route in simple_server.api_routes.routes:
+        if route.needs_database:
+            handlers.setdefault(route.handler, set()).add((route.method, route.pattern))
+    for patterns in handlers.values():
+        if not patterns & hit:
+            failures.append({'server': 'simple_server', 'route': sorted(patterns)[0], 'problem': 'not exercised'})
+    failures.extend({'server': 'simple_server', 'problem': failure} for failure in tour.failures)
+
+
+def tour_fastapi(url, failures):
+    farmer_email, farmer_id, customer_email, product_id = heavy_users(
+        url, 'FARMER', orderable="(min_order_quantity IS NULL OR min_order_quantity <= 1)")
+    from fastapi.routing import APIRoute
+    from fastapi.testclient import TestClient
+    from app.database import get_db
+    from app.main import app
+    from app.utils.metrics import request_metrics
+    client = TestClient(app)
+
+    def send(method, path, body, headers):
+        response = client.request(method, path, json=body, headers=headers)
+        is_json = response.headers.get('content-type', '').startswith('application/json')
+        return response.status_code, response.headers, response.json() if is_json and response.content else None
+
+    tour = Tour(send)
+    farmer, customer, order_id = tour.run_common(farmer_email, customer_email, product_id, 1)
+    for query in ('category_id=2', f'farmer_id={farmer_id}', 'is_organic=true', 'search=Tomato', 'skip=5000'):
+        tour.call('GET', f'/products/?{query}')
+    tour.call('GET', f'/orders/{order_id}', token=customer)
+    tour.call('PUT', f'/orders/{order_id}', {'status': 'accepted'}, token=farmer)
+
+    def uses_database(dependant):
+        return any(dep.call is get_db or uses_database(dep) for dep in dependant.dependencies)
+
+    hit = routes_hit(request_metrics.render())
+    for route in app.routes:
+        if isinstance(route, APIRoute) and uses_database(route.dependant):
+            if not {(method, route.path) for method in route.methods} & hit:
+                failures.append({'server': 'fastapi', 'route': [sorted(route.methods)[0], route.path],
+                                 'problem': 'not exercised'})
+    failures.extend({'server': 'fastapi', 'problem': failure} for failure in tour.failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--simple-url', help='scratch PostgreSQL database for the simple_server schema')
+    parser.add_argument('--models-url', help='scratch PostgreSQL database for the SQLAlchemy models')
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--cost-factor', type=float, default=2.0, help='allowed growth of PostgreSQL cost estimates')
+    parser.add_argument('--update', action='store_true', help='write the current plans as the new baseline')
+    parser.add_argument('--strict', action='store_true', help='also fail on new or vanished statements')
+    args = parser.parse_args()
+    for url in (args.simple_url, args.models_url):
+        if url and not url.startswith(('postgres://', 'postgresql://')):
+            parser.error(f'expected a PostgreSQL URL, got {url}')
+
+    workdir = tempfile.mkdtemp(prefix='farmer-plans-')
+    os.makedirs(os.path.join(workdir, 'simple'))
+    simple_url = args.simple_url or 'sqlite:///' + os.path.join(workdir, 'simple', 'farmer_marketplace.db')
+    models_url = args.models_url or 'sqlite:///' + os.path.join(workdir, 'models.db')
+    log_path = os.path.join(workdir, 'statements.jsonl')
+    failures, notes = [], []
+    try:
+        generate(simple_url, 'simple', args)
+        generate(models_url, 'models', args)
+
+        # The app modules read their configuration at import, so set it before the first one
+        os.environ.update({'DATABASE_URL': models_url, 'DEBUG': 'false', 'SLOW_QUERY_MS': '0',
+                           'SLOW_QUERY_EXPLAIN': 'true', 'SLOW_QUERY_LOG': log_path, 'METRICS_ENABLED': 'true'})
+        tour_simple_server(simple_url, log_path, failures)
+        tour_fastapi(models_url, failures)
+
+        from app.utils.slow_query import _log_files, summarize
+        statements = summarize(_log_files(log_path))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    dialects = {'simple_server': dialect_of(simple_url), 'sqlalchemy': dialect_of(models_url)}
+    current = {}
+    for statement in statements:
+        if not statement['explain']:
+            continue  # INSERTs and transaction control have no plan
+        dialect = dialects[statement['sources'][0]]
+        current.setdefault(dialect, {})[statement['fingerprint']] = {
+            'source': statement['sources'][0], 'sql': statement['sql'], 'plan': statement['explain'],
+            **plan_facts(statement['explain']),
+        }
+
+    baseline = {'dataset': {}, 'plans': {}}
+    if os.path.exists(BASELINE):
+        with open(BASELINE, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+    dataset = {'users': args.users, 'products': args.products, 'orders': args.orders, 'seed': args.seed}
+    if baseline['dataset'] and baseline['dataset'] != dataset:
+        notes.append({'problem': 'dataset differs from the baseline', 'baseline': baseline['dataset']})
+
+    compared = 0
+    unmatched = failures if args.strict else notes
+    for dialect, plans in sorted(current.items()):
+        known = baseline['plans'].get(dialect, {})
+        for fingerprint, plan in plans.items():
+            if fingerprint not in known:
+                unmatched.append({'dialect': dialect, 'fingerprint': fingerprint, 'sql': plan['sql'],
+                                  'problem': 'new statement', 'plan': plan['plan']})
+                continue
+            compared += 1
+            # Facts are recomputed so baselines written before a plan_facts() change still compare
+            for reason in compare(plan_facts(known[fingerprint]['plan']), plan, args.cost_factor):
+                failures.append({'dialect': dialect, 'fingerprint': fingerprint, 'sql': plan['sql'], 'problem': reason,
+                                 'plan': plan['plan'], 'baseline_plan': known[fingerprint]['plan']})
+        for fingerprint in sorted(set(known) - set(plans)):
+            unmatched.append({'dialect': dialect, 'fingerprint': fingerprint, 'sql': known[fingerprint]['sql'],
+                              'problem': 'no longer issued'})
+
+    if args.update:
+        baseline['dataset'] = dataset
+        baseline['plans'].update({dialect: dict(sorted(plans.items())) for dialect, plans in current.items()})
+        with open(BASELINE, 'w', encoding='utf-8') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+
+    for entry in notes + failures:
+        print(json.dumps(entry), flush=True)
+    print(json.dumps({
+        'statements': sum(len(plans) for plans in current.values()), 'compared': compared,
+        'failures': len(failures), 'updated_baseline': args.update,
+    }), flush=True)
+    sys.exit(1 if failures and not args.update else 0)
+
+
+if __name__ == '__main__':
+    main()
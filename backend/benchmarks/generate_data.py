@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""Bulk-load a synthetic marketplace: users, products, orders, items, status history, reviews.
+
+The data is skewed the way a real marketplace is:
+
+  farmers    product ownership is Zipfian (--farmer-skew), so a few big farms list most
+             of the catalog and most farms list a handful of products
+  products   order items pick products with Zipfian popularity (--popularity-skew); the
+             popular ranks are shuffled so they are not simply the lowest ids
+  customers  a minority of repeat buyers places most orders (--customer-skew)
+  dates      order dates peak in the summer harvest, rise on weekends and grow over the
+             --days window; order status follows the order's age
+
+Every order holds 1-8 items from one farmer (the rule both servers enforce), totals add
+up, and all users share one password (--password) hashed the way the target schema's
+server checks it.
+
+--schema simple creates and fills the simple_server tables (via its migrations);
+--schema models creates the SQLAlchemy tables in app/models and also fills
+farmer_profiles, order_status_history and reviews, which simple_server does not have.
+Rows are loaded in --batch chunks with executemany on SQLite and COPY on PostgreSQL, with
+secondary indexes (and SQLite's full-text and facet count triggers) dropped during the load
+and rebuilt once at the end.
+Existing rows are kept; new ids continue after the current maximum.
+
+Usage: python benchmarks/generate_data.py sqlite:///big.db --schema simple \\
+           --users 200000 --products 1000000 --orders 2000000
+"""
+
+import argparse
+import csv
+import datetime
+import io
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from operator import itemgetter
+
+from _harness import BACKEND_DIR
+
+sys.path.insert(0, BACKEND_DIR)
+
+# Column order of the generated rows; the simple schema loads a subset of them
+COLUMNS = {
+    'users': ('id', 'email', 'password_hash', 'role', 'first_name', 'last_name', 'phone', 'is_active',
+              'is_verified', 'created_at', 'updated_at'),
+    'farmer_profiles': ('id', 'user_id', 'farm_name', 'farm_address', 'farm_description', 'created_at',
+                        'updated_at'),
+    'products': ('id', 'farmer_id', 'category_id', 'name', 'description', 'price_per_unit', 'unit_type',
+                 'quantity_available', 'is_organic', 'is_active', 'created_at', 'min_order_quantity',
+                 'harvest_date', 'expiry_date', 'image_urls', 'updated_at'),
+    'orders': ('id', 'customer_id', 'farmer_id', 'status', 'total_amount', 'delivery_address', 'delivery_date',
+               'delivery_time', 'notes', 'created_at', 'updated_at'),
+    'order_items': ('id', 'order_id', 'product_id', 'quantity', 'unit_price', 'total_price'),
+    'order_status_history': ('id', 'order_id', 'status', 'notes', 'created_at'),
+    'reviews': ('id', 'order_id', 'reviewer_id', 'reviewed_id', 'rating', 'comment', 'created_at'),
+}
+
+SIMPLE_COLUMNS = {
+    'users': COLUMNS['users'][:8] + ('created_at',),
+    'products': COLUMNS['products'][:11] + ('harvest_date',),
+    'orders': COLUMNS['orders'][:10],
+    'order_items': COLUMNS['order_items'],
+}
+
+DEFAULT_CATEGORIES = [
+    ("Vegetables", "Fresh vegetables and leafy greens"),
+    ("Fruits", "Seasonal fruits and berries"),
+    ("Herbs", "Fresh herbs and spices"),
+    ("Grains", "Rice, wheat, and other grains"),
+    ("Dairy", "Fresh milk, cheese, and dairy products"),
+    ("Eggs", "Farm fresh eggs"),
+    ("Meat", "Fresh meat and poultry"),
+    ("Honey", "Natural honey and bee products"),
+]
+
+# Category name -> (produce, units, typical price per unit)
+PRODUCE = {
+    'Vegetables': (['Tomatoes', 'Carrots', 'Spinach', 'Lettuce', 'Potatoes', 'Onions', 'Peppers', 'Cucumbers',
+                    'Zucchini', 'Kale', 'Beetroot', 'Broccoli', 'Cauliflower', 'Radishes', 'Leeks'],
+                   ['kg', 'lb', 'bunch', 'piece'], 3.0),
+    'Fruits': (['Apples', 'Strawberries', 'Blueberries', 'Peaches', 'Pears', 'Plums', 'Cherries', 'Raspberries',
+                'Grapes', 'Melons', 'Apricots', 'Figs'], ['kg', 'lb', 'basket'], 5.0),
+    'Herbs': (['Basil', 'Parsley', 'Cilantro', 'Mint', 'Rosemary', 'Thyme', 'Dill', 'Sage', 'Chives'],
+              ['bunch', 'pot'], 2.5),
+    'Grains': (['Rice', 'Wheat Flour', 'Oats', 'Barley', 'Quinoa', 'Rye', 'Buckwheat', 'Cornmeal'],
+               ['kg', 'bag'], 4.0),
+    'Dairy': (['Milk', 'Cheddar', 'Goat Cheese', 'Yogurt', 'Butter', 'Cream', 'Feta', 'Ricotta'],
+              ['liter', 'piece', 'kg'], 6.0),
+    'Eggs': (['Eggs', 'Duck Eggs', 'Quail Eggs'], ['dozen', 'half dozen'], 5.5),
+    'Meat': (['Chicken', 'Beef Mince', 'Pork Chops', 'Lamb', 'Sausages', 'Turkey'], ['kg', 'lb'], 14.0),
+    'Honey': (['Wildflower Honey', 'Clover Honey', 'Honeycomb', 'Beeswax', 'Buckwheat Honey'],
+              ['jar', 'kg'], 9.0),
+}
+GENERIC_PRODUCE = (['Produce Box', 'Seasonal Mix', 'Preserves', 'Pickles'], ['piece', 'box'], 8.0)
+ADJECTIVES = ['Fresh', 'Organic', 'Heirloom', 'Local', 'Free-Range', 'Sun-Ripened', 'Hand-Picked', 'Wild',
+              'Baby', 'Golden', 'Red', 'Green', 'Sweet', 'Smoked', 'Raw', 'Farmhouse', 'Artisan', 'Early']
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elena',
+               'Sofia', 'Wei', 'Aisha', 'Carlos', 'Fatima', 'Kenji', 'Olga', 'Ravi', 'Amara', 'Lucas',
+               'Noah', 'Emma', 'Liam', 'Ava', 'Mateo', 'Zara', 'Ivan', 'Mei', 'Omar', 'Grace']
+LAST_NAMES = ['Smith', 'Johnson', 'Garcia', 'Brown', 'Miller', 'Davis', 'Martinez', 'Lopez', 'Wilson', 'Chen',
+              'Okafor', 'Nguyen', 'Kowalski', 'Silva', 'Khan', 'Tanaka', 'Ivanova', 'Patel', 'Mensah', 'Rossi',
+              'Muller', 'Dubois', 'Hansen', 'Novak', 'Haddad', 'Kim', 'Singh', 'Cohen', 'Murphy', 'Walker']
+STREETS = ['Orchard Lane', 'Mill Road', 'Harvest Way', 'Station Street', 'River Road', 'Church Street',
+           'Meadow Drive', 'High Street', 'Park Avenue', 'Barn Lane']
+FARM_NAMES = ['Green Valley', 'Sunny Slope', 'Oak Hill', 'Willow Creek', 'Red Barn', 'Maple Ridge', 'River Bend',
+              'Meadowbrook', 'Cedar Hollow', 'Stone Ridge', 'Blue Sky', 'Golden Fields', 'Hillside', 'Clover Lane']
+FARM_KINDS = ['Farm', 'Farms', 'Acres', 'Orchard', 'Gardens', 'Homestead', 'Ranch', 'Family Farm']
+DELIVERY_TIMES = ['08:00-10:00', '10:00-12:00', '12:00-14:00', '14:00-16:00', '16:00-18:00', '18:00-20:00']
+REVIEW_COMMENTS = [None, 'Great quality, will order again.', 'Fresh and well packed.', 'Arrived late.',
+                   'Smaller than expected.', 'Excellent, thank you!', 'Good value.', 'Not as fresh as last time.']
+
+# Status progression of an order; history rows follow it up to the order's current status
+STATUS_FLOW = ('pending', 'accepted', 'preparing', 'ready', 'delivered')
+# Hour of day an order is placed: mornings and evenings
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 7, 9, 10, 10, 9, 8, 7, 7, 7, 8, 10, 11, 10, 8, 5, 3, 2]
+
+
+def zipf_cum_weights(n, skew):
+    """Cumulative weights of ranks 1..n under a Zipf distribution with exponent ``skew``."""
+    return list(itertools.accumulate(1.0 / (rank ** skew) for rank in range(1, n + 1)))
+
+
+def day_cum_weights(days, end):
+    """Cumulative weight of each day in the window: summer peak, weekends, steady growth."""
+    weights = []
+    for offset in range(days):
+        day = end - datetime.timedelta(days=days - 1 - offset)
+        season = 1.0 + 0.6 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 200) / 365.0)
+        weekend = 1.3 if day.weekday() >= 5 else 1.0
+        growth = 0.5 + offset / days
+        weights.append(season * weekend * growth)
+    return list(itertools.accumulate(weights))
+
+
+def timestamp(moment):
+    # isoformat is several times faster than strftime; moments carry no microseconds
+    return moment.isoformat(' ')
+
+
+class Generator:
+    """Produces the rows of every table; ids continue from ``start_ids``."""
+
+    def __init__(self, args, category_names, start_ids, password_hash, labels):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.categories = category_names
+        self.start_ids = start_ids
+        self.password_hash = password_hash
+        self.labels = labels  # role and status values as the schema stores them
+        self.end = datetime.datetime.combine(args.end_date, datetime.time(23, 59, 59))
+        self.start = self.end - datetime.timedelta(days=args.days)
+        self.farmer_ids = []
+        self.farmer_created = []
+        self.customer_ids = []
+        self.product_farmer = []
+        self.product_price = []
+        self.farmer_products = {}
+
+    def users(self):
+        rng, args = self.rng, self.args
+        farmers = max(1, int(args.users * args.farmer_share))
+        first_id = self.start_ids['users']
+        span = (self.end - self.start).total_seconds()
+        for n in range(args.users):
+            user_id = first_id + n
+            role = 'farmer' if n < farmers else 'customer'
+            (self.farmer_ids if n < farmers else self.customer_ids).append(user_id)
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            created = timestamp(self.start + datetime.timedelta(seconds=int(rng.random() * span)))
+            if n < farmers:
+                self.farmer_created.append(created)
+            yield (
+                user_id, f'{first.lower()}.{last.lower()}.{user_id}@example.com', self.password_hash,
+                self.labels[role], first, last, f'+1555{rng.randrange(10 ** 7):07d}', rng.random() > 0.01,
+                rng.random() < 0.7, created, created,
+            )
+
+    def farmer_profiles(self):
+        rng = self.rng
+        first_id = self.start_ids['farmer_profiles']
+        for n, (user_id, created) in enumerate(zip(self.farmer_ids, self.farmer_created)):
+            # Half the farms carry the family name, so names repeat the way real ones do
+            name = rng.choice(FARM_NAMES) if rng.random() < 0.5 else rng.choice(LAST_NAMES)
+            yield (
+                first_id + n, user_id, f"{name} {rng.choice(FARM_KINDS)}",
+                f"{rng.randrange(1, 9999)} {rng.choice(STREETS)}", None, created, created,
+            )
+
+    def products(self):
+        rng, args = self.rng, self.args
+        farmers_by_rank = self.farmer_ids[:]
+        rng.shuffle(farmers_by_rank)
+        owners = rng.choices(farmers_by_rank, cum_weights=zipf_cum_weights(len(farmers_by_rank), args.farmer_skew),
+                             k=args.products)
+        first_id = self.start_ids['products']
+        span = (self.end - self.start).total_seconds()
+        for n, farmer_id in enumerate(owners):
+            product_id = first_id + n
+            category_id, category = rng.choice(self.categories)
+            produce, units, base_price = PRODUCE.get(category, GENERIC_PRODUCE)
+            item = rng.choice(produce)
+            organic = rng.random() < 0.3
+            name = f"{'Organic' if organic else rng.choice(ADJECTIVES)} {item}"
+            price = round(base_price * rng.lognormvariate(0, 0.35), 2)
+            created_at = self.start + datetime.timedelta(seconds=int(rng.random() * span))
+            harvest = (created_at - datetime.timedelta(days=rng.randrange(7))).date()
+            # One in ten listings is sold out and one in twenty withdrawn
+            quantity = 0 if rng.random() < 0.1 else rng.randrange(1, 500)
+            self.product_farmer.append(farmer_id)
+            self.product_price.append(price)
+            self.farmer_products.setdefault(farmer_id, []).append(n)
+            yield (
+                product_id, farmer_id, category_id, name,
+                f"{name} from a {rng.choice(['family', 'small', 'hillside', 'valley', 'coastal'])} farm, "
+                f"{rng.choice(['picked', 'packed', 'prepared'])} {rng.choice(['daily', 'to order', 'weekly'])}.",
+                price, rng.choice(units), quantity, organic, rng.random() > 0.05, timestamp(created_at),
+                1 if rng.random() < 0.9 else rng.randrange(2, 6), harvest.isoformat(),
+                (harvest + datetime.timedelta(days=rng.randrange(5, 60))).isoformat(),
+                json.dumps([f'https://images.example.com/products/{product_id}/{i}.jpg'
+                            for i in range(rng.randrange(4))]) if rng.random() < 0.6 else None,
+                timestamp(created_at),
+            )
+
+    def orders(self):
+        """Yield (orders, order_items, status_history, reviews) row lists, one batch at a time."""
+        rng, args, labels = self.rng, self.args, self.labels
+        popularity = list(range(len(self.product_farmer)))
+        rng.shuffle(popularity)
+        product_weights = zipf_cum_weights(len(popularity), args.popularity_skew)
+        customer_weights = zipf_cum_weights(len(self.customer_ids), args.customer_skew)
+        customers_by_rank = self.customer_ids[:]
+        rng.shuffle(customers_by_rank)
+        day_weights = day_cum_weights(args.days, args.end_date)
+        hour_weights = list(itertools.accumulate(HOUR_WEIGHTS))
+        random_float = rng.random
+        first_day = self.end.replace(hour=0, minute=0, second=0) - datetime.timedelta(days=args.days - 1)
+        product_base = self.start_ids['products']
+        ids = {table: self.start_ids[table] for table in ('orders', 'order_items', 'order_status_history', 'reviews')}
+
+        remaining = args.orders
+        while remaining > 0:
+            count = min(args.batch, remaining)
+            remaining -= count
+            firsts = rng.choices(popularity, cum_weights=product_weights, k=count)
+            customers = rng.choices(customers_by_rank, cum_weights=customer_weights, k=count)
+            days = rng.choices(range(args.days), cum_weights=day_weights, k=count)
+            hours = rng.choices(range(24), cum_weights=hour_weights, k=count)
+            order_rows, item_rows, history_rows, review_rows = [], [], [], []
+            for first, customer_id, day, hour in zip(firsts, customers, days, hours):
+                order_id = ids['orders']
+                ids['orders'] += 1
+                farmer_id = self.product_farmer[first]
+                created = first_day + datetime.timedelta(days=day, hours=hour, seconds=int(random_float() * 3600))
+                age_days = (self.end - created).total_seconds() / 86400
+
+                # First item by popularity, the rest from the same farmer's listings
+                siblings = self.farmer_products[farmer_id]
+                extra = min(len(siblings) - 1, int(rng.expovariate(0.7)), 7)
+                cart = [first] + [p for p in rng.sample(siblings, extra + 1) if p != first][:extra]
+                total = 0.0
+                for index in cart:
+                    quantity = 1 + int(rng.expovariate(0.8))
+                    price = self.product_price[index]
+                    line_total = round(price * quantity, 2)
+                    total += line_total
+                    item_rows.append((ids['order_items'], order_id, product_base + index, quantity, price,
+                                      line_total))
+                    ids['order_items'] += 1
+
+                # Older orders are further along; a few are cancelled
+                if random_float() < 0.05:
+                    flow = ('pending', 'cancelled')
+                else:
+                    flow = STATUS_FLOW[:1 + min(4, int(age_days * 1.5 * random_float() + age_days / 3))]
+                status = flow[-1]
+                moment = created
+                for step, value in enumerate(flow):
+                    if step:
+                        moment = min(self.end, moment + datetime.timedelta(minutes=20 + int(random_float() * 1420)))
+                    history_rows.append((ids['order_status_history'], order_id, labels[value],
+                                         'Order created' if step == 0 else None, timestamp(moment)))
+                    ids['order_status_history'] += 1
+                if status == 'delivered' and random_float() < args.review_share:
+                    moment = min(self.end, moment + datetime.timedelta(hours=rng.randrange(1, 96)))
+                    review_rows.append((ids['reviews'], order_id, customer_id, farmer_id,
+                                        rng.choices((1, 2, 3, 4, 5), weights=(4, 4, 10, 30, 52))[0],
+                                        rng.choice(REVIEW_COMMENTS), timestamp(moment)))
+                    ids['reviews'] += 1
+
+                order_rows.append((
+                    order_id, customer_id, farmer_id, labels[status], round(total, 2),
+                    f'{1 + int(random_float() * 399)} {rng.choice(STREETS)}',
+                    (created + datetime.timedelta(days=1 + int(random_float() * 4))).date().isoformat(),
+                    rng.choice(DELIVERY_TIMES), 'Leave at the door' if random_float() < 0.1 else None,
+                    timestamp(created), timestamp(moment),
+                ))
+            yield order_rows, item_rows, history_rows, review_rows
+
+
+class SQLiteLoader:
+    dialect = 'sqlite'
+
+    def __init__(self, path):
+        import sqlite3
+        from app.utils.sqlite_tuning import apply_sqlite_pragmas
+        self.conn = sqlite3.connect(path)
+        apply_sqlite_pragmas(self.conn)
+        # A crash mid-load means regenerating anyway, so skip the fsyncs
+        self.conn.execute("PRAGMA synchronous = OFF")
+
+    def max_id(self, table):
+        return self.conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+    def query(self, sql, params=()):
+        return self.conn.execute(sql, params).fetchall()
+
+    def load(self, table, columns, rows):
+        placeholders = ', '.join('?' * len(columns))
+        self.conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+    def secondary_indexes(self, tables):
+        """(name, CREATE statement) of the indexes to drop while loading; implicit ones stay."""
+        marks = ', '.join('?' * len(tables))
+        return self.query(f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+                          f"AND tbl_name IN ({marks})", tuple(tables))
+
+    def sync_triggers(self, tables):
+        """(name, CREATE statement) of the full-text and facet count triggers; one rebuild after loading is cheaper."""
+        marks = ', '.join('?' * len(tables))
+        return self.query(f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+                          f"AND (name GLOB 'trg_*_fts_*' OR name GLOB 'trg_*_facets_*') "
+                          f"AND tbl_name IN ({marks})", tuple(tables))
+
+    def rebuild_synced(self):
+        from app.utils.facets import SQLITE_FACET_COUNTS_FILL
+        self.conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+        self.conn.execute("DELETE FROM product_facet_counts")
+        self.conn.execute(SQLITE_FACET_COUNTS_FILL)
+
+    def finish(self, tables):
+        self.conn.commit()
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+
+
+class PostgresLoader:
+    dialect = 'postgresql'
+
+    def __init__(self, url):
+        import psycopg2
+        self.conn = psycopg2.connect(url)
+
+    def max_id(self, table):
+        return self.query(f"SELECT COALESCE(MAX(id), 0) FROM {table}")[0][0]
+
+    def query(self, sql, params=()):
+        cursor = self.conn.cursor()
+        cursor.execute(sql.replace('?', '%s'), params)
+        rows = cursor.fetchall() if cursor.description else []
+        cursor.close()
+        return rows
+
+    def load(self, table, columns, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)  # None becomes an unquoted empty field, i.e. NULL
+        buffer.seek(0)
+        cursor = self.conn.cursor()
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.close()
+
+    def secondary_indexes(self, tables):
+        # Indexes backing primary keys and unique constraints cannot be dropped on their own
+        return self.query(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = ANY(%s) "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint)", (list(tables),))
+
+    def sync_triggers(self, tables):
+        # The tsvector is a generated column and its GIN index is one of the secondary indexes;
+        # the facet count triggers stay, as DROP TRIGGER needs the table name here
+        return []
+
+    def rebuild_synced(self):
+        pass
+
+    def finish(self, tables):
+        # Explicit ids leave the SERIAL sequences behind
+        for table in tables:
+            self.query(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                       f"(SELECT GREATEST(MAX(id), 1) FROM {table}))")
+        self.conn.commit()
+        self.query("ANALYZE")
+        self.conn.commit()
+
+
+def open_loader(url):
+    if url.startswith('sqlite:///'):
+        return SQLiteLoader(url[len('sqlite:///'):])
+    if url.startswith(('postgres://', 'postgresql://')):
+        return PostgresLoader(url)
+    raise SystemExit(f"unsupported database URL: {url}")
+
+
+def create_schema(args, loader):
+    """Create or upgrade the tables; return (password hash, role/status labels)."""
+    if args.schema == 'simple':
+        import simple_server
+        from app.utils.migrations import migrate
+        migrations = simple_server.SQLITE_MIGRATIONS if loader.dialect == 'sqlite' else simple_server.POSTGRES_MIGRATIONS
+        migrate(loader.conn, migrations, loader.dialect)
+        labels = {value: value for value in STATUS_FLOW + ('cancelled', 'farmer', 'customer')}
+        return simple_server.hash_password(args.password), labels
+
+    os.environ['DATABASE_URL'] = args.database_url
+    from sqlalchemy import create_engine
+    from app.database import Base
+    from app.models.order import OrderStatus
+    from app.models.user import UserRole
+    from app.utils.auth import get_password_hash
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    # SQLAlchemy stores Enum columns by member name
+    labels = {member.value: member.name for member in list(OrderStatus) + list(UserRole)}
+    return get_password_hash(args.password), labels
+
+
+def ensure_categories(loader):
+    rows = loader.query("SELECT id, name FROM categories")
+    if not rows:
+        # is_active has no server default in the models schema
+        loader.load('categories', ('name', 'description', 'is_active'),
+                    [(name, description, True) for name, description in DEFAULT_CATEGORIES])
+        rows = loader.query("SELECT id, name FROM categories")
+    return [tuple(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url', help='sqlite:///path.db or postgresql://...')
+    parser.add_argument('--schema', default='simple', choices=('simple', 'models'),
+                        help='simple_server tables or the SQLAlchemy models in app/models')
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--farmer-share', type=float, default=0.05, help='fraction of users who are farmers')
+    parser.add_argument('--products', type=int, default=50000)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--review-share', type=float, default=0.3, help='fraction of delivered orders reviewed')
+    parser.add_argument('--farmer-skew', type=float, default=1.1, help='Zipf exponent of products per farmer')
+    parser.add_argument('--popularity-skew', type=float, default=1.0, help='Zipf exponent of product popularity')
+    parser.add_argument('--customer-skew', type=float, default=0.6, help='Zipf exponent of orders per customer')
+    parser.add_argument('--days', type=int, default=730, help='order history window')
+    parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=datetime.date.today())
+    parser.add_argument('--password', default='password123', help='password of every generated user')
+    parser.add_argument('--batch', type=int, default=50000, help='rows per executemany / COPY')
+    parser.add_argument('--keep-indexes', action='store_true', help='load with secondary indexes in place')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    if args.users * args.farmer_share >= args.users - 1:
+        parser.error('--farmer-share leaves no customers')
+
+    loader = open_loader(args.database_url)
+    password_hash, labels = create_schema(args, loader)
+    columns = COLUMNS if args.schema == 'models' else SIMPLE_COLUMNS
+    tables = [table for table in COLUMNS if table in columns]
+    categories = ensure_categories(loader)
+    start_ids = {table: loader.max_id(table) + 1 for table in COLUMNS if table in columns}
+    start_ids.update({table: 1 for table in COLUMNS if table not in columns})
+    generator = Generator(args, [(cid, name) for cid, name in categories], start_ids, password_hash, labels)
+
+    dropped = [] if args.keep_indexes else loader.secondary_indexes(tables)
+    for name, _ in dropped:
+        loader.query(f"DROP INDEX {name}")
+    suspended = [] if args.keep_indexes else loader.sync_triggers(tables)
+    for name, _ in suspended:
+        loader.query(f"DROP TRIGGER {name}")
+    loader.conn.commit()
+
+    counts = dict.fromkeys(tables, 0)
+    load_seconds = dict.fromkeys(tables, 0.0)
+    project = {table: itemgetter(*(COLUMNS[table].index(c) for c in columns[table])) for table in tables}
+
+    def load(table, rows):
+        if table not in columns or not rows:
+            return
+        start = time.perf_counter()
+        counts[table] += len(rows)
+        if columns[table] != COLUMNS[table]:
+            rows = map(project[table], rows)
+        loader.load(table, columns[table], rows)
+        load_seconds[table] += time.perf_counter() - start
+
+    started = time.perf_counter()
+    for table, rows in (('users', generator.users()), ('farmer_profiles', generator.farmer_profiles()),
+                        ('products', generator.products())):
+        while True:
+            batch = list(itertools.islice(rows, args.batch))
+            if not batch:
+                break
+            load(table, batch)
+            loader.conn.commit()
+    for batch in generator.orders():
+        for table, rows in zip(('orders', 'order_items', 'order_status_history', 'reviews'), batch):
+            load(table, rows)
+        loader.conn.commit()
+
+    index_start = time.perf_counter()
+    for _, statement in dropped + suspended:
+        loader.query(statement)
+    if suspended:
+        loader.rebuild_synced()
+    loader.finish(tables)
+    index_seconds = time.perf_counter() - index_start
+    total_seconds = time.perf_counter() - started
+
+    for table in tables:
+        print(json.dumps({'table': table, 'rows': counts[table], 'load_seconds': round(load_seconds[table], 1)}),
+              flush=True)
+    rows = sum(counts.values())
+    print(json.dumps({
+        'schema': args.schema, 'dialect': loader.dialect, 'rows': rows, 'indexes_rebuilt': len(dropped),
+        'index_seconds': round(index_seconds, 1), 'seconds': round(total_seconds, 1),
+        'rows_per_second': round(rows / total_seconds) if total_seconds else 0,
+    }), flush=True)
+    loader.conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""Load test with the mobile app's user journeys, for comparing runs across commits.
+
+Virtual users are client processes that log in once and then repeat their journey until
+the duration runs out, each on its own keep-alive connection:
+
+  customer   GET /categories/, GET /products/, GET /products/{id} (FastAPI only; simple_server
+             has no detail route), POST /orders/ with 1-3 items from one farmer, GET /orders/
+  farmer     GET /products/farmer/my-products, GET /orders/
+
+A failed step (status >= 400 or a connection error) ends that journey, as it would in the
+app. Before the run the target is seeded through its own API: --farmers-seeded farmers
+each list --products products with plenty of stock, and one account is registered per
+virtual user. Customers only order the seeded products, so stock never runs out.
+
+Targets are simple_server.py (--mode single/threaded/prefork) and app.main:app under
+uvicorn, each in a scratch directory. The FastAPI target is skipped when uvicorn is not
+installed. Prints one JSON document per target with RPS, latency percentiles and error
+rates overall, per step and per journey; --output appends the same lines to a file.
+
+Usage: python benchmarks/loadtest.py --target both --customers 6 --farmers 2 --duration 20
+"""
+
+import argparse
+import datetime
+import gzip
+import http.client
+import json
+import random
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from _harness import BACKEND_DIR, FastAPIServerProcess, SimpleServerProcess, summarize
+
+PASSWORD = 'loadtest-password'
+
+# Steps each target serves; journeys skip the ones a target lacks
+TARGET_STEPS = {
+    'simple_server': {'product_detail': False},
+    'fastapi': {'product_detail': True},
+}
+
+
+class Session:
+    """One user's keep-alive connection, with an optional bearer token."""
+
+    def __init__(self, port):
+        self.port = port
+        self.token = None
+        self.conn = None
+
+    def call(self, method, path, body=None):
+        headers = {'Accept-Encoding': 'gzip'}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(body)
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            payload = response.read()
+            if response.will_close:
+                self.close()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            return None, None
+        if response.getheader('Content-Encoding') == 'gzip':
+            payload = gzip.decompress(payload)
+        if not payload or not response.getheader('Content-Type', '').startswith('application/json'):
+            return response.status, None
+        return response.status, json.loads(payload)
+
+    def login(self, email):
+        status, data = self.call('POST', '/auth/login', {'email': email, 'password': PASSWORD})
+        self.token = data['access_token'] if status == 200 else None
+        return status
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def register(session, email, role, index):
+    status, data = session.call('POST', '/auth/register', {
+        'email': email, 'password': PASSWORD, 'role': role,
+        'first_name': 'Load', 'last_name': f'{role.title()} {index}',
+    })
+    if status not in (200, 201):
+        raise RuntimeError(f"registering {email} failed with {status}: {data}")
+
+
+def seed(port, args):
+    """Register the sellers and every virtual user; return {product_id: farmer_email}."""
+    session = Session(port)
+    status, categories = session.call('GET', '/categories/')
+    if status != 200 or not categories:
+        raise RuntimeError(f"target has no categories (status {status})")
+    category_ids = [category['id'] for category in categories]
+
+    rng = random.Random(args.seed)
+    catalog = {}
+    for f in range(args.farmers_seeded):
+        email = f'loadtest-seller-{f}@example.com'
+        register(session, email, 'farmer', f)
+        session.login(email)
+        for p in range(args.products):
+            status, product = session.call('POST', '/products/', {
+                'name': f'Load test produce {f}-{p}',
+                'description': 'Seeded by benchmarks/loadtest.py',
+                'price_per_unit': round(rng.uniform(0.5, 20.0), 2),
+                'unit_type': rng.choice(['kg', 'lb', 'piece', 'bunch']),
+                'quantity_available': 1_000_000,
+                'category_id': rng.choice(category_ids),
+                'is_organic': rng.random() < 0.3,
+            })
+            if status not in (200, 201):
+                raise RuntimeError(f"creating a product failed with {status}: {product}")
+            catalog[product['id']] = email
+        session.token = None
+
+    for role, count in (('customer', args.customers), ('farmer', args.farmers)):
+        for i in range(count):
+            if role == 'farmer' and i < args.farmers_seeded:
+                continue
+            register(session, user_email(role, i, args.farmers_seeded), role, i)
+    session.close()
+    return catalog
+
+
+def user_email(role, index, farmers_seeded):
+    # Farmer users are the seeded sellers first, so their my-products and orders are not empty
+    if role == 'farmer' and index < farmers_seeded:
+        return f'loadtest-seller-{index}@example.com'
+    return f'loadtest-{role}-{index}@example.com'
+
+
+class Recorder:
+    """Latencies and error counts per step and per journey, for one virtual user."""
+
+    def __init__(self):
+        self.steps = {}
+        self.journeys = {}
+
+    def step(self, session, name, method, path, body=None):
+        start = time.perf_counter()
+        status, data = session.call(method, path, body)
+        elapsed = time.perf_counter() - start
+        latencies, errors = self.steps.setdefault(name, ([], [0]))
+        latencies.append(elapsed)
+        ok = status is not None and status < 400
+        if not ok:
+            errors[0] += 1
+        return ok, data
+
+    def journey(self, name, ok, seconds):
+        latencies, failed = self.journeys.setdefault(name, ([], [0]))
+        if ok:
+            latencies.append(seconds)
+        else:
+            failed[0] += 1
+
+
+def customer_journey(session, recorder, rng, catalog, product_detail):
+    ok, _ = recorder.step(session, 'GET /categories/', 'GET', '/categories/')
+    if not ok:
+        return False
+    ok, products = recorder.step(session, 'GET /products/', 'GET', '/products/')
+    if not ok:
+        return False
+    # Browse something from the listing, then fill the cart from that product's farmer
+    listed = [product['id'] for product in products or () if product['id'] in catalog]
+    product_id = rng.choice(listed or list(catalog))
+    if product_detail:
+        ok, _ = recorder.step(session, 'GET /products/{id}', 'GET', f'/products/{product_id}')
+        if not ok:
+            return False
+    farmer = catalog[product_id]
+    same_farmer = [pid for pid, seller in catalog.items() if seller == farmer and pid != product_id]
+    cart = [product_id] + rng.sample(same_farmer, min(len(same_farmer), rng.randint(0, 2)))
+    ok, _ = recorder.step(session, 'POST /orders/', 'POST', '/orders/', {
+        'delivery_address': '1 Load Test Lane',
+        'items': [{'product_id': pid, 'quantity': rng.randint(1, 3)} for pid in cart],
+    })
+    if not ok:
+        return False
+    ok, _ = recorder.step(session, 'GET /orders/', 'GET', '/orders/')
+    return ok
+
+
+def farmer_journey(session, recorder, rng, catalog, product_detail):
+    ok, _ = recorder.step(session, 'GET /products/farmer/my-products', 'GET', '/products/farmer/my-products')
+    if not ok:
+        return False
+    ok, _ = recorder.step(session, 'GET /orders/', 'GET', '/orders/')
+    return ok
+
+
+JOURNEYS = {'customer': customer_journey, 'farmer': farmer_journey}
+
+
+def virtual_user(port, role, email, catalog, product_detail, duration, think_ms, seed):
+    rng = random.Random(seed)
+    recorder = Recorder()
+    session = Session(port)
+    start = time.perf_counter()
+    ok, data = recorder.step(session, 'POST /auth/login', 'POST', '/auth/login', {'email': email, 'password': PASSWORD})
+    if not ok:
+        return recorder.steps, recorder.journeys
+    session.token = data['access_token']
+    journey = JOURNEYS[role]
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        journey_start = time.perf_counter()
+        ok = journey(session, recorder, rng, catalog, product_detail)
+        recorder.journey(role, ok, time.perf_counter() - journey_start)
+        if think_ms:
+            time.sleep(rng.expovariate(1000.0 / think_ms))
+    session.close()
+    return recorder.steps, recorder.journeys
+
+
+def report_section(latencies, errors, elapsed):
+    count = len(latencies)
+    section = summarize(latencies, errors, elapsed)
+    section['error_rate'] = round(errors / count, 4) if count else 0.0
+    return section
+
+
+def run(port, target, args, catalog):
+    users = [('customer', i) for i in range(args.customers)] + [('farmer', i) for i in range(args.farmers)]
+    product_detail = TARGET_STEPS[target]['product_detail']
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(users)) as pool:
+        futures = [
+            pool.submit(virtual_user, port, role, user_email(role, i, args.farmers_seeded), catalog,
+                        product_detail, args.duration, args.think_ms, args.seed * 1000 + n)
+            for n, (role, i) in enumerate(users)
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    steps, journeys = {}, {}
+    for user_steps, user_journeys in results:
+        for merged, collected in ((steps, user_steps), (journeys, user_journeys)):
+            for name, (latencies, errors) in collected.items():
+                total = merged.setdefault(name, ([], [0]))
+                total[0].extend(latencies)
+                total[1][0] += errors[0]
+
+    all_latencies = [value for latencies, _ in steps.values() for value in latencies]
+    all_errors = sum(errors[0] for _, errors in steps.values())
+    report = report_section(all_latencies, all_errors, elapsed)
+    report['steps'] = {name: report_section(lat, err[0], elapsed) for name, (lat, err) in sorted(steps.items())}
+    report['journeys'] = {}
+    for name, (latencies, failed) in sorted(journeys.items()):
+        # A journey's "requests" are completed journeys; "errors" are the ones a failed step cut short
+        stats = summarize(latencies, failed[0], elapsed)
+        attempts = stats['requests'] + stats['errors']
+        report['journeys'][name] = {
+            'completed': stats.pop('requests'), 'failed': stats.pop('errors'), 'per_sec': stats.pop('rps'),
+            'error_rate': round(failed[0] / attempts, 4) if attempts else 0.0, **stats,
+        }
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def emit(document, output):
+    line = json.dumps(document)
+    print(line, flush=True)
+    if output:
+        with open(output, 'a', encoding='utf-8') as out:
+            out.write(line + '\n')
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', default='simple_server', choices=('simple_server', 'fastapi', 'both'))
+    parser.add_argument('--mode', default='threaded', choices=('single', 'threaded', 'prefork'),
+                        help='simple_server SERVER_MODE')
+    parser.add_argument('--workers', type=int, default=4, help='simple_server WEB_THREADS or WEB_CONCURRENCY / uvicorn workers')
+    parser.add_argument('--customers', type=int, default=6, help='customer virtual users')
+    parser.add_argument('--farmers', type=int, default=2, help='farmer virtual users')
+    parser.add_argument('--farmers-seeded', type=int, default=5, help='farmers whose products are listed')
+    parser.add_argument('--products', type=int, default=40, help='products listed per seeded farmer')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds each virtual user runs')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='mean pause between journeys (0 = closed loop)')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='also append the JSON lines to this file')
+    args = parser.parse_args()
+
+    targets = ('simple_server', 'fastapi') if args.target == 'both' else (args.target,)
+    meta = {
+        'commit': git_commit(),
+        'started_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'customers': args.customers, 'farmers': args.farmers, 'duration_s': args.duration,
+        'think_ms': args.think_ms, 'products': args.farmers_seeded * args.products,
+    }
+    for target in targets:
+        if target == 'fastapi':
+            if not FastAPIServerProcess.available():
+                document = {'target': target, **meta, 'skipped': 'uvicorn is not installed'}
+                emit(document, args.output)
+                continue
+            server = FastAPIServerProcess(workers=args.workers)
+            settings = {'workers': args.workers}
+        else:
+            server = SimpleServerProcess(env={'SERVER_MODE': args.mode, 'WEB_THREADS': str(args.workers),
+                                                'WEB_CONCURRENCY': str(args.workers)})
+            settings = {'mode': args.mode, 'workers': args.workers}
+        with server:
+            catalog = seed(server.port, args)
+            document = {'target': target, **settings, **meta, **run(server.port, target, args, catalog)}
+        emit(document, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Concurrency stress test for POST /orders: many simultaneous checkouts, no oversell.
+
+Gives a few products a small stock, then fires concurrent checkouts from
+many customers at once. Afterwards it checks, straight from the database,
+that no product went negative and that stock sold equals the quantities on
+successful orders. Prints throughput as JSON and exits non-zero on oversell.
+
+Usage: python benchmarks/stress_checkout.py --checkouts 400 --concurrency 32 --stock 25
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _harness import SimpleServerProcess
+
+
+def call(port, method, path, body=None, token=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    payload = response.read()
+    conn.close()
+    return response.status, json.loads(payload) if payload else None
+
+
+def login(port, email, password):
+    return call(port, 'POST', '/auth/login', {'email': email, 'password': password})[1]['access_token']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--checkouts', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--customers', type=int, default=20)
+    parser.add_argument('--products', type=int, default=3, help='number of low-stock products')
+    parser.add_argument('--stock', type=int, default=25, help='starting stock per product')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    env = {'SERVER_MODE': 'threaded', 'WEB_THREADS': str(args.concurrency)}
+    with SimpleServerProcess(env=env) as server:
+        port = server.port
+        db_file = os.path.join(server.workdir, 'farmer_marketplace.db')
+
+        farmer_token = login(port, 'farmer@example.com', 'password123')
+        product_ids = list(range(1, args.products + 1))
+        for product_id in product_ids:
+            call(port, 'PUT', f'/products/{product_id}', {'quantity_available': args.stock}, farmer_token)
+
+        tokens = []
+        for i in range(args.customers):
+            email = f'stress{i}@example.com'
+            call(port, 'POST', '/auth/register', {
+                'email': email, 'password': 'pw', 'role': 'customer', 'first_name': 'Stress', 'last_name': str(i),
+            })
+            tokens.append(login(port, email, 'pw'))
+
+        carts = []
+        for i in range(args.checkouts):
+            chosen = rng.sample(product_ids, rng.randint(1, len(product_ids)))
+            carts.append((tokens[i % len(tokens)], {
+                'delivery_address': 'Stress Lane 1',
+                'items': [{'product_id': pid, 'quantity': rng.randint(1, 3)} for pid in chosen],
+            }))
+
+        def checkout(cart):
+            token, body = cart
+            start = time.perf_counter()
+            status, payload = call(port, 'POST', '/orders', body, token)
+            return status, payload, time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(checkout, carts))
+        elapsed = time.perf_counter() - start
+
+        conn = sqlite3.connect(db_file)
+        placeholders = ', '.join('?' * len(product_ids))
+        remaining = dict(conn.execute(
+            f"SELECT id, quantity_available FROM products WHERE id IN ({placeholders})", product_ids
+        ))
+        sold = dict(conn.execute(
+            f"SELECT product_id, COALESCE(SUM(quantity), 0) FROM order_items "
+            f"WHERE product_id IN ({placeholders}) GROUP BY product_id", product_ids
+        ))
+        conn.close()
+
+    statuses = {}
+    for status, _, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(r[2] for r in results)
+
+    oversold = {
+        pid: {'remaining': remaining[pid], 'sold': sold.get(pid, 0)}
+        for pid in product_ids
+        if remaining[pid] < 0 or sold.get(pid, 0) + remaining[pid] != args.stock
+    }
+    print(json.dumps({
+        'checkouts': args.checkouts,
+        'concurrency': args.concurrency,
+        'statuses': statuses,
+        'checkouts_per_sec': round(args.checkouts / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        'stock_sold': {pid: sold.get(pid, 0) for pid in product_ids},
+        'stock_remaining': remaining,
+    }))
+
+    if oversold:
+        print(f"❌ Oversell detected: {oversold}")
+        sys.exit(1)
+    if statuses.get(500):
+        print(f"❌ {statuses[500]} checkouts failed with a server error")
+        sys.exit(1)
+    print("✅ No oversell: stock sold + stock remaining == starting stock for every product")
+
+
+if __name__ == '__main__':
+    main()
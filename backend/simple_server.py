@@ -1,14 +1,62 @@
 #!/usr/bin/env python3
 """Simple HTTP server for the farmer marketplace API."""
 
-import json
+import argparse
 import hashlib
+import itertools
 import secrets
+import selectors
 import time
+import signal
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import os
 
+from app.utils.catalog_cache import CatalogCache, capture_body, listing_state
+from app.utils.compression import StreamCompressor, compress_response_body, compression_stats, negotiate_encoding
+from app.utils.json_stream import STREAM_CHUNK_SIZE, iter_cursor, iter_json_array
+from app.utils.lru import LRUCache
+from app.utils.metrics import (
+    METRICS_ENABLED,
+    PROMETHEUS_CONTENT_TYPE,
+    UNMATCHED_ROUTE,
+    SERVER_TIMING,
+    add_db_time,
+    current_timings,
+    finish_request_timing,
+    map_rows,
+    request_metrics,
+    start_request_timing,
+    timed_iter,
+    timed_phase,
+)
+from app.utils.migrations import AddColumn, Migration, latest_version, migrate
+from app.utils.search import (
+    POSTGRES_PRODUCT_SEARCH_DDL, RELEVANCE, SQLITE_PRODUCT_SEARCH_DDL, match_ids_sql, match_sql, search_expression,
+    search_terms,
+)
+from app.utils.slow_query import explain as explain_query, slow_query_log
+from app.utils.suggest import (
+    CATEGORY, POSTGRES_SUGGEST_DDL, PRODUCT, SQLITE_SUGGEST_DDL, SUGGEST_MAX_RESULTS, SUGGEST_SOURCES_SQL,
+    SUGGEST_VERSION_SQL, SuggestIndex, rows_to_counts,
+)
+from app.utils.pagination import PRODUCT_SORTS, InvalidCursor, decode_cursor, decode_product_cursor, encode_cursor
+from app.utils.sqlite_tuning import apply_sqlite_pragmas, describe_sqlite_pragmas
+from app.utils.serialization import dumps as json_dumps, encoder_name as json_encoder_name, loads as json_loads
+from app.utils.router import MethodNotAllowed, RouteNotFound, Router
+from app.utils.facets import (
+    POSTGRES_PRODUCT_FACETS_DDL, SQLITE_PRODUCT_FACETS_DDL, facet_response, facet_sql,
+)
+from app.utils.etag import (
+    CATALOG_CACHE_CONTROL, PRIVATE_CACHE_CONTROL, POSTGRES_TABLE_VERSION_DDL, SQLITE_TABLE_VERSION_DDL,
+    etag_matches, make_etag,
+)
+
 # Try to load environment variables, fallback if not available
 try:
     from dotenv import load_dotenv
@@ -36,30 +84,591 @@ else:
         import sqlite3
         DB_FILE = "farmer_marketplace.db"
 
-# Simple in-memory token store (in production, use Redis or database)
-active_tokens = {}
+# Concurrency settings
+# SERVER_MODE: "threaded" (bounded thread pool), "prefork" (N worker processes) or "single"
+SERVER_MODE = os.getenv('SERVER_MODE', 'threaded').lower()
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1))  # Pre-forked processes
+# Threads serving requests in threaded mode; mostly waiting on the database, so not tied to CPUs
+WEB_THREADS = int(os.getenv('WEB_THREADS', 32))
+LISTEN_BACKLOG = int(os.getenv('LISTEN_BACKLOG', 128))
+
+# Order listing
+ORDER_STATUSES = ('pending', 'accepted', 'preparing', 'ready', 'delivered', 'cancelled')
+ORDERS_MAX_LIMIT = int(os.getenv('ORDERS_MAX_LIMIT', 500))
+
+# Product listing
+PRODUCTS_MAX_LIMIT = int(os.getenv('PRODUCTS_MAX_LIMIT', 100))
+
+# Token store settings
+# TOKEN_STORE: "memory" (this process only), "database" (shared by all workers) or "auto"
+TOKEN_STORE = os.getenv('TOKEN_STORE', 'auto').lower()
+TOKEN_TTL = float(os.getenv('TOKEN_TTL', 7 * 24 * 3600))  # Seconds a login stays valid
+TOKEN_MAX_ENTRIES = int(os.getenv('TOKEN_MAX_ENTRIES', 100000))  # LRU bound for the memory store
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))  # Local cache in front of the database store
+TOKEN_CACHE_TTL = float(os.getenv('TOKEN_CACHE_TTL', 30))
+TOKEN_SWEEP_INTERVAL = float(os.getenv('TOKEN_SWEEP_INTERVAL', 300))
+
+# HTTP/1.1 persistent connection settings
+HTTP_KEEPALIVE = os.getenv('HTTP_KEEPALIVE', 'true').lower() == 'true'
+KEEPALIVE_TIMEOUT = float(os.getenv('KEEPALIVE_TIMEOUT', 5))  # Idle seconds before closing
+KEEPALIVE_MAX_REQUESTS = int(os.getenv('KEEPALIVE_MAX_REQUESTS', 100))  # Requests per connection
+
+# Connection pool settings
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', max(10, WEB_THREADS)))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = float(os.getenv('DB_POOL_RECYCLE', 300))  # Max connection age in seconds
+DB_POOL_PING_AFTER = float(os.getenv('DB_POOL_PING_AFTER', 30))  # Ping connections idle this long
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within DB_POOL_TIMEOUT."""
+
+
+class TimedCursor:
+    """Cursor proxy that times each statement from execute through its last fetch.
+
+    The time is charged to the request's RequestTimings (metrics, Server-Timing). A
+    statement slower than SLOW_QUERY_MS is written to the slow-query log once it is done:
+    on the fetch that exhausts it, the next execute, or close() of the cursor or connection.
+    """
+
+    __slots__ = ('_cursor', '_timings', '_raw_conn', '_sql', '_params', '_elapsed')
+
+    def __init__(self, cursor, timings, raw_conn):
+        self._cursor = cursor
+        self._timings = timings
+        self._raw_conn = raw_conn
+        self._sql = None
+        self._params = None
+        self._elapsed = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _charge(self, start):
+        seconds = time.perf_counter() - start
+        self._elapsed += seconds
+        if self._timings is not None:
+            self._timings.add_db(seconds)
+
+    def _begin(self, sql, params):
+        if self._sql is not None:
+            self.finish()
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+
+    def finish(self):
+        """Close out the current statement, logging it if it was slow."""
+        sql, self._sql = self._sql, None
+        if sql is not None and slow_query_log.is_slow(self._elapsed):
+            params, raw_conn = self._params, self._raw_conn
+            dialect = 'sqlite' if USE_SQLITE else 'postgresql'
+            slow_query_log.record('simple_server', sql, params, self._elapsed,
+                                  lambda: explain_query(raw_conn, dialect, sql, params))
+
+    def execute(self, sql, params=None):
+        self._begin(sql, params)
+        start = time.perf_counter()
+        try:
+            if params is None:
+                self._cursor.execute(sql)
+            else:
+                self._cursor.execute(sql, params)
+        finally:
+            self._charge(start)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._begin(sql, None)
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_params)
+        finally:
+            self._charge(start)
+        self.finish()
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            row = self._cursor.fetchone()
+        finally:
+            self._charge(start)
+        if row is None:
+            self.finish()
+        return row
+
+    def fetchmany(self, size=None):
+        size = size or self._cursor.arraysize
+        start = time.perf_counter()
+        try:
+            rows = self._cursor.fetchmany(size)
+        finally:
+            self._charge(start)
+        if len(rows) < size:
+            self.finish()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return self._cursor.fetchall()
+        finally:
+            self._charge(start)
+            self.finish()
+
+    def close(self):
+        self.finish()
+        self._cursor.close()
+
+
+class PooledConnection:
+    """Proxy around a pooled connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._cursors = []
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        timings = current_timings()
+        if slow_query_log.enabled:
+            cursor = TimedCursor(cursor, timings, self._raw)
+            self._cursors.append(cursor)
+            return cursor
+        return cursor if timings is None else TimedCursor(cursor, timings, self._raw)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            self._raw.commit()
+        finally:
+            add_db_time(time.perf_counter() - start)
+
+    def close(self):
+        if self._raw is not None:
+            for cursor in self._cursors:
+                cursor.finish()
+            raw, self._raw = self._raw, None
+            self._pool.release(raw)
+            _lease_done(self)
+
+
+class ConnectionPool:
+    """Book-keeping shared by the SQLite and PostgreSQL pools."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recycled = 0
+        self._born = {}        # id(raw) -> creation time
+        self._last_used = {}   # id(raw) -> last release time
+
+    def _track_new(self, raw):
+        now = time.monotonic()
+        self._born[id(raw)] = now
+        self._last_used[id(raw)] = now
+
+    def _forget(self, raw):
+        self._born.pop(id(raw), None)
+        self._last_used.pop(id(raw), None)
+        with self._lock:
+            self._recycled += 1
+
+    def _is_stale(self, raw):
+        born = self._born.get(id(raw))
+        return born is not None and time.monotonic() - born > DB_POOL_RECYCLE
+
+    def _needs_ping(self, raw):
+        last = self._last_used.get(id(raw))
+        return last is None or time.monotonic() - last > DB_POOL_PING_AFTER
+
+    def _checked_out(self, waited):
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def _checked_in(self, raw):
+        if id(raw) in self._born:
+            self._last_used[id(raw)] = time.monotonic()
+        with self._lock:
+            self._in_use -= 1
+
+    def connection(self):
+        """Check out a healthy connection wrapped in a PooledConnection."""
+        start = time.perf_counter()
+        raw = self._acquire()
+        self._checked_out(time.perf_counter() - start)
+        return PooledConnection(self, raw)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "in_use": self._in_use,
+                "idle": self._idle_count(),
+                "max_size": self.max_size,
+                "checkouts": self._checkouts,
+                "wait_time_total_ms": round(self._wait_total * 1000, 3),
+                "wait_time_max_ms": round(self._wait_max * 1000, 3),
+                "recycled": self._recycled,
+            }
+
+
+class SQLiteConnectionPool(ConnectionPool):
+    """Reuses one SQLite connection per thread instead of reconnecting per request."""
+
+    backend = "sqlite"
+
+    def __init__(self, path, max_size):
+        super().__init__()
+        self.path = path
+        self.max_size = max_size
+        self._local = threading.local()
+        self._open = 0
+
+    def _connect(self):
+        raw = sqlite3.connect(self.path)
+        apply_sqlite_pragmas(raw)
+        self._track_new(raw)
+        with self._lock:
+            self._open += 1
+        return raw
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except sqlite3.Error:
+            pass
+        self._forget(raw)
+        with self._lock:
+            self._open -= 1
+
+    def _acquire(self):
+        raw = getattr(self._local, 'conn', None)
+        if raw is not None and (self._is_stale(raw) or not self._healthy(raw)):
+            self._discard(raw)
+            raw = None
+        if raw is None:
+            raw = self._connect()
+            self._local.conn = raw
+        return raw
+
+    def _healthy(self, raw):
+        if not self._needs_ping(raw):
+            return True
+        try:
+            raw.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def release(self, raw):
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except sqlite3.Error:
+            self._local.conn = None
+            self._discard(raw)
+        self._checked_in(raw)
+
+    def _idle_count(self):
+        return self._open - self._in_use
+
+
+class PostgresConnectionPool(ConnectionPool):
+    """psycopg2 ThreadedConnectionPool that waits for a free slot and drops broken connections."""
+
+    backend = "postgresql"
+
+    def __init__(self, dsn, min_size, max_size):
+        super().__init__()
+        from psycopg2 import pool as pg_pool
+        self.max_size = max_size
+        self._pool = pg_pool.ThreadedConnectionPool(
+            min_size, max_size, dsn, cursor_factory=RealDictCursor
+        )
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise PoolTimeout(f"No database connection available after {DB_POOL_TIMEOUT}s")
+        try:
+            for _ in range(self.max_size + 1):
+                raw = self._pool.getconn()
+                if id(raw) not in self._born:
+                    self._track_new(raw)
+                if not raw.closed and not self._is_stale(raw) and self._healthy(raw):
+                    return raw
+                self._pool.putconn(raw, close=True)
+                self._forget(raw)
+            raise psycopg2.OperationalError("Could not obtain a working database connection")
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _healthy(self, raw):
+        if not self._needs_ping(raw):
+            return True
+        try:
+            with raw.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            raw.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def release(self, raw):
+        broken = raw.closed or raw.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        try:
+            self._pool.putconn(raw, close=broken)
+        finally:
+            if broken:
+                self._forget(raw)
+            self._checked_in(raw)
+            self._slots.release()
+
+    def _idle_count(self):
+        return len(self._pool._pool)
+
+
+_db_pool = None
+_db_pool_pid = None
+_db_pool_lock = threading.Lock()
+_leases = threading.local()
+
+def get_db_pool():
+    """Return this process's connection pool, creating it on first use (and after fork)."""
+    global _db_pool, _db_pool_pid
+    if _db_pool is None or _db_pool_pid != os.getpid():
+        with _db_pool_lock:
+            if _db_pool is None or _db_pool_pid != os.getpid():
+                if USE_SQLITE:
+                    _db_pool = SQLiteConnectionPool(DB_FILE, DB_POOL_MAX)
+                else:
+                    _db_pool = PostgresConnectionPool(DATABASE_URL, DB_POOL_MIN, DB_POOL_MAX)
+                _db_pool_pid = os.getpid()
+    return _db_pool
 
 def get_db_connection():
-    """Get database connection based on environment."""
-    if USE_SQLITE:
-        return sqlite3.connect(DB_FILE)
-    else:
-        return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+    """Check out a pooled database connection; call close() to return it."""
+    with timed_phase('acquire'):
+        conn = get_db_pool().connection()
+    if not hasattr(_leases, 'open'):
+        _leases.open = []
+    _leases.open.append(conn)
+    return conn
+
+def _lease_done(conn):
+    open_leases = getattr(_leases, 'open', None)
+    if open_leases and conn in open_leases:
+        open_leases.remove(conn)
+
+def release_db_connections():
+    """Return any connection the current thread forgot to close (early returns, errors)."""
+    for conn in list(getattr(_leases, 'open', ())):
+        conn.close()
+
+class MemoryTokenStore:
+    """Tokens held in this process, expiring after TOKEN_TTL and bounded by LRU eviction."""
+
+    backend = "memory"
+
+    def __init__(self, ttl, max_entries):
+        self._tokens = LRUCache(max_entries, ttl)
+
+    def get(self, token):
+        return self._tokens.get(token)
+
+    def set(self, token, user_data):
+        self._tokens.set(token, user_data)
+
+    def update(self, token, user_data):
+        self._tokens.replace(token, user_data)
+
+    def delete(self, token):
+        self._tokens.pop(token)
+
+    def stats(self):
+        return {"backend": self.backend, **self._tokens.stats()}
+
+
+class DatabaseTokenStore:
+    """Tokens in the auth_tokens table so every worker process sees every login.
+
+    Only a SHA-256 of each token is stored. A small local LRU cache answers repeat
+    lookups without a query; entries live at most TOKEN_CACHE_TTL seconds, which bounds
+    how long another worker's logout or profile change can go unnoticed.
+    """
+
+    backend = "database"
+
+    def __init__(self, ttl, cache_size, cache_ttl, sweep_interval):
+        self.ttl = ttl
+        self.cache_ttl = cache_ttl
+        self.sweep_interval = sweep_interval
+        self._cache = LRUCache(cache_size, cache_ttl)
+        self._next_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+        self._placeholder = '?' if USE_SQLITE else '%s'
+
+    @staticmethod
+    def _hash(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        user_data = self._cache.get(token)
+        if user_data is not None:
+            return user_data
+        
+        now = time.time()
+        p = self._placeholder
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT user_data, expires_at FROM auth_tokens WHERE token_hash = {p} AND expires_at > {p}",
+                (self._hash(token), now)
+            )
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        
+        raw, expires_at = row if USE_SQLITE else (row['user_data'], row['expires_at'])
+        user_data = json_loads(raw)
+        self._cache.set(token, user_data, ttl=min(self.cache_ttl, expires_at - now))
+        return user_data
+
+    def set(self, token, user_data):
+        p = self._placeholder
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"INSERT INTO auth_tokens (token_hash, user_data, expires_at) VALUES ({p}, {p}, {p})",
+                (self._hash(token), json_dumps(user_data).decode(), time.time() + self.ttl)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        self._cache.set(token, user_data)
+        self._maybe_sweep()
+
+    def update(self, token, user_data):
+        p = self._placeholder
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE auth_tokens SET user_data = {p} WHERE token_hash = {p}",
+                (json_dumps(user_data).decode(), self._hash(token))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        self._cache.replace(token, user_data)
+
+    def delete(self, token):
+        p = self._placeholder
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"DELETE FROM auth_tokens WHERE token_hash = {p}", (self._hash(token),))
+            conn.commit()
+        finally:
+            conn.close()
+        self._cache.pop(token)
+
+    def sweep(self):
+        """Delete expired tokens (uses the expires_at index)."""
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"DELETE FROM auth_tokens WHERE expires_at <= {self._placeholder}", (time.time(),))
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def _maybe_sweep(self):
+        # Piggyback on logins instead of running a sweeper thread in every worker
+        now = time.monotonic()
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep()
+        finally:
+            self._sweep_lock.release()
+
+    def stats(self):
+        return {"backend": self.backend, "local_cache": self._cache.stats()}
 
-def init_db():
-    """Initialize database."""
-    if USE_SQLITE:
-        init_sqlite_db()
-    else:
-        init_postgres_db()
 
-def init_sqlite_db():
-    """Initialize SQLite database."""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+def create_token_store(mode=None):
+    """Build the token store selected by TOKEN_STORE ("auto" shares tokens when ``mode`` pre-forks).
     
-    # Create users table
-    cursor.execute('''
+    ``mode`` is the server mode actually run, SERVER_MODE by default.
+    """
+    backend = TOKEN_STORE
+    if backend == 'auto':
+        backend = 'database' if (mode or SERVER_MODE) == 'prefork' else 'memory'
+    if backend == 'database':
+        return DatabaseTokenStore(TOKEN_TTL, TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL, TOKEN_SWEEP_INTERVAL)
+    return MemoryTokenStore(TOKEN_TTL, TOKEN_MAX_ENTRIES)
+
+token_store = create_token_store()
+
+def load_suggestions():
+    """Product and category names with their active product counts (no farm profiles here)."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        counts = {}
+        for kind in (PRODUCT, CATEGORY):
+            cursor.execute(SUGGEST_SOURCES_SQL[kind])
+            rows = cursor.fetchall()
+            if not USE_SQLITE:
+                rows = [(row['name'], row['products']) for row in rows]
+            counts.update(rows_to_counts(kind, rows))
+        return counts
+    finally:
+        conn.close()
+
+def read_suggestion_version():
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SUGGEST_VERSION_SQL)
+        row = cursor.fetchone()
+        return None if row is None else row[0] if USE_SQLITE else row['version']
+    finally:
+        conn.close()
+
+suggest_index = SuggestIndex(load_suggestions, read_suggestion_version)
+
+catalog_cache = CatalogCache()
+
+# Schema migrations, applied in order and recorded in schema_version.
+# Statements are idempotent so databases created before versioning upgrade cleanly.
+SQLITE_MIGRATIONS = [
+    Migration(1, 'initial schema', [
+        '''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             email TEXT UNIQUE NOT NULL,
@@ -71,20 +680,16 @@ def init_sqlite_db():
             is_active BOOLEAN DEFAULT 1,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
-    
-    # Create categories table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS categories (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT UNIQUE NOT NULL,
             description TEXT,
             is_active BOOLEAN DEFAULT 1
         )
-    ''')
-    
-    # Create products table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS products (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             farmer_id INTEGER NOT NULL,
@@ -100,10 +705,8 @@ def init_sqlite_db():
             FOREIGN KEY (farmer_id) REFERENCES users (id),
             FOREIGN KEY (category_id) REFERENCES categories (id)
         )
-    ''')
-    
-    # Create orders table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS orders (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             customer_id INTEGER NOT NULL,
@@ -118,10 +721,8 @@ def init_sqlite_db():
             FOREIGN KEY (customer_id) REFERENCES users (id),
             FOREIGN KEY (farmer_id) REFERENCES users (id)
         )
-    ''')
-    
-    # Create order_items table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS order_items (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             order_id INTEGER NOT NULL,
@@ -132,20 +733,43 @@ def init_sqlite_db():
             FOREIGN KEY (order_id) REFERENCES orders (id),
             FOREIGN KEY (product_id) REFERENCES products (id)
         )
-    ''')
-    
-    # Insert sample data
-    insert_sample_data_sqlite(cursor)
-    conn.commit()
-    conn.close()
-
-def init_postgres_db():
-    """Initialize PostgreSQL database."""
-    conn = psycopg2.connect(DATABASE_URL)
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute('''
+        ''',
+    ]),
+    Migration(2, 'auth tokens', [
+        '''
+        CREATE TABLE IF NOT EXISTS auth_tokens (
+            token_hash TEXT PRIMARY KEY,
+            user_data TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_auth_tokens_expires_at ON auth_tokens (expires_at)",
+    ]),
+    # Change counters behind catalog ETags
+    Migration(3, 'table versions', SQLITE_TABLE_VERSION_DDL),
+    Migration(4, 'foreign key indexes', [
+        "CREATE INDEX IF NOT EXISTS idx_products_farmer_id ON products (farmer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_category_id ON products (category_id)",
+        # Owner plus the history sort key, so GET /orders reads its page straight off the index
+        "CREATE INDEX IF NOT EXISTS idx_orders_customer_id ON orders (customer_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_farmer_id ON orders (farmer_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id)",
+    ]),
+    # Sort keys of GET /products/, each with id as the tie-breaker so keyset pages seek into the index
+    Migration(5, 'product listing sorts', [
+        AddColumn('products', 'harvest_date', 'DATE'),
+        "CREATE INDEX IF NOT EXISTS idx_products_created_at ON products (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_price_per_unit ON products (price_per_unit, id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_harvest_date ON products (harvest_date, id)",
+    ]),
+    Migration(6, 'product search', SQLITE_PRODUCT_SEARCH_DDL),
+    Migration(7, 'suggestion counter', SQLITE_SUGGEST_DDL),
+    Migration(8, 'product facet counts', SQLITE_PRODUCT_FACETS_DDL),
+]
+
+POSTGRES_MIGRATIONS = [
+    Migration(1, 'initial schema', [
+        '''
         CREATE TABLE IF NOT EXISTS users (
             id SERIAL PRIMARY KEY,
             email VARCHAR(255) UNIQUE NOT NULL,
@@ -157,20 +781,16 @@ def init_postgres_db():
             is_active BOOLEAN DEFAULT TRUE,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
-    
-    # Create categories table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS categories (
             id SERIAL PRIMARY KEY,
             name VARCHAR(100) UNIQUE NOT NULL,
             description TEXT,
             is_active BOOLEAN DEFAULT TRUE
         )
-    ''')
-    
-    # Create products table
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS products (
             id SERIAL PRIMARY KEY,
             farmer_id INTEGER NOT NULL,
@@ -186,12 +806,142 @@ def init_postgres_db():
             FOREIGN KEY (farmer_id) REFERENCES users (id),
             FOREIGN KEY (category_id) REFERENCES categories (id)
         )
-    ''')
-    
-    # Insert sample data
-    insert_sample_data_postgres(cursor)
-    conn.commit()
-    conn.close()
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS orders (
+            id SERIAL PRIMARY KEY,
+            customer_id INTEGER NOT NULL,
+            farmer_id INTEGER NOT NULL,
+            status VARCHAR(20) DEFAULT 'pending',
+            total_amount DECIMAL(10, 2) NOT NULL,
+            delivery_address TEXT NOT NULL,
+            delivery_date DATE,
+            delivery_time VARCHAR(50),
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (customer_id) REFERENCES users (id),
+            FOREIGN KEY (farmer_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id SERIAL PRIMARY KEY,
+            order_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price DECIMAL(10, 2) NOT NULL,
+            total_price DECIMAL(10, 2) NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders (id),
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+        ''',
+    ]),
+    Migration(2, 'auth tokens', [
+        '''
+        CREATE TABLE IF NOT EXISTS auth_tokens (
+            token_hash VARCHAR(64) PRIMARY KEY,
+            user_data TEXT NOT NULL,
+            expires_at DOUBLE PRECISION NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_auth_tokens_expires_at ON auth_tokens (expires_at)",
+    ]),
+    # Change counters behind catalog ETags
+    Migration(3, 'table versions', POSTGRES_TABLE_VERSION_DDL),
+    Migration(4, 'foreign key indexes', [
+        "CREATE INDEX IF NOT EXISTS idx_products_farmer_id ON products (farmer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_category_id ON products (category_id)",
+        # Owner plus the history sort key, so GET /orders reads its page straight off the index
+        "CREATE INDEX IF NOT EXISTS idx_orders_customer_id ON orders (customer_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_farmer_id ON orders (farmer_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id)",
+    ]),
+    # Sort keys of GET /products/, each with id as the tie-breaker so keyset pages seek into the index
+    Migration(5, 'product listing sorts', [
+        AddColumn('products', 'harvest_date', 'DATE'),
+        "CREATE INDEX IF NOT EXISTS idx_products_created_at ON products (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_price_per_unit ON products (price_per_unit, id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_harvest_date ON products (harvest_date, id)",
+    ]),
+    Migration(6, 'product search', POSTGRES_PRODUCT_SEARCH_DDL),
+    Migration(7, 'suggestion counter', POSTGRES_SUGGEST_DDL),
+    Migration(8, 'product facet counts', POSTGRES_PRODUCT_FACETS_DDL),
+]
+
+def init_db(verbose=True):
+    """Bring the schema up to date (no-op apart from a version check when current)."""
+    if USE_SQLITE:
+        conn = sqlite3.connect(DB_FILE)
+        apply_sqlite_pragmas(conn)
+        migrations, dialect = SQLITE_MIGRATIONS, 'sqlite'
+    else:
+        conn = psycopg2.connect(DATABASE_URL)
+        migrations, dialect = POSTGRES_MIGRATIONS, 'postgresql'
+    try:
+        applied = migrate(conn, migrations, dialect)
+        if verbose or applied:
+            report_migrations(applied, migrations)
+    finally:
+        conn.close()
+    return latest_version(migrations)
+
+def seed_sample_data():
+    """Insert the sample categories, farmer and products (``python simple_server.py seed``)."""
+    init_db()
+    if USE_SQLITE:
+        conn = sqlite3.connect(DB_FILE)
+        apply_sqlite_pragmas(conn)
+    else:
+        conn = psycopg2.connect(DATABASE_URL)
+    try:
+        if USE_SQLITE:
+            insert_sample_data_sqlite(conn.cursor())
+        else:
+            insert_sample_data_postgres(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+    print("🌱 Sample data is in place")
+
+# Set once the background schema check has finished; until then only /health* is served
+schema_ready = threading.Event()
+schema_status = {"status": "starting", "schema_version": None}
+
+def prepare_schema(verbose=True):
+    """Startup task: migrate in the background, retrying until the database is reachable."""
+    delay = 1
+    while True:
+        try:
+            version = init_db(verbose)
+            break
+        except Exception as e:
+            schema_status.update(status="error", detail=str(e))
+            print(f"❌ Schema check failed ({e}), retrying in {delay}s")
+            sys.stdout.flush()
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+    if USE_SQLITE and verbose:
+        conn = get_db_connection()
+        print(f"⚡ SQLite {describe_sqlite_pragmas(conn)}")
+        conn.close()
+    schema_status.clear()
+    schema_status.update(status="ready", schema_version=version)
+    schema_ready.set()
+    if verbose:
+        print("✨ Database ready")
+        sys.stdout.flush()
+
+def start_schema_check(verbose=True):
+    """Run prepare_schema on a daemon thread so the server can answer /health meanwhile."""
+    threading.Thread(target=prepare_schema, args=(verbose,), name='schema-check', daemon=True).start()
+
+def report_migrations(applied, migrations):
+    """Print what init_db did to the schema."""
+    if applied:
+        for migration in applied:
+            print(f"🧱 Applied migration {migration.version}: {migration.name}")
+    else:
+        print(f"🧱 Schema is current (version {latest_version(migrations)})")
 
 def insert_sample_data_sqlite(cursor):
     """Insert sample data for SQLite."""
@@ -308,82 +1058,394 @@ def verify_password(password, hashed):
     """Verify password."""
     return hash_password(password) == hashed
 
+# Route table for APIHandler, filled in by the decorators on its handler methods
+api_routes = Router()
+
 class APIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' if HTTP_KEEPALIVE else 'HTTP/1.0'
+    timeout = KEEPALIVE_TIMEOUT if HTTP_KEEPALIVE else None
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self._requests_on_connection = 0
+        self.parked = False
+
+    def handle(self):
+        """Serve requests until the connection closes, or goes idle on a server that parks it."""
+        self.close_connection = True
+        self._serve_requests()
+
+    def resume(self):
+        """Continue a parked connection once its next request starts to arrive."""
+        self.parked = False
+        self._serve_requests()
+
+    def _serve_requests(self):
+        self.handle_one_request()
+        while not self.close_connection:
+            if getattr(self.server, 'parks_idle_connections', False) and not self._request_buffered():
+                # The server watches the socket and hands it back to a worker (see ThreadPoolHTTPServer)
+                self.parked = True
+                return
+            self.handle_one_request()
+
+    def _request_buffered(self):
+        """Whether the next request is already readable without waiting (pipelined or just sent)."""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return True  # Let handle_one_request see the error and close
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def finish(self):
+        if not self.parked:
+            super().finish()
+
+    def handle_one_request(self):
+        self._body_consumed = False
+        self.user = None
+        self.auth_token = None
+        try:
+            super().handle_one_request()
+        finally:
+            release_db_connections()
+        if not self.close_connection:
+            self._drain_request_body()
+
+    def _drain_request_body(self):
+        """Discard an unread request body so the next request on the connection parses cleanly."""
+        if self._body_consumed:
+            return
+        content_length = int(self.headers.get('Content-Length', 0) or 0)
+        if content_length:
+            self.rfile.read(content_length)
+            self._body_consumed = True
+
+    def _end_headers_with_keepalive(self):
+        """Finish the header block, advertising or ending the persistent connection."""
+        self._requests_on_connection += 1
+        if self.protocol_version == 'HTTP/1.1':
+            if self._requests_on_connection >= KEEPALIVE_MAX_REQUESTS:
+                self.close_connection = True
+            if self.close_connection:
+                self.send_header('Connection', 'close')
+            else:
+                remaining = KEEPALIVE_MAX_REQUESTS - self._requests_on_connection
+                self.send_header('Keep-Alive', f'timeout={int(KEEPALIVE_TIMEOUT)}, max={remaining}')
+        if SERVER_TIMING:
+            self._send_server_timing_header()
+        self.end_headers()
+    
+    def _send_server_timing_header(self):
+        """Report where the request's time went so far (see app.utils.metrics)."""
+        timings = current_timings()
+        if timings is not None:
+            self.send_header('Server-Timing', timings.server_timing())
+            self.send_header('Timing-Allow-Origin', '*')
+
     def _set_cors_headers(self):
         """Set CORS headers."""
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
     
-    def _send_json_response(self, data, status=200):
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+    
+    def _send_json_response(self, data, status=200, headers=None):
         """Send JSON response."""
+        with timed_phase('encode'):
+            body = json_dumps(data)
+        self._send_json_body(body, status, headers)
+    
+    def _send_json_body(self, body, status=200, headers=None):
+        """Send an already encoded JSON body with Content-Length."""
+        with timed_phase('encode'):
+            body, encoding = compress_response_body(body, 'application/json', self.headers.get('Accept-Encoding'))
         self.send_response(status)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self._set_cors_headers()
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self._end_headers_with_keepalive()
+        self.wfile.write(body)
+        self._response_bytes = len(body)
+    
+    def _send_json_stream(self, chunks, status=200, headers=None):
+        """Send a JSON body produced incrementally (see app.utils.json_stream).
+        
+        Bodies that fit in one STREAM_CHUNK_SIZE buffer go out as a normal response. Larger
+        ones use chunked transfer encoding (or close-delimited for HTTP/1.0 clients), compressed
+        chunk by chunk, so the full body is never held in memory.
+        """
+        chunks = timed_iter('encode', chunks)
+        buffered = []
+        size = 0
+        for chunk in chunks:
+            buffered.append(chunk)
+            size += len(chunk)
+            if size >= STREAM_CHUNK_SIZE:
+                break
+        else:
+            self._send_json_body(b''.join(buffered), status, headers)
+            return
+        
+        encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+        compressor = StreamCompressor(encoding) if encoding else None
+        chunked = self.request_version == 'HTTP/1.1'
+        if not chunked:
+            self.close_connection = True
+        
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+            if SERVER_TIMING:
+                # The header covers the time to first byte; the trailer has the full request
+                self.send_header('Trailer', 'Server-Timing')
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self._set_cors_headers()
+        self._end_headers_with_keepalive()
+        
+        raw_size = sent_size = 0
+        
+        def write(data):
+            nonlocal sent_size
+            if not data:
+                return
+            sent_size += len(data)
+            if chunked:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            else:
+                self.wfile.write(data)
+        
+        try:
+            for chunk in itertools.chain(buffered, chunks):
+                raw_size += len(chunk)
+                if compressor:
+                    with timed_phase('encode'):
+                        chunk = compressor.compress(chunk) + compressor.flush()
+                write(chunk)
+            if compressor:
+                with timed_phase('encode'):
+                    chunk = compressor.finish()
+                write(chunk)
+            if chunked:
+                timings = current_timings() if SERVER_TIMING else None
+                trailer = f'Server-Timing: {timings.server_timing()}\r\n' if timings else ''
+                self.wfile.write(b'0\r\n%s\r\n' % trailer.encode('latin-1'))
+        except Exception as e:
+            # Headers are already out: drop the connection so the client sees a truncated body
+            self.log_error("Streaming response aborted: %s", e)
+            self.close_connection = True
+        finally:
+            compression_stats.record(raw_size, sent_size, encoding)
+            self._response_bytes = sent_size
+    
+    def _streaming_cursor(self, conn, name):
+        """Cursor for reads that are streamed out with fetchmany.
+        
+        On PostgreSQL this is a named (server-side) cursor, so rows arrive in batches instead of
+        the driver buffering the whole result. SQLite cursors already step lazily.
+        """
+        if USE_SQLITE:
+            return conn.cursor()
+        return conn.cursor(name=f'{name}_stream')
+    
+    def _catalog_versions(self, conn, tables):
+        """Current change counters for ``tables`` (None where unknown)."""
+        cursor = conn.cursor()
+        placeholders = ', '.join(['?' if USE_SQLITE else '%s'] * len(tables))
+        cursor.execute(
+            f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})",
+            tuple(tables)
+        )
+        if USE_SQLITE:
+            versions = dict(cursor.fetchall())
+        else:
+            versions = {row['table_name']: row['version'] for row in cursor.fetchall()}
+        return [versions.get(t) for t in tables]
+    
+    def _catalog_etag(self, conn, tables, *parts, versions=None):
+        """Strong ETag for a catalog response from the table change counters.
+        
+        ``versions`` are counters read earlier (a cached body's), so no query runs.
+        """
+        if versions is None:
+            versions = self._catalog_versions(conn, tables)
+        encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+        return make_etag(versions, self.path, *parts, encoding=encoding)
+    
+    def _cache_headers(self, etag, cache_control):
+        """ETag and Cache-Control headers for a cacheable 200 response."""
+        if etag is None:
+            return {}
+        return {'ETag': etag, 'Cache-Control': cache_control}
+    
+    def _send_not_modified(self, etag, cache_control):
+        """Send 304 Not Modified for a conditional GET."""
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        self.send_header('Vary', 'Accept-Encoding')
+        self._set_cors_headers()
+        self._end_headers_with_keepalive()
     
     def _get_request_body(self):
         """Get request body as JSON."""
         content_length = int(self.headers.get('Content-Length', 0))
+        self._body_consumed = True
         if content_length:
             body = self.rfile.read(content_length)
-            return json.loads(body.decode())
+            return json_loads(body)
         return {}
     
     def do_OPTIONS(self):
         """Handle preflight requests."""
         self.send_response(200)
+        self.send_header('Content-Length', '0')
         self._set_cors_headers()
-        self.end_headers()
+        self._end_headers_with_keepalive()
+    
+    def _dispatch(self):
+        """Handle a request, recording its route, status, latency, DB time and size."""
+        if not (METRICS_ENABLED or SERVER_TIMING):
+            self._route_request()
+            return
+        timings = start_request_timing()
+        self._status = 500
+        self._response_bytes = 0
+        self._route_label = UNMATCHED_ROUTE
+        try:
+            self._route_request()
+        finally:
+            finish_request_timing()
+            if METRICS_ENABLED:
+                request_metrics.observe(self.command, self._route_label, self._status, timings.elapsed(),
+                                        timings.db_seconds, self._response_bytes)
+    
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+    
+    def _route_request(self):
+        """Route the request: match the path, run auth middleware, call the handler."""
+        path = urlparse(self.path).path
+        try:
+            route, params = api_routes.resolve(self.command, path)
+        except MethodNotAllowed as e:
+            self._send_json_response({"detail": "Method not allowed"}, 405, {'Allow': ', '.join(e.allowed)})
+            return
+        except RouteNotFound:
+            self._send_json_response({"detail": "Not found"}, 404)
+            return
+        self._route_label = route.pattern
+        
+        if route.needs_database and not schema_ready.is_set():
+            self._send_json_response({"detail": "Service is starting, try again shortly"}, 503, {'Retry-After': '1'})
+            return
+        
+        if route.auth:
+            try:
+                if not self._authenticate(route):
+                    return
+            except Exception as e:
+                self._send_json_response({"detail": str(e)}, 500)
+                return
+        route.handler(self, **params)
+    
+    def _authenticate(self, route):
+        """Resolve the bearer token once per request and apply the route's role guard."""
+        auth_header = self.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            self._send_json_response({"detail": "Missing or invalid authorization header"}, 401)
+            return False
+        
+        token = auth_header[len('Bearer '):]
+        with timed_phase('auth'):
+            user_data = token_store.get(token)
+        if user_data is None:
+            self._send_json_response({"detail": "Invalid or expired token"}, 401)
+            return False
+        if not route.allows(user_data):
+            self._send_json_response({"detail": route.forbidden_detail}, 403)
+            return False
+        
+        self.auth_token = token
+        self.user = user_data
+        return True
+    
+    @api_routes.get('/', needs_database=False)
+    def _get_root(self):
+        self._send_json_response({
+            "message": "Welcome to Farmer Marketplace API",
+            "version": "1.0.0",
+            "docs": "/docs"
+        })
+    
+    @api_routes.get('/health', needs_database=False)
+    def _get_health(self):
+        self._send_json_response({"status": "healthy"})
+    
+    @api_routes.get('/health/ready', needs_database=False)
+    def _get_readiness(self):
+        status = 200 if schema_ready.is_set() else 503
+        self._send_json_response(schema_status, status)
+    
+    @api_routes.get('/health/db', needs_database=False)
+    def _get_db_health(self):
+        self._send_json_response({"status": "healthy", "pool": get_db_pool().stats()})
+    
+    @api_routes.get('/health/tokens', needs_database=False)
+    def _get_token_health(self):
+        self._send_json_response(token_store.stats())
     
-    def do_GET(self):
-        """Handle GET requests."""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        if path == '/':
-            self._send_json_response({
-                "message": "Welcome to Farmer Marketplace API",
-                "version": "1.0.0",
-                "docs": "/docs"
-            })
-        elif path == '/health':
-            self._send_json_response({"status": "healthy"})
-        elif path == '/categories/':
-            self._get_categories()
-        elif path == '/products/':
-            self._get_products()
-        elif path == '/products/farmer/my-products' or path == '/products/farmer/my-products/':
-            self._get_farmer_products()
-        elif path == '/auth/me':
-            self._get_current_user()
-        elif path == '/orders/' or path == '/orders':
-            self._get_orders()
-        else:
-            self._send_json_response({"detail": "Not found"}, 404)
+    @api_routes.get('/health/compression', needs_database=False)
+    def _get_compression_health(self):
+        self._send_json_response(compression_stats.snapshot())
     
-    def do_POST(self):
-        """Handle POST requests."""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        if path == '/auth/register':
-            self._register_user()
-        elif path == '/auth/login':
-            self._login_user()
-        elif path == '/products/':
-            self._create_product()
-        elif path == '/users/profile':
-            self._update_profile()
-        elif path == '/orders/' or path == '/orders':
-            self._create_order()
-        else:
-            self._send_json_response({"detail": "Not found"}, 404)
+    @api_routes.get('/health/suggest', needs_database=False)
+    def _get_suggest_health(self):
+        self._send_json_response(suggest_index.stats())
     
+    @api_routes.get('/health/catalog', needs_database=False)
+    def _get_catalog_cache_health(self):
+        self._send_json_response(catalog_cache.stats())
+    
+    @api_routes.get('/metrics', needs_database=False)
+    def _get_metrics(self):
+        """Request metrics in Prometheus text format."""
+        body, encoding = compress_response_body(request_metrics.render().encode(), PROMETHEUS_CONTENT_TYPE,
+                                                self.headers.get('Accept-Encoding'))
+        self.send_response(200)
+        self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self._end_headers_with_keepalive()
+        self.wfile.write(body)
+        self._response_bytes = len(body)
+    
+    @api_routes.get('/categories/')
     def _get_categories(self):
         """Get all categories."""
         conn = get_db_connection()
+        etag = self._catalog_etag(conn, ('categories',))
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            conn.close()
+            self._send_not_modified(etag, CATALOG_CACHE_CONTROL)
+            return
         cursor = conn.cursor()
         
         if USE_SQLITE:
@@ -408,24 +1470,144 @@ class APIHandler(BaseHTTPRequestHandler):
                 })
         
         conn.close()
-        self._send_json_response(categories)
+        self._send_json_response(categories, headers=self._cache_headers(etag, CATALOG_CACHE_CONTROL))
     
+    def _product_filters(self, query):
+        """The category_id, farmer_id and is_organic filters of a catalog query (None after a 400)."""
+        filters = {}
+        try:
+            for name in ('category_id', 'farmer_id'):
+                if name in query:
+                    filters[name] = int(query[name][0])
+        except ValueError:
+            self._send_json_response({"detail": f"Invalid {name}"}, 400)
+            return None
+        if 'is_organic' in query:
+            if query['is_organic'][0].lower() not in ('true', 'false', '1', '0'):
+                self._send_json_response({"detail": "Invalid is_organic"}, 400)
+                return None
+            filters['is_organic'] = query['is_organic'][0].lower() in ('true', '1')
+        return filters
+    
+    @api_routes.get('/products/')
     def _get_products(self):
-        """Get all products."""
+        """Get active, in-stock products.
+        
+        Query parameters: ``sort`` is newest (default), price_asc, price_desc or harvest_date
+        (freshest first, products without a harvest date are left out), ``limit`` caps the page
+        size and ``cursor`` continues after the last product of the previous page (see
+        X-Next-Cursor). Pages seek into the sort key's index, so a deep page costs the same as
+        the first one. Without ``limit`` the rest of the catalog is streamed.
+        
+        ``search`` matches every word against the full-text index of names and descriptions,
+        the last word as a prefix, and switches the default sort to relevance. It combines
+        with the ``category_id``, ``farmer_id`` and ``is_organic`` filters.
+        
+        Pages and listings small enough to hold are kept in the catalog cache.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        
+        search = query.get('search', [''])[0].strip()
+        sort = query.get('sort', [RELEVANCE if search else 'newest'])[0]
+        if sort == RELEVANCE and not search:
+            self._send_json_response({"detail": "Sorting by relevance needs a search"}, 400)
+            return
+        if sort not in PRODUCT_SORTS and sort != RELEVANCE:
+            self._send_json_response({"detail": f"Invalid sort: {sort}"}, 400)
+            return
+        
+        filters = self._product_filters(query)
+        if filters is None:
+            return
+        
+        limit = None
+        if 'limit' in query:
+            try:
+                limit = int(query['limit'][0])
+            except ValueError:
+                self._send_json_response({"detail": "Invalid limit"}, 400)
+                return
+            if limit < 1:
+                self._send_json_response({"detail": "Limit must be at least 1"}, 400)
+                return
+            limit = min(limit, PRODUCTS_MAX_LIMIT)
+        
+        try:
+            cursor_values = decode_product_cursor(query.get('cursor', [None])[0], sort)
+        except InvalidCursor:
+            self._send_json_response({"detail": "Invalid cursor"}, 400)
+            return
+        
+        cache_key = catalog_cache.listing_key(filters, search, sort, limit, query.get('cursor', [None])[0])
+        cached = catalog_cache.get(cache_key)
+        if cached is not None:
+            versions, body, page_headers = cached
+            etag = self._catalog_etag(None, ('products', 'categories'), versions=versions)
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                self._send_not_modified(etag, CATALOG_CACHE_CONTROL)
+                return
+            self._send_json_body(body, headers={**self._cache_headers(etag, CATALOG_CACHE_CONTROL), **page_headers})
+            return
+        
+        generation = catalog_cache.generation()
         conn = get_db_connection()
-        cursor = conn.cursor()
+        versions = self._catalog_versions(conn, ('products', 'categories'))
+        etag = self._catalog_etag(conn, ('products', 'categories'), versions=versions)
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            conn.close()
+            self._send_not_modified(etag, CATALOG_CACHE_CONTROL)
+            return
+        cursor = self._streaming_cursor(conn, 'products')
+        
+        placeholder = '?' if USE_SQLITE else '%s'
+        dialect = 'sqlite' if USE_SQLITE else 'postgresql'
+        where = ["p.is_active = 1" if USE_SQLITE else "p.is_active = TRUE", "p.quantity_available > 0"]
+        params = []
+        for name, value in filters.items():
+            where.append(f"p.{name} = {placeholder}")
+            params.append(value)
+        
+        if sort == RELEVANCE:
+            sort_key, descending = 'm.rank', False
+        else:
+            column, descending = PRODUCT_SORTS[sort]
+            sort_key = f'p.{column}'
+            if column == 'harvest_date':
+                where.append("p.harvest_date IS NOT NULL")
+        direction = 'DESC' if descending else 'ASC'
+        
+        matches = ''
+        if search:
+            terms = search_terms(search)
+            if not terms:
+                conn.close()
+                self._send_json_response([], headers=self._cache_headers(etag, CATALOG_CACHE_CONTROL))
+                return
+            # The filters move into the match statement, ahead of its SEARCH_MAX_MATCHES cap
+            matches = f"JOIN ({match_sql(dialect, placeholder, where)}) m ON m.id = p.id"
+            params.insert(0, search_expression(terms, dialect))
+            where = []
+        if cursor_values is not None:
+            # A row-value comparison is a single range on the (column, id) index
+            where.append(f"({sort_key}, p.id) {'<' if descending else '>'} ({placeholder}, {placeholder})")
+            params.extend(cursor_values)
+        
+        # Fetch one extra row to know whether another page exists
+        cursor.execute(f'''
+            SELECT p.id, p.name, p.description, p.price_per_unit, p.unit_type, 
+                   p.quantity_available, p.is_organic, c.name as category_name, p.harvest_date,
+                   {sort_key} as sort_key
+            FROM products p 
+            JOIN categories c ON p.category_id = c.id 
+            {matches}
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY {sort_key} {direction}, p.id {direction}
+            {f'LIMIT {placeholder}' if limit is not None else ''}
+        ''', params + [limit + 1] if limit is not None else params)
         
         if USE_SQLITE:
-            cursor.execute('''
-                SELECT p.id, p.name, p.description, p.price_per_unit, p.unit_type, 
-                       p.quantity_available, p.is_organic, c.name as category_name
-                FROM products p 
-                JOIN categories c ON p.category_id = c.id 
-                WHERE p.is_active = 1 AND p.quantity_available > 0
-            ''')
-            products = []
-            for row in cursor.fetchall():
-                products.append({
+            def product(row):
+                return {
                     "id": row[0],
                     "name": row[1],
                     "description": row[2],
@@ -434,56 +1616,125 @@ class APIHandler(BaseHTTPRequestHandler):
                     "quantity_available": row[5],
                     "is_organic": bool(row[6]),
                     "category": {"name": row[7]},
+                    "harvest_date": row[8],
                     "is_active": True,
                     "is_available": True
-                })
+                }
+            
+            def page_key(row):
+                return row[9], row[0]
         else:
-            cursor.execute('''
-                SELECT p.id, p.name, p.description, p.price_per_unit, p.unit_type, 
-                       p.quantity_available, p.is_organic, c.name as category_name
-                FROM products p 
-                JOIN categories c ON p.category_id = c.id 
-                WHERE p.is_active = TRUE AND p.quantity_available > 0
-            ''')
-            products = []
-            for row in cursor.fetchall():
-                products.append({
+            def product(row):
+                return {
                     "id": row['id'],
                     "name": row['name'],
                     "description": row['description'],
-                    "price_per_unit": float(row['price_per_unit']),
+                    "price_per_unit": row['price_per_unit'],
                     "unit_type": row['unit_type'],
                     "quantity_available": row['quantity_available'],
                     "is_organic": row['is_organic'],
                     "category": {"name": row['category_name']},
+                    "harvest_date": row['harvest_date'],
                     "is_active": True,
                     "is_available": True
-                })
+                }
+            
+            def page_key(row):
+                return row['sort_key'], row['id']
+        
+        try:
+            page_headers = {}
+            if limit is not None:
+                # A page is at most PRODUCTS_MAX_LIMIT rows, small enough to hold
+                rows = cursor.fetchall()
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    page_headers['X-Next-Cursor'] = encode_cursor(sort, *page_key(rows[-1]))
+            else:
+                rows = iter_cursor(cursor)
+            products = map_rows(product, rows)
+            chunks = capture_body(
+                iter_json_array(products),
+                lambda body: catalog_cache.set(cache_key, (versions, body, page_headers), generation)
+            )
+            self._send_json_stream(chunks, headers={**self._cache_headers(etag, CATALOG_CACHE_CONTROL), **page_headers})
+        finally:
+            conn.close()
+    
+    @api_routes.get(('/products/facets', '/products/facets/'))
+    def _get_product_facets(self):
+        """Listed product counts by category, organic flag, price bucket and farmer.
+        
+        Takes the ``search``, ``category_id``, ``farmer_id`` and ``is_organic`` filters of
+        GET /products/. Each facet is counted under every filter except its own.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        search = query.get('search', [''])[0].strip()
+        filters = self._product_filters(query)
+        if filters is None:
+            return
+        
+        conn = get_db_connection()
+        etag = self._catalog_etag(conn, ('products', 'categories'))
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            conn.close()
+            self._send_not_modified(etag, CATALOG_CACHE_CONTROL)
+            return
+        
+        placeholder = '?' if USE_SQLITE else '%s'
+        dialect = 'sqlite' if USE_SQLITE else 'postgresql'
+        match, params = None, []
+        if search:
+            terms = search_terms(search)
+            if not terms:
+                conn.close()
+                self._send_json_response(facet_response([]), headers=self._cache_headers(etag, CATALOG_CACHE_CONTROL))
+                return
+            match = match_ids_sql(dialect, placeholder)
+            params.append(search_expression(terms, dialect))
+        sql, filter_params = facet_sql(filters, placeholder, dialect, match)
         
+        cursor = conn.cursor()
+        cursor.execute(sql, params + filter_params)
+        rows = cursor.fetchall()
         conn.close()
-        self._send_json_response(products)
+        if not USE_SQLITE:
+            rows = [(row['facet'], row['value'], row['products'], row['category_name'], row['farmer_name'])
+                    for row in rows]
+        self._send_json_response(facet_response(rows), headers=self._cache_headers(etag, CATALOG_CACHE_CONTROL))
+    
+    @api_routes.get(('/products/suggest', '/products/suggest/'))
+    def _get_product_suggestions(self):
+        """Completions for a partly typed search: product and category names, most products first.
+        
+        ``q`` is the text typed so far; any word of a name may match it. Served from the
+        in-memory prefix index, so no query runs once the index is loaded.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        try:
+            limit = int(query.get('limit', [SUGGEST_MAX_RESULTS])[0])
+        except ValueError:
+            self._send_json_response({"detail": "Invalid limit"}, 400)
+            return
+        if limit < 1:
+            self._send_json_response({"detail": "Limit must be at least 1"}, 400)
+            return
+        self._send_json_response(suggest_index.suggest(query.get('q', [''])[0], min(limit, SUGGEST_MAX_RESULTS)))
     
+    @api_routes.get(('/products/farmer/my-products', '/products/farmer/my-products/'),
+                    roles=('farmer',), forbidden_detail="Only farmers can access this endpoint")
     def _get_farmer_products(self):
         """Get products for a specific farmer."""
         try:
-            # Get Authorization header
-            auth_header = self.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
-                self._send_json_response({"detail": "Missing or invalid authorization header"}, 401)
-                return
-            
-            token = auth_header.split(' ')[1]
-            if token not in active_tokens:
-                self._send_json_response({"detail": "Invalid or expired token"}, 401)
-                return
-            
-            user_data = active_tokens[token]
-            if user_data['role'] != 'farmer':
-                self._send_json_response({"detail": "Only farmers can access this endpoint"}, 403)
-                return
+            user_data = self.user
             
             conn = get_db_connection()
-            cursor = conn.cursor()
+            etag = self._catalog_etag(conn, ('products', 'categories'), user_data['id'])
+            if etag_matches(self.headers.get('If-None-Match'), etag):
+                conn.close()
+                self._send_not_modified(etag, PRIVATE_CACHE_CONTROL)
+                return
+            cursor = self._streaming_cursor(conn, 'farmer_products')
             
             if USE_SQLITE:
                 cursor.execute('''
@@ -495,9 +1746,8 @@ class APIHandler(BaseHTTPRequestHandler):
                     ORDER BY p.created_at DESC
                 ''', (user_data['id'],))
                 
-                products = []
-                for row in cursor.fetchall():
-                    products.append({
+                def product(row):
+                    return {
                         "id": row[0],
                         "name": row[1],
                         "description": row[2],
@@ -508,7 +1758,7 @@ class APIHandler(BaseHTTPRequestHandler):
                         "category": {"name": row[7]},
                         "is_active": bool(row[8]),
                         "is_available": row[5] > 0
-                    })
+                    }
             else:
                 cursor.execute('''
                     SELECT p.id, p.name, p.description, p.price_per_unit, p.unit_type, 
@@ -519,27 +1769,87 @@ class APIHandler(BaseHTTPRequestHandler):
                     ORDER BY p.created_at DESC
                 ''', (user_data['id'],))
                 
-                products = []
-                for row in cursor.fetchall():
-                    products.append({
+                def product(row):
+                    return {
                         "id": row['id'],
                         "name": row['name'],
                         "description": row['description'],
-                        "price_per_unit": float(row['price_per_unit']),
+                        "price_per_unit": row['price_per_unit'],
                         "unit_type": row['unit_type'],
                         "quantity_available": row['quantity_available'],
                         "is_organic": row['is_organic'],
                         "category": {"name": row['category_name']},
                         "is_active": row['is_active'],
                         "is_available": row['quantity_available'] > 0
-                    })
+                    }
             
-            conn.close()
-            self._send_json_response(products)
+            try:
+                products = map_rows(product, iter_cursor(cursor))
+                self._send_json_stream(iter_json_array(products), headers=self._cache_headers(etag, PRIVATE_CACHE_CONTROL))
+            finally:
+                conn.close()
             
         except Exception as e:
             self._send_json_response({"detail": str(e)}, 500)
     
+    @api_routes.get('/products/{product_id:int}')
+    def _get_product(self, product_id):
+        """Get a specific product by ID (served from the catalog cache when it is there)."""
+        cache_key = catalog_cache.product_key(product_id)
+        body = catalog_cache.get(cache_key)
+        if body is not None:
+            self._send_json_body(body)
+            return
+        
+        generation = catalog_cache.generation()
+        placeholder = '?' if USE_SQLITE else '%s'
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT p.id, p.farmer_id, p.category_id, p.name, p.description, p.price_per_unit,
+                       p.unit_type, p.quantity_available, p.is_organic, p.is_active, p.harvest_date,
+                       p.created_at, c.name as category_name
+                FROM products p
+                LEFT JOIN categories c ON p.category_id = c.id
+                WHERE p.id = {placeholder}
+            ''', (product_id,))
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+        if not row:
+            self._send_json_response({"detail": "Product not found"}, 404)
+            return
+        
+        if not USE_SQLITE:
+            row = tuple(row[column] for column in (
+                'id', 'farmer_id', 'category_id', 'name', 'description', 'price_per_unit', 'unit_type',
+                'quantity_available', 'is_organic', 'is_active', 'harvest_date', 'created_at', 'category_name',
+            ))
+        (prod_id, farmer_id, category_id, name, description, price, unit_type, quantity,
+         is_organic, is_active, harvest_date, created_at, category_name) = row
+        product = {
+            "id": prod_id,
+            "farmer_id": farmer_id,
+            "category_id": category_id,
+            "name": name,
+            "description": description,
+            "price_per_unit": price,
+            "unit_type": unit_type,
+            "quantity_available": quantity,
+            "is_organic": bool(is_organic),
+            "category": {"name": category_name},
+            "harvest_date": harvest_date,
+            "created_at": created_at,
+            "is_active": bool(is_active),
+            "is_available": bool(is_active) and quantity > 0
+        }
+        with timed_phase('encode'):
+            body = json_dumps(product)
+        catalog_cache.set(cache_key, body, generation)
+        self._send_json_body(body)
+    
+    @api_routes.post('/auth/register')
     def _register_user(self):
         """Register a new user."""
         try:
@@ -602,6 +1912,7 @@ class APIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self._send_json_response({"detail": str(e)}, 500)
     
+    @api_routes.post('/auth/login')
     def _login_user(self):
         """Login user."""
         try:
@@ -676,7 +1987,7 @@ class APIHandler(BaseHTTPRequestHandler):
                 "is_active": user_data['is_active'],
                 "is_verified": True
             }
-            active_tokens[token] = token_user_data
+            token_store.set(token, token_user_data)
             
             self._send_json_response({
                 "access_token": token,
@@ -686,67 +1997,16 @@ class APIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self._send_json_response({"detail": str(e)}, 500)
     
+    @api_routes.get('/auth/me', auth=True)
     def _get_current_user(self):
         """Get current user info from token."""
-        try:
-            # Get Authorization header
-            auth_header = self.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
-                self._send_json_response({"detail": "Missing or invalid authorization header"}, 401)
-                return
-            
-            token = auth_header.split(' ')[1]
-            
-            # Get user data from token store
-            if token in active_tokens:
-                user_data = active_tokens[token]
-                self._send_json_response(user_data)
-            else:
-                self._send_json_response({"detail": "Invalid or expired token"}, 401)
-                
-        except Exception as e:
-            self._send_json_response({"detail": str(e)}, 500)
-    
-    def do_PUT(self):
-        """Handle PUT requests."""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        if path.startswith('/products/'):
-            self._update_product()
-        elif path == '/users/profile':
-            self._update_profile()
-        else:
-            self._send_json_response({"detail": "Not found"}, 404)
-    
-    def do_DELETE(self):
-        """Handle DELETE requests."""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        if path.startswith('/products/'):
-            self._delete_product()
-        else:
-            self._send_json_response({"detail": "Not found"}, 404)
+        self._send_json_response(self.user)
     
+    @api_routes.post('/products/', roles=('farmer',), forbidden_detail="Only farmers can create products")
     def _create_product(self):
         """Create a new product."""
         try:
-            # Get Authorization header
-            auth_header = self.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
-                self._send_json_response({"detail": "Missing or invalid authorization header"}, 401)
-                return
-            
-            token = auth_header.split(' ')[1]
-            if token not in active_tokens:
-                self._send_json_response({"detail": "Invalid or expired token"}, 401)
-                return
-            
-            user_data = active_tokens[token]
-            if user_data['role'] != 'farmer':
-                self._send_json_response({"detail": "Only farmers can create products"}, 403)
-                return
+            user_data = self.user
             
             data = self._get_request_body()
             required_fields = ['name', 'description', 'price_per_unit', 'unit_type', 'quantity_available', 'category_id']
@@ -773,6 +2033,14 @@ class APIHandler(BaseHTTPRequestHandler):
                 self._send_json_response({"detail": "Quantity cannot be negative"}, 400)
                 return
             
+            harvest_date = None
+            if data.get('harvest_date'):
+                try:
+                    harvest_date = date.fromisoformat(str(data['harvest_date'])).isoformat()
+                except ValueError:
+                    self._send_json_response({"detail": "Invalid harvest date, expected YYYY-MM-DD"}, 400)
+                    return
+            
             conn = get_db_connection()
             cursor = conn.cursor()
             
@@ -790,26 +2058,30 @@ class APIHandler(BaseHTTPRequestHandler):
             if USE_SQLITE:
                 cursor.execute('''
                     INSERT INTO products (farmer_id, category_id, name, description, price_per_unit, 
-                                        unit_type, quantity_available, is_organic)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                                        unit_type, quantity_available, is_organic, harvest_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     user_data['id'], category_id, data['name'], data['description'],
-                    price, data['unit_type'], quantity, data.get('is_organic', False)
+                    price, data['unit_type'], quantity, data.get('is_organic', False), harvest_date
                 ))
                 product_id = cursor.lastrowid
             else:
                 cursor.execute('''
                     INSERT INTO products (farmer_id, category_id, name, description, price_per_unit, 
-                                        unit_type, quantity_available, is_organic)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
+                                        unit_type, quantity_available, is_organic, harvest_date)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
                 ''', (
                     user_data['id'], category_id, data['name'], data['description'],
-                    price, data['unit_type'], quantity, data.get('is_organic', False)
+                    price, data['unit_type'], quantity, data.get('is_organic', False), harvest_date
                 ))
                 product_id = cursor.fetchone()['id']
             
             conn.commit()
             conn.close()
+            suggest_index.product_changed(None, data['name'])
+            catalog_cache.product_changed(
+                product_id, listing_state(category_id, user_data['id'], data.get('is_organic', False))
+            )
             
             self._send_json_response({
                 "id": product_id,
@@ -819,33 +2091,11 @@ class APIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self._send_json_response({"detail": str(e)}, 500)
     
-    def _update_product(self):
+    @api_routes.put('/products/{product_id:int}', auth=True)
+    def _update_product(self, product_id):
         """Update an existing product."""
         try:
-            # Get Authorization header
-            auth_header = self.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
-                self._send_json_response({"detail": "Missing or invalid authorization header"}, 401)
-                return
-            
-            token = auth_header.split(' ')[1]
-            if token not in active_tokens:
-                self._send_json_response({"detail": "Invalid or expired token"}, 401)
-                return
-            
-            user_data = active_tokens[token]
-            
-            # Extract product ID from URL
-            path_parts = self.path.split('/')
-            if len(path_parts) < 3:
-                self._send_json_response({"detail": "Invalid product ID"}, 400)
-                return
-            
-            try:
-                product_id = int(path_parts[2])
-            except ValueError:
-                self._send_json_response({"detail": "Invalid product ID"}, 400)
-                return
+            user_data = self.user
             
             data = self._get_request_body()
             
@@ -854,9 +2104,9 @@ class APIHandler(BaseHTTPRequestHandler):
             
             # Check if product exists and belongs to the farmer
             if USE_SQLITE:
-                cursor.execute("SELECT farmer_id FROM products WHERE id = ?", (product_id,))
+                cursor.execute("SELECT farmer_id, name, is_active, category_id, is_organic FROM products WHERE id = ?", (product_id,))
             else:
-                cursor.execute("SELECT farmer_id FROM products WHERE id = %s", (product_id,))
+                cursor.execute("SELECT farmer_id, name, is_active, category_id, is_organic FROM products WHERE id = %s", (product_id,))
             
             result = cursor.fetchone()
             if not result:
@@ -903,6 +2153,14 @@ class APIHandler(BaseHTTPRequestHandler):
             if 'is_organic' in data:
                 update_fields.append('is_organic = ?' if USE_SQLITE else 'is_organic = %s')
                 update_values.append(data['is_organic'])
+            if 'harvest_date' in data:
+                try:
+                    harvest_date = date.fromisoformat(str(data['harvest_date'])).isoformat() if data['harvest_date'] else None
+                except ValueError:
+                    self._send_json_response({"detail": "Invalid harvest date, expected YYYY-MM-DD"}, 400)
+                    return
+                update_fields.append('harvest_date = ?' if USE_SQLITE else 'harvest_date = %s')
+                update_values.append(harvest_date)
             
             if update_fields:
                 update_values.append(product_id)
@@ -911,6 +2169,15 @@ class APIHandler(BaseHTTPRequestHandler):
                     UPDATE products SET {', '.join(update_fields)} WHERE id = {placeholder}
                 ''', update_values)
                 conn.commit()
+                old_name, is_active = (result[1], result[2]) if USE_SQLITE else (result['name'], result['is_active'])
+                if is_active and 'name' in data:
+                    suggest_index.product_changed(old_name, data['name'])
+                category_id, is_organic = (result[3], result[4]) if USE_SQLITE else (result['category_id'], result['is_organic'])
+                catalog_cache.product_changed(
+                    product_id,
+                    listing_state(category_id, farmer_id, is_organic),
+                    listing_state(category_id, farmer_id, data.get('is_organic', is_organic)),
+                )
             
             conn.close()
             self._send_json_response({"message": "Product updated successfully"})
@@ -918,42 +2185,20 @@ class APIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self._send_json_response({"detail": str(e)}, 500)
     
-    def _delete_product(self):
+    @api_routes.delete('/products/{product_id:int}', auth=True)
+    def _delete_product(self, product_id):
         """Delete a product."""
         try:
-            # Get Authorization header
-            auth_header = self.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
-                self._send_json_response({"detail": "Missing or invalid authorization header"}, 401)
-                return
-            
-            token = auth_header.split(' ')[1]
-            if token not in active_tokens:
-                self._send_json_response({"detail": "Invalid or expired token"}, 401)
-                return
-            
-            user_data = active_tokens[token]
-            
-            # Extract product ID from URL
-            path_parts = self.path.split('/')
-            if len(path_parts) < 3:
-                self._send_json_response({"detail": "Invalid product ID"}, 400)
-                return
-            
-            try:
-                product_id = int(path_parts[2])
-            except ValueError:
-                self._send_json_response({"detail": "Invalid product ID"}, 400)
-                return
+            user_data = self.user
             
             conn = get_db_connection()
             cursor = conn.cursor()
             
             # Check if product exists and belongs to the farmer
             if USE_SQLITE:
-                cursor.execute("SELECT farmer_id FROM products WHERE id = ?", (product_id,))
+                cursor.execute("SELECT farmer_id, name, is_active, category_id, is_organic FROM products WHERE id = ?", (product_id,))
             else:
-                cursor.execute("SELECT farmer_id FROM products WHERE id = %s", (product_id,))
+                cursor.execute("SELECT farmer_id, name, is_active, category_id, is_organic FROM products WHERE id = %s", (product_id,))
             
             result = cursor.fetchone()
             if not result:
@@ -973,27 +2218,23 @@ class APIHandler(BaseHTTPRequestHandler):
             
             conn.commit()
             conn.close()
+            old_name, is_active = (result[1], result[2]) if USE_SQLITE else (result['name'], result['is_active'])
+            if is_active:
+                suggest_index.product_changed(old_name, None)
+            category_id, is_organic = (result[3], result[4]) if USE_SQLITE else (result['category_id'], result['is_organic'])
+            catalog_cache.product_changed(product_id, listing_state(category_id, farmer_id, is_organic))
             
             self._send_json_response({"message": "Product deleted successfully"})
             
         except Exception as e:
             self._send_json_response({"detail": str(e)}, 500)
     
+    @api_routes.put('/users/profile', auth=True)
+    @api_routes.post('/users/profile', auth=True)
     def _update_profile(self):
         """Update user profile."""
         try:
-            # Get Authorization header
-            auth_header = self.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
-                self._send_json_response({"detail": "Missing or invalid authorization header"}, 401)
-                return
-            
-            token = auth_header.split(' ')[1]
-            if token not in active_tokens:
-                self._send_json_response({"detail": "Invalid or expired token"}, 401)
-                return
-            
-            user_data = active_tokens[token]
+            user_data = self.user
             data = self._get_request_body()
             
             conn = get_db_connection()
@@ -1022,10 +2263,13 @@ class APIHandler(BaseHTTPRequestHandler):
                 conn.commit()
                 
                 # Update token data
-                if 'first_name' in data:
-                    active_tokens[token]['first_name'] = data['first_name']
-                if 'last_name' in data:
-                    active_tokens[token]['last_name'] = data['last_name']
+                if 'first_name' in data or 'last_name' in data:
+                    user_data = dict(user_data)
+                    if 'first_name' in data:
+                        user_data['first_name'] = data['first_name']
+                    if 'last_name' in data:
+                        user_data['last_name'] = data['last_name']
+                    token_store.update(self.auth_token, user_data)
             
             conn.close()
             self._send_json_response({"message": "Profile updated successfully"})
@@ -1033,24 +2277,15 @@ class APIHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self._send_json_response({"detail": str(e)}, 500)
     
+    @api_routes.post(('/orders', '/orders/'), roles=('customer',), forbidden_detail="Only customers can create orders")
     def _create_order(self):
-        """Create a new order."""
+        """Create a new order.
+        
+        Stock is reserved with one conditional UPDATE per product inside a single transaction,
+        so concurrent checkouts can never sell more than quantity_available.
+        """
         try:
-            # Get Authorization header
-            auth_header = self.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
-                self._send_json_response({"detail": "Missing or invalid authorization header"}, 401)
-                return
-            
-            token = auth_header.split(' ')[1]
-            if token not in active_tokens:
-                self._send_json_response({"detail": "Invalid or expired token"}, 401)
-                return
-            
-            user_data = active_tokens[token]
-            if user_data.get('role') != 'customer':
-                self._send_json_response({"detail": "Only customers can create orders"}, 403)
-                return
+            user_data = self.user
             
             data = self._get_request_body()
             
@@ -1062,33 +2297,56 @@ class APIHandler(BaseHTTPRequestHandler):
                 self._send_json_response({"detail": "Delivery address is required"}, 400)
                 return
             
+            # Merge repeated products so each stock row is decremented exactly once
+            quantities = {}
+            for item in data['items']:
+                try:
+                    product_id = int(item.get('product_id'))
+                    quantity = int(item.get('quantity', 1))
+                except (TypeError, ValueError):
+                    self._send_json_response({"detail": "Invalid product_id or quantity"}, 400)
+                    return
+                if quantity < 1:
+                    self._send_json_response({"detail": "Quantity must be at least 1"}, 400)
+                    return
+                quantities[product_id] = quantities.get(product_id, 0) + quantity
+            
+            product_ids = sorted(quantities)  # Fixed order keeps row locks deadlock-free
+            placeholder = '?' if USE_SQLITE else '%s'
+            id_list = ', '.join([placeholder] * len(product_ids))
+            
             conn = get_db_connection()
             cursor = conn.cursor()
             
+            # Fetch every product in the cart at once
+            cursor.execute(
+                f"SELECT id, farmer_id, name, price_per_unit, quantity_available, category_id, is_organic "
+                f"FROM products WHERE id IN ({id_list})",
+                product_ids
+            )
+            if USE_SQLITE:
+                products = {row[0]: row for row in cursor.fetchall()}
+            else:
+                products = {
+                    row['id']: (row['id'], row['farmer_id'], row['name'], row['price_per_unit'], row['quantity_available'],
+                                row['category_id'], row['is_organic'])
+                    for row in cursor.fetchall()
+                }
+            
             # Calculate total and validate products
             total_amount = 0.0
             farmer_id = None
             order_items = []
             
-            for item in data['items']:
-                product_id = item.get('product_id')
-                quantity = item.get('quantity', 1)
-                
-                if USE_SQLITE:
-                    cursor.execute("SELECT id, farmer_id, name, price_per_unit, quantity_available FROM products WHERE id = ?", (product_id,))
-                else:
-                    cursor.execute("SELECT id, farmer_id, name, price_per_unit, quantity_available FROM products WHERE id = %s", (product_id,))
-                
-                product = cursor.fetchone()
+            for product_id in product_ids:
+                quantity = quantities[product_id]
+                product = products.get(product_id)
                 if not product:
                     conn.close()
                     self._send_json_response({"detail": f"Product {product_id} not found"}, 404)
                     return
                 
-                if USE_SQLITE:
-                    prod_id, prod_farmer_id, prod_name, prod_price, prod_qty = product
-                else:
-                    prod_id, prod_farmer_id, prod_name, prod_price, prod_qty = product.values()
+                prod_id, prod_farmer_id, prod_name, prod_price, prod_qty = product[:5]
                 
                 if prod_qty < quantity:
                     conn.close()
@@ -1108,10 +2366,38 @@ class APIHandler(BaseHTTPRequestHandler):
                 order_items.append({
                     'product_id': prod_id,
                     'quantity': quantity,
-                    'unit_price': float(prod_price),
+                    'unit_price': prod_price,
                     'total_price': item_total
                 })
             
+            if USE_SQLITE:
+                # Take the write lock now rather than upgrading mid-transaction
+                if conn.in_transaction:
+                    conn.rollback()
+                cursor.execute("BEGIN IMMEDIATE")
+            
+            # Reserve stock: each UPDATE only matches while enough stock is left
+            cursor.executemany(
+                f"UPDATE products SET quantity_available = quantity_available - {placeholder} "
+                f"WHERE id = {placeholder} AND quantity_available >= {placeholder}",
+                [(item['quantity'], item['product_id'], item['quantity']) for item in order_items]
+            )
+            if cursor.rowcount != len(order_items):
+                conn.rollback()
+                cursor.execute(
+                    f"SELECT id, name, quantity_available FROM products WHERE id IN ({id_list})",
+                    product_ids
+                )
+                detail = "Not enough stock for one or more products"
+                for row in cursor.fetchall():
+                    prod_id, prod_name, prod_qty = row if USE_SQLITE else (row['id'], row['name'], row['quantity_available'])
+                    if prod_qty < quantities[prod_id]:
+                        detail = f"Not enough stock for {prod_name}. Available: {prod_qty}"
+                        break
+                conn.close()
+                self._send_json_response({"detail": detail}, 400)
+                return
+            
             # Create order
             if USE_SQLITE:
                 cursor.execute('''
@@ -1143,30 +2429,15 @@ class APIHandler(BaseHTTPRequestHandler):
                     data.get('notes'),
                     'pending'
                 ))
-                order_id = cursor.fetchone()[0]
-            
-            # Create order items and update product quantities
-            for item in order_items:
-                if USE_SQLITE:
-                    cursor.execute('''
-                        INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (order_id, item['product_id'], item['quantity'], item['unit_price'], item['total_price']))
-                    
-                    cursor.execute('''
-                        UPDATE products SET quantity_available = quantity_available - ? WHERE id = ?
-                    ''', (item['quantity'], item['product_id']))
-                else:
-                    cursor.execute('''
-                        INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price)
-                        VALUES (%s, %s, %s, %s, %s)
-                    ''', (order_id, item['product_id'], item['quantity'], item['unit_price'], item['total_price']))
-                    
-                    cursor.execute('''
-                        UPDATE products SET quantity_available = quantity_available - %s WHERE id = %s
-                    ''', (item['quantity'], item['product_id']))
+                order_id = cursor.fetchone()['id']
             
-            conn.commit()
+            # Create order items
+            cursor.executemany(
+                f"INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price) "
+                f"VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})",
+                [(order_id, item['product_id'], item['quantity'], item['unit_price'], item['total_price'])
+                 for item in order_items]
+            )
             
             # Fetch created order
             if USE_SQLITE:
@@ -1180,7 +2451,7 @@ class APIHandler(BaseHTTPRequestHandler):
                     'id': order_row[0],
                     'customer_id': order_row[1],
                     'farmer_id': order_row[2],
-                    'total_amount': float(order_row[3]),
+                    'total_amount': order_row[3],
                     'delivery_address': order_row[4],
                     'delivery_date': order_row[5],
                     'delivery_time': order_row[6],
@@ -1200,76 +2471,88 @@ class APIHandler(BaseHTTPRequestHandler):
                     'id': order_row['id'],
                     'customer_id': order_row['customer_id'],
                     'farmer_id': order_row['farmer_id'],
-                    'total_amount': float(order_row['total_amount']),
+                    'total_amount': order_row['total_amount'],
                     'delivery_address': order_row['delivery_address'],
-                    'delivery_date': str(order_row['delivery_date']) if order_row['delivery_date'] else None,
+                    'delivery_date': order_row['delivery_date'],
                     'delivery_time': order_row['delivery_time'],
                     'notes': order_row['notes'],
                     'status': order_row['status'],
-                    'created_at': str(order_row['created_at']),
+                    'created_at': order_row['created_at'],
                     'items': order_items
                 }
             
+            conn.commit()
             conn.close()
+            # The stock shown for each product changed
+            for item in order_items:
+                product = products[item['product_id']]
+                catalog_cache.product_changed(product[0], listing_state(product[5], product[1], product[6]))
             self._send_json_response(order, 201)
             
         except Exception as e:
             self._send_json_response({"detail": str(e)}, 500)
     
+    @api_routes.get(('/orders', '/orders/'), auth=True)
     def _get_orders(self):
-        """Get orders for the current user."""
+        """Get orders for the current user.
+        
+        Query parameters: ``status`` filters by order status, ``limit`` caps the page size and
+        ``cursor`` continues after the last order of the previous page (see X-Next-Cursor).
+        Items for every order on the page are loaded with one extra query, and unpaginated
+        results are streamed from both cursors without materialising them.
+        """
         try:
-            # Get Authorization header
-            auth_header = self.headers.get('Authorization')
-            if not auth_header or not auth_header.startswith('Bearer '):
-                self._send_json_response({"detail": "Missing or invalid authorization header"}, 401)
-                return
+            user_data = self.user
+            query = parse_qs(urlparse(self.path).query)
             
-            token = auth_header.split(' ')[1]
-            if token not in active_tokens:
-                self._send_json_response({"detail": "Invalid or expired token"}, 401)
+            status_filter = query.get('status', [None])[0]
+            if status_filter is not None and status_filter not in ORDER_STATUSES:
+                self._send_json_response({"detail": f"Invalid status: {status_filter}"}, 400)
                 return
             
-            user_data = active_tokens[token]
-            conn = get_db_connection()
-            cursor = conn.cursor()
+            limit = None
+            if 'limit' in query:
+                try:
+                    limit = int(query['limit'][0])
+                except ValueError:
+                    self._send_json_response({"detail": "Invalid limit"}, 400)
+                    return
+                if limit < 1:
+                    self._send_json_response({"detail": "Limit must be at least 1"}, 400)
+                    return
+                limit = min(limit, ORDERS_MAX_LIMIT)
             
-            # Get orders based on user role
-            if user_data.get('role') == 'customer':
-                if USE_SQLITE:
-                    cursor.execute('''
-                        SELECT id, customer_id, farmer_id, total_amount, delivery_address, delivery_date, 
-                               delivery_time, notes, status, created_at
-                        FROM orders WHERE customer_id = ? ORDER BY created_at DESC
-                    ''', (user_data['id'],))
-                else:
-                    cursor.execute('''
-                        SELECT id, customer_id, farmer_id, total_amount, delivery_address, delivery_date, 
-                               delivery_time, notes, status, created_at
-                        FROM orders WHERE customer_id = %s ORDER BY created_at DESC
-                    ''', (user_data['id'],))
-            else:  # farmer
-                if USE_SQLITE:
-                    cursor.execute('''
-                        SELECT id, customer_id, farmer_id, total_amount, delivery_address, delivery_date, 
-                               delivery_time, notes, status, created_at
-                        FROM orders WHERE farmer_id = ? ORDER BY created_at DESC
-                    ''', (user_data['id'],))
-                else:
-                    cursor.execute('''
-                        SELECT id, customer_id, farmer_id, total_amount, delivery_address, delivery_date, 
-                               delivery_time, notes, status, created_at
-                        FROM orders WHERE farmer_id = %s ORDER BY created_at DESC
-                    ''', (user_data['id'],))
+            try:
+                cursor_values = decode_cursor(query.get('cursor', [None])[0], 2)
+            except InvalidCursor:
+                self._send_json_response({"detail": "Invalid cursor"}, 400)
+                return
             
-            orders = []
-            for row in cursor.fetchall():
-                if USE_SQLITE:
-                    order = {
+            placeholder = '?' if USE_SQLITE else '%s'
+            owner_column = 'customer_id' if user_data.get('role') == 'customer' else 'farmer_id'
+            where = [f"{owner_column} = {placeholder}"]
+            params = [user_data['id']]
+            if status_filter is not None:
+                where.append(f"status = {placeholder}")
+                params.append(status_filter)
+            if cursor_values is not None:
+                where.append(f"(created_at < {placeholder} OR (created_at = {placeholder} AND id < {placeholder}))")
+                params.extend([cursor_values[0], cursor_values[0], cursor_values[1]])
+            
+            order_filter = f"FROM orders WHERE {' AND '.join(where)} ORDER BY created_at DESC, id DESC"
+            # The page itself takes limit rows; the orders query reads one more to find the next page
+            order_params, page_params = params, params
+            if limit is not None:
+                order_filter += f" LIMIT {placeholder}"
+                order_params, page_params = params + [limit + 1], params + [limit]
+            
+            if USE_SQLITE:
+                def order(row):
+                    return {
                         'id': row[0],
                         'customer_id': row[1],
                         'farmer_id': row[2],
-                        'total_amount': float(row[3]),
+                        'total_amount': row[3],
                         'delivery_address': row[4],
                         'delivery_date': row[5],
                         'delivery_time': row[6],
@@ -1278,78 +2561,364 @@ class APIHandler(BaseHTTPRequestHandler):
                         'created_at': row[9],
                         'items': []
                     }
-                else:
-                    order = {
+                
+                def order_item(row):
+                    order_id, product_id, quantity, unit_price, total_price = row
+                    return order_id, {
+                        'product_id': product_id,
+                        'quantity': quantity,
+                        'unit_price': unit_price,
+                        'total_price': total_price
+                    }
+            else:
+                def order(row):
+                    return {
                         'id': row['id'],
                         'customer_id': row['customer_id'],
                         'farmer_id': row['farmer_id'],
-                        'total_amount': float(row['total_amount']),
+                        'total_amount': row['total_amount'],
                         'delivery_address': row['delivery_address'],
-                        'delivery_date': str(row['delivery_date']) if row['delivery_date'] else None,
+                        'delivery_date': row['delivery_date'],
                         'delivery_time': row['delivery_time'],
                         'notes': row['notes'],
                         'status': row['status'],
-                        'created_at': str(row['created_at']),
+                        'created_at': row['created_at'],
                         'items': []
                     }
                 
-                # Get order items
-                if USE_SQLITE:
-                    cursor.execute('''
-                        SELECT product_id, quantity, unit_price, total_price
-                        FROM order_items WHERE order_id = ?
-                    ''', (order['id'],))
+                def order_item(row):
+                    return row['order_id'], {
+                        'product_id': row['product_id'],
+                        'quantity': row['quantity'],
+                        'unit_price': row['unit_price'],
+                        'total_price': row['total_price']
+                    }
+            
+            conn = get_db_connection()
+            try:
+                order_cursor = self._streaming_cursor(conn, 'orders')
+                
+                # Fetch one extra row to know whether another page exists
+                order_cursor.execute(f'''
+                    SELECT id, customer_id, farmer_id, total_amount, delivery_address, delivery_date, 
+                           delivery_time, notes, status, created_at
+                    {order_filter}
+                ''', order_params)
+                
+                next_cursor = None
+                if limit is not None:
+                    # A page is at most ORDERS_MAX_LIMIT rows, small enough to hold
+                    order_rows = order_cursor.fetchall()
+                    if len(order_rows) > limit:
+                        order_rows = order_rows[:limit]
+                        last_order = order(order_rows[-1])
+                        next_cursor = encode_cursor(last_order['created_at'], last_order['id'])
                 else:
-                    cursor.execute('''
-                        SELECT product_id, quantity, unit_price, total_price
-                        FROM order_items WHERE order_id = %s
-                    ''', (order['id'],))
+                    order_rows = iter_cursor(order_cursor)
                 
-                for item_row in cursor.fetchall():
-                    if USE_SQLITE:
-                        order['items'].append({
-                            'product_id': item_row[0],
-                            'quantity': item_row[1],
-                            'unit_price': float(item_row[2]),
-                            'total_price': float(item_row[3])
-                        })
-                    else:
-                        order['items'].append({
-                            'product_id': item_row['product_id'],
-                            'quantity': item_row['quantity'],
-                            'unit_price': float(item_row['unit_price']),
-                            'total_price': float(item_row['total_price'])
-                        })
+                # Get the items of every order in the result in one query, sorted like the
+                # orders themselves so both cursors can be walked together in a single pass
+                item_cursor = None
+                if limit is None or order_rows:
+                    item_cursor = self._streaming_cursor(conn, 'order_items')
+                    item_cursor.execute(f'''
+                        SELECT oi.order_id, oi.product_id, oi.quantity, oi.unit_price, oi.total_price
+                        FROM order_items oi
+                        JOIN (SELECT id, created_at {order_filter}) o ON o.id = oi.order_id
+                        ORDER BY o.created_at DESC, o.id DESC, oi.id
+                    ''', page_params)
                 
-                orders.append(order)
-            
-            conn.close()
-            self._send_json_response(orders)
+                def orders_with_items():
+                    items = map_rows(order_item, iter_cursor(item_cursor)) if item_cursor else iter(())
+                    pending = next(items, None)
+                    for current in map_rows(order, order_rows):
+                        while pending is not None and pending[0] == current['id']:
+                            current['items'].append(pending[1])
+                            pending = next(items, None)
+                        yield current
+                
+                headers = {'X-Next-Cursor': next_cursor} if next_cursor else None
+                self._send_json_stream(iter_json_array(orders_with_items()), headers=headers)
+            finally:
+                conn.close()
             
         except Exception as e:
             self._send_json_response({"detail": str(e)}, 500)
 
-def run_server(port=None):
-    """Run the HTTP server."""
+class APIServer(HTTPServer):
+    """HTTPServer with a listen backlog sized for bursts (the stdlib default is 5)."""
+
+    request_queue_size = LISTEN_BACKLOG
+
+
+class ThreadPoolHTTPServer(APIServer):
+    """HTTP server that hands each request to a bounded pool of threads.
+    
+    A persistent connection holds a thread only while a request is in flight. Between
+    requests it is parked in a selector, handed back to the pool when the next request
+    starts to arrive and closed after KEEPALIVE_TIMEOUT idle seconds, so idle clients never
+    keep active ones waiting for a worker.
+    """
+
+    daemon_threads = True
+    parks_idle_connections = HTTP_KEEPALIVE
+
+    def __init__(self, server_address, handler_class, max_workers, **kwargs):
+        super().__init__(server_address, handler_class, **kwargs)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http-worker')
+        # Stop accepting when every worker is busy so excess load waits in the listen backlog
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._parked = {}  # socket -> (handler, idle deadline)
+        self._parked_lock = threading.Lock()
+        self._closing = False
+        self._selector = selectors.DefaultSelector()
+        self._wakeup, self._wakeup_sender = socket.socketpair()
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
+        threading.Thread(target=self._watch_parked, name='http-keepalive', daemon=True).start()
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            self._pool.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self._serve_connection(request, client_address)
+        finally:
+            self._slots.release()
+
+    def _serve_connection(self, request, client_address, handler=None):
+        """Serve a new connection, or resume a parked ``handler``, until it closes or idles."""
+        try:
+            if handler is None:
+                handler = self.finish_request(request, client_address)
+            else:
+                handler.resume()
+            if handler.parked and self._park(handler):
+                return
+        except Exception:
+            self.handle_error(request, client_address)
+        self._close(request, handler)
+
+    def _park(self, handler):
+        with self._parked_lock:
+            if self._closing:
+                return False
+            wake = not self._parked  # The watcher may be waiting without a deadline
+            self._parked[handler.request] = (handler, time.monotonic() + KEEPALIVE_TIMEOUT)
+            self._selector.register(handler.request, selectors.EVENT_READ, handler)
+        if wake:
+            self._wakeup_sender.send(b'\0')
+        return True
+
+    def _close(self, request, handler=None):
+        if handler is not None:
+            handler.parked = False
+            try:
+                handler.finish()
+            except OSError:
+                pass
+        self.shutdown_request(request)
+
+    def _watch_parked(self):
+        """Resume parked connections as they become readable and close those idle too long."""
+        while True:
+            with self._parked_lock:
+                if self._closing:
+                    break
+                deadline = min((idle_until for _, idle_until in self._parked.values()), default=None)
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            events = self._selector.select(timeout)
+            now = time.monotonic()
+            ready, expired = [], []
+            with self._parked_lock:
+                if self._closing:
+                    break
+                for key, _ in events:
+                    if key.fileobj is self._wakeup:
+                        self._wakeup.recv(4096)
+                    elif self._parked.pop(key.fileobj, None) is not None:
+                        self._selector.unregister(key.fileobj)
+                        ready.append(key.data)
+                for connection, (handler, idle_until) in list(self._parked.items()):
+                    if idle_until <= now:
+                        del self._parked[connection]
+                        self._selector.unregister(connection)
+                        expired.append(handler)
+            for handler in ready:
+                try:
+                    self._pool.submit(self._serve_connection, handler.request, handler.client_address, handler)
+                except RuntimeError:
+                    self._close(handler.request, handler)
+            for handler in expired:
+                self._close(handler.request, handler)
+        self._selector.close()
+        self._wakeup.close()
+
+    def server_close(self):
+        super().server_close()
+        with self._parked_lock:
+            self._closing = True
+            parked = [handler for handler, _ in self._parked.values()]
+            self._parked.clear()
+        self._wakeup_sender.send(b'\0')
+        for handler in parked:
+            self._close(handler.request, handler)
+        self._pool.shutdown(wait=False)
+
+
+class ReusePortHTTPServer(ThreadPoolHTTPServer):
+    """HTTP server that binds with SO_REUSEPORT so several processes share one port.
+    
+    Each process serves one request at a time on a single worker thread, parking idle
+    persistent connections like ThreadPoolHTTPServer.
+    """
+
+    def __init__(self, server_address, handler_class, **kwargs):
+        super().__init__(server_address, handler_class, max_workers=1, **kwargs)
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def create_server(server_address, mode=None, workers=None):
+    """Create the HTTP server for a single process in the given concurrency mode.
+    
+    ``workers`` is the thread count in threaded mode (WEB_THREADS by default).
+    """
+    mode = mode or SERVER_MODE
+
+    if mode == 'threaded':
+        return ThreadPoolHTTPServer(server_address, APIHandler, max_workers=workers or WEB_THREADS)
+    if mode == 'prefork':
+        return ReusePortHTTPServer(server_address, APIHandler)
+    return APIServer(server_address, APIHandler)
+
+
+def serve_prefork(server_address, workers):
+    """Fork worker processes that each accept on the shared port until told to stop."""
+    children = set()
+    stopping = False
+
+    def spawn(verbose=False):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                httpd = create_server(server_address, mode='prefork')
+                # Every worker checks the schema itself; the migration lock serializes them
+                start_schema_check(verbose)
+                httpd.serve_forever()
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for index in range(workers):
+        spawn(verbose=index == 0)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️  Worker {pid} exited, restarting")
+            spawn()
+
+
+def run_server(port=None, mode=None, workers=None):
+    """Run the HTTP server.
+    
+    ``workers`` is the thread count in threaded mode (WEB_THREADS by default) and the process
+    count in prefork mode (WEB_CONCURRENCY by default).
+    """
     if port is None:
         port = int(os.getenv('PORT', 8001))
-    
-    init_db()
+    mode = mode or SERVER_MODE
+
+    if mode == 'prefork' and not (hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')):
+        print("⚠️  Pre-fork mode needs fork() and SO_REUSEPORT, falling back to threaded mode")
+        mode = 'threaded'
+    if mode not in ('threaded', 'prefork', 'single'):
+        print(f"⚠️  Unknown SERVER_MODE '{mode}', using threaded mode")
+        mode = 'threaded'
+    workers = workers or (WEB_CONCURRENCY if mode == 'prefork' else WEB_THREADS)
+    # Pick the token store for the resolved mode, before pre-forked workers inherit it
+    global token_store
+    token_store = create_token_store(mode)
+
     server_address = ('0.0.0.0', port)  # Listen on all interfaces
-    httpd = HTTPServer(server_address, APIHandler)
-    
+    # Bind before touching the database so /health answers while the schema check runs
+    httpd = None if mode == 'prefork' else create_server(server_address, mode=mode, workers=workers)
+
     db_type = "PostgreSQL" if not USE_SQLITE else "SQLite"
     print(f"🚀 Server running on http://0.0.0.0:{port}")
     print(f"🗄️  Database: {db_type}")
+    print(f"🧾 JSON encoder: {json_encoder_name}")
+    if mode == 'single':
+        print(f"⚙️  Concurrency: single-threaded")
+    elif mode == 'threaded':
+        print(f"⚙️  Concurrency: thread pool with {workers} workers")
+    else:
+        print(f"⚙️  Concurrency: {workers} pre-forked worker processes")
     print(f"📚 API endpoints available:")
     print(f"   - GET  /health")
+    print(f"   - GET  /health/ready")
     print(f"   - GET  /categories/")
     print(f"   - GET  /products/")
     print(f"   - POST /auth/register")
     print(f"   - POST /auth/login")
     print(f"   - GET  /auth/me")
-    print(f"\n✨ Ready to accept requests!")
-    httpd.serve_forever()
+    print(f"\n✨ Accepting connections, checking the database schema in the background")
+    sys.stdout.flush()
+
+    if mode == 'prefork':
+        serve_prefork(server_address, workers)
+        return
+
+    start_schema_check()
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Farmer Marketplace API server")
+    parser.add_argument('command', nargs='?', default='serve', choices=('serve', 'migrate', 'seed'),
+                        help="serve (default), migrate the schema, or load the sample data")
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        init_db()
+    elif args.command == 'seed':
+        seed_sample_data()
+    else:
+        run_server()
 
 if __name__ == '__main__':
-    run_server()
\ No newline at end of file
+    main()
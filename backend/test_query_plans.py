@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""Query-plan regression check for CI: runs benchmarks/check_query_plans.py --strict."""
+
+import os
+import subprocess
+import sys
+
+CHECK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'check_query_plans.py')
+
+
+def test_query_plans():
+    """Fail if a statement's plan regressed against benchmarks/query_plans.json."""
+    result = subprocess.run([sys.executable, CHECK, '--strict'], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout[-4000:] + result.stderr[-4000:]
+
+
+if __name__ == "__main__":
+    sys.exit(subprocess.call([sys.executable, CHECK, '--strict']))
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { 
   View, 
   Text, 
@@ -25,19 +25,42 @@ export default function HomeScreen() {
   const { token, user } = useAuth();
   const { addToCart, getItemQuantity } = useCart();
 
+  const latestRequest = useRef(0);
+
   useEffect(() => {
-    loadData();
+    loadCategories();
   }, []);
 
-  const loadData = async () => {
+  // Search and category filtering run on the server; wait for a pause in typing
+  useEffect(() => {
+    const timer = setTimeout(loadProducts, searchQuery ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [searchQuery, selectedCategory]);
+
+  const loadCategories = async () => {
     try {
-      const [productsResponse, categoriesResponse] = await Promise.all([
-        productsAPI.getProducts({}, token),
-        categoriesAPI.getCategories()
-      ]);
-      
-      setProducts(productsResponse.data);
+      const categoriesResponse = await categoriesAPI.getCategories();
       setCategories(categoriesResponse.data);
+    } catch (error) {
+      console.error('Error loading categories:', error);
+    }
+  };
+
+  const loadProducts = async () => {
+    const request = ++latestRequest.current;
+    try {
+      const params = {};
+      if (searchQuery.trim()) {
+        params.search = searchQuery.trim();
+      }
+      if (selectedCategory) {
+        params.category_id = selectedCategory;
+      }
+      const productsResponse = await productsAPI.getProducts(params, token);
+      // Ignore answers to searches the user has already typed past
+      if (request === latestRequest.current) {
+        setProducts(productsResponse.data);
+      }
     } catch (error) {
       console.error('Error loading data:', error);
       Alert.alert('Error', 'Failed to load products');
@@ -46,12 +69,6 @@ export default function HomeScreen() {
     }
   };
 
-  const filteredProducts = products.filter(product => {
-    const matchesSearch = product.name.toLowerCase().includes(searchQuery.toLowerCase());
-    const matchesCategory = !selectedCategory || product.category_id === selectedCategory;
-    return matchesSearch && matchesCategory;
-  });
-
   const handleAddToCart = (product) => {
     addToCart(product, 1);
     Alert.alert(
@@ -125,10 +142,10 @@ export default function HomeScreen() {
       {/* Products Grid */}
       <View style={styles.productsContainer}>
         <Text style={styles.sectionTitle}>
-          Fresh Products ({filteredProducts.length})
+          Fresh Products ({products.length})
         </Text>
         
-        {filteredProducts.length === 0 ? (
+        {products.length === 0 ? (
           <View style={styles.emptyState}>
             <Ionicons name="leaf-outline" size={48} color="#9CA3AF" />
             <Text style={styles.emptyStateText}>
@@ -137,7 +154,7 @@ export default function HomeScreen() {
           </View>
         ) : (
           <View style={styles.productsGrid}>
-            {filteredProducts.map(product => (
+            {products.map(product => (
               <TouchableOpacity
                 key={product.id}
                 style={styles.productCard}